@@ -9,6 +9,14 @@ class AppConfig:
     # Paths
     DATA_DIR = os.path.join(BASE_DIR, "data")
     CSV_FILE = os.path.join(DATA_DIR, "ai_resources_tagged.csv")
+    STORE_FILE = os.path.join(DATA_DIR, "ai_resources.db")
+    AI_CACHE_FILE = os.path.join(DATA_DIR, "ai_cache.db")
+    NEAR_DUP_FILE = os.path.join(DATA_DIR, "chunk_index.db")
+    RESUME_JOURNAL_FILE = os.path.join(DATA_DIR, "resume_journal.db")
+    LINK_INDEX_FILE = os.path.join(DATA_DIR, "link_index.db")
+    MANIFEST_FILE = os.path.join(DATA_DIR, "manifest.db")
+    DEAD_LETTER_FILE = os.path.join(DATA_DIR, "upload_dead_letter.jsonl")
+    LEGACY_HISTORY_FILE = os.path.join(BASE_DIR, "processed_history.log")
     CONFIG_FILE = os.path.join(BASE_DIR, "config.ini")
     ICON_FILE = os.path.join(BASE_DIR, "assets", "icon.ico")
     RESOURCES_DIR = os.path.join(BASE_DIR, "Resources")
@@ -17,12 +25,68 @@ class AppConfig:
     THEME_MODE = "Dark"
     THEME_COLOR = "blue"
 
+    # Performance (overridable from the [SETTINGS] section of config.ini)
+    FILE_WORKERS = 1
+    AI_CONCURRENCY = 1
+    AI_RPM = 0
+    AI_TPM = 0
+    AI_MAX_INFLIGHT = 8
+    AI_JSON_SCHEMA = True
+    AI_CACHE = True
+    AI_CACHE_MB = 256
+    GUIDE_TOP_N = 0
+    GUIDE_EVAL_CHUNKS = 20
+    BATCH_TOKENS = 0
+    CHUNK_SIZE = 4000
+    CHUNK_OVERLAP = 500
+    CHUNK_UNIT = "chars"
+    PDF_BACKEND = "auto"
+    PDF_PROCESSES = 0
+    LINK_PREPASS = True
+    NEAR_DUP = True
+    NEAR_DUP_THRESHOLD = 0.9
+    RESUME_JOURNAL = True
+    WRITE_BATCH_ROWS = 200
+    WRITE_FLUSH_SECONDS = 2.0
+    UPLOAD_BATCH_ROWS = 100
+    UPLOAD_FLUSH_SECONDS = 2.0
+    UPLOAD_QUEUE_SIZE = 1000
+    UPLOAD_RETRIES = 5
+    MIRROR_OVERLAP_MINUTES = 60
+    EDIT_SYNC = True
+    EDIT_SYNC_SECONDS = 5.0
+    FSYNC_POLICY = "normal"
+
     @staticmethod
     def load_settings():
         config = configparser.ConfigParser()
         config.read(AppConfig.CONFIG_FILE)
         return config
 
+    @staticmethod
+    def get_setting(config, key, fallback):
+        """Reads an optional [SETTINGS] value, coerced to the type of `fallback`."""
+        try:
+            raw = config.get('SETTINGS', key, fallback=None)
+            if raw is None or not raw.strip(): return fallback
+            raw = raw.strip()
+            if isinstance(fallback, bool): return raw.lower() in ('1', 'true', 'yes', 'on')
+            return type(fallback)(raw)
+        except Exception:
+            return fallback
+
+    @staticmethod
+    def stream_settings(config):
+        """Keyword arguments for ContentStreamer.generator from config.ini."""
+        unit = AppConfig.get_setting(config, 'CHUNK_UNIT', AppConfig.CHUNK_UNIT).lower()
+        return {
+            'chunk_size': AppConfig.get_setting(config, 'CHUNK_SIZE', AppConfig.CHUNK_SIZE),
+            'overlap': AppConfig.get_setting(config, 'CHUNK_OVERLAP', AppConfig.CHUNK_OVERLAP),
+            'unit': unit if unit in ('chars', 'tokens') else 'chars',
+            'pdf_backend': AppConfig.get_setting(config, 'PDF_BACKEND', AppConfig.PDF_BACKEND).lower(),
+            'pdf_processes': AppConfig.get_setting(config, 'PDF_PROCESSES', AppConfig.PDF_PROCESSES),
+        }
+
     @staticmethod
     def save_settings(config_obj):
         with open(AppConfig.CONFIG_FILE, 'w') as f:
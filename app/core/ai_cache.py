@@ -0,0 +1,126 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from app.config import AppConfig
+
+class AICache:
+    """
+    Persistent, content-addressed cache of AI extraction results.
+    Keyed by a hash of (model, tagging guide, chunk text); evicts least recently used
+    entries once the stored payloads exceed `max_bytes`. Hits only note the use in memory;
+    the stamps are written with the next put (before any eviction) and on close.
+    """
+
+    def __init__(self, db_path, model_name, max_bytes=256 * 1024 * 1024):
+        self.db_path = db_path
+        self.model_name = model_name
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._touched = {}      # key -> last use not yet written
+
+        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS entries (
+                key TEXT PRIMARY KEY,
+                payload TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                last_used REAL NOT NULL
+            )""")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_entries_last_used ON entries(last_used)")
+        self._conn.commit()
+        self._total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+
+    @classmethod
+    def from_config(cls, config, model_name):
+        """Builds the cache from config.ini [SETTINGS], or returns None when disabled."""
+        if not AppConfig.get_setting(config, 'AI_CACHE', AppConfig.AI_CACHE): return None
+        try:
+            max_mb = AppConfig.get_setting(config, 'AI_CACHE_MB', AppConfig.AI_CACHE_MB)
+            return cls(AppConfig.AI_CACHE_FILE, model_name, max_bytes=max_mb * 1024 * 1024)
+        except Exception as e:
+            print(f"⚠️ AI cache unavailable: {e}")
+            return None
+
+    def make_key(self, chunk, tagging_guide):
+        h = hashlib.sha256()
+        for part in (self.model_name, tagging_guide or "", chunk or ""):
+            h.update(part.encode('utf-8', errors='ignore'))
+            h.update(b"\0")
+        return h.hexdigest()
+
+    def get(self, chunk, tagging_guide):
+        """Returns the cached item list, or None on a miss."""
+        key = self.make_key(chunk, tagging_guide)
+        with self._lock:
+            try:
+                row = self._conn.execute("SELECT payload FROM entries WHERE key = ?", (key,)).fetchone()
+                if row is None:
+                    self.misses += 1
+                    return None
+                self._touched[key] = time.time()
+                self.hits += 1
+                return json.loads(row[0])
+            except Exception:
+                self.misses += 1
+                return None
+
+    def put(self, chunk, tagging_guide, items):
+        key = self.make_key(chunk, tagging_guide)
+        try:
+            payload = json.dumps(items, ensure_ascii=False)
+        except (TypeError, ValueError):
+            return
+        size = len(payload.encode('utf-8'))
+        with self._lock:
+            try:
+                self._touched.pop(key, None)
+                self._write_touches()
+                old = self._conn.execute("SELECT size FROM entries WHERE key = ?", (key,)).fetchone()
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO entries (key, payload, size, last_used) VALUES (?, ?, ?, ?)",
+                    (key, payload, size, time.time()))
+                self._total += size - (old[0] if old else 0)
+                if self._total > self.max_bytes:
+                    self._evict()
+                self._conn.commit()
+            except Exception as e:
+                print(f"⚠️ AI cache write failed: {e}")
+
+    def _write_touches(self):
+        if not self._touched: return
+        self._conn.executemany("UPDATE entries SET last_used = ? WHERE key = ?",
+                               [(stamp, key) for key, stamp in self._touched.items()])
+        self._touched.clear()
+
+    def _evict(self):
+        # Trim to 90% of the budget so we do not evict on every single insert
+        target = int(self.max_bytes * 0.9)
+        rows = self._conn.execute("SELECT key, size FROM entries ORDER BY last_used").fetchall()
+        doomed = []
+        for key, size in rows:
+            if self._total <= target: break
+            doomed.append((key,))
+            self._total -= size
+        self._conn.executemany("DELETE FROM entries WHERE key = ?", doomed)
+
+    def stats(self):
+        total = self.hits + self.misses
+        rate = (100.0 * self.hits / total) if total else 0.0
+        return f"AI cache: {self.hits} hits / {self.misses} misses ({rate:.0f}% hit rate), {self._total / 1048576:.1f} MB stored."
+
+    def close(self):
+        with self._lock:
+            try:
+                self._write_touches()
+                self._conn.commit()
+            except Exception as e:
+                print(f"⚠️ AI cache write failed: {e}")
+            try: self._conn.close()
+            except Exception: pass
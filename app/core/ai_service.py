@@ -1,15 +1,57 @@
 import google.generativeai as genai
-import json
+import asyncio
+import threading
 import time
-import gc
+from collections import deque
+
+from app.core.rate_governor import RateGovernor
+from app.core.chunk_batcher import estimate_tokens
+from app.core.json_salvage import parse_items
+
+def _item_schema(*extra):
+    """response_schema for a JSON list of extracted resources (optionally with extra string fields)."""
+    string = {"type": "STRING"}
+    tags = {"type": "ARRAY", "items": string}
+    properties = {"title": string, "provider": string, "description": string, "link": string,
+                  "tags": tags, "tech_tags": tags, "category": string, "subcategory": string}
+    properties.update({name: string for name in extra})
+    return {"type": "ARRAY",
+            "items": {"type": "OBJECT", "properties": properties, "required": ["title", "link", *extra]}}
 
 class AIService:
-    def __init__(self, api_key):
+    MODEL_NAME = 'gemini-2.5-flash'
+    # Attempts per prompt. Quota errors (429/503) are not counted: the governor paces those
+    # waits, and a prompt gives up only after THROTTLE_WAIT seconds of them
+    RETRIES = 5
+    THROTTLE_WAIT = 15 * 60
+
+    def __init__(self, api_key, cache=None, governor=None, structured=True):
         genai.configure(api_key=api_key)
-        self.model = genai.GenerativeModel('gemini-2.5-flash')
+        self.model = genai.GenerativeModel(self.MODEL_NAME)
+        self.cache = cache
+        # One governor per run, shared by every thread and the async loop using this service
+        self.governor = governor or RateGovernor()
+        # Structured output: the model is constrained to the schema instead of free-form JSON
+        self._config = self._batch_config = None
+        if structured:
+            self._config = genai.GenerationConfig(response_mime_type="application/json",
+                                                  response_schema=_item_schema())
+            self._batch_config = genai.GenerationConfig(response_mime_type="application/json",
+                                                        response_schema=_item_schema("chunk_id"))
+        self.responses = 0
+        self.salvaged = 0
+        self.retried = 0
+        self._stats_lock = threading.Lock()
+        self._loop = None
+        self._loop_lock = threading.Lock()
 
-    def extract_resource(self, chunk, tagging_guide):
-        prompt = f"""
+    @staticmethod
+    def _resolve_guide(chunk, tagging_guide):
+        """The guide may be fixed text or a callable building a compact guide per chunk."""
+        return tagging_guide(chunk) if callable(tagging_guide) else tagging_guide
+
+    def _build_prompt(self, chunk, tagging_guide):
+        return f"""
         You are an expert data miner. Find EVERY resource/tool with a valid URL.
         
         {tagging_guide}
@@ -24,50 +66,255 @@ class AIService:
         {chunk}
         '''
         """
-        retries = 3
-        delay = 2
-        for i in range(retries):
-            try:
-                gc.collect()
-                response = self.model.generate_content(prompt)
-                
-                # --- SAFETY FIX STARTS HERE ---
-                
-                # 1. Check if response object exists
-                if not response: 
-                    return []
-
-                # 2. Safely get text (Handles blocked responses)
-                try:
-                    raw_text = response.text
-                except Exception:
-                    # If AI safety filter blocks it, .text raises an error
-                    print(f"      [AI] Chunk blocked by safety filters.")
-                    return []
-
-                # 3. Check if text is None before stripping
-                if raw_text is None:
-                    return []
-
-                # 4. Now safe to strip
-                cleaned = raw_text.strip().replace("```json", "").replace("```", "").strip()
-                
-                # --- SAFETY FIX ENDS HERE ---
-
-                if not cleaned: return []
-                
-                try:
-                    data = json.loads(cleaned)
-                    if isinstance(data, dict): return [data]
-                    if isinstance(data, list): return data
-                    return []
-                except json.JSONDecodeError:
-                    # Sometimes AI returns text instead of JSON. Retry.
-                    continue
 
+    def _parse_response(self, response):
+        """Returns the list of extracted items, or None if nothing usable came back (worth a retry)."""
+        if not response:
+            return []
+
+        try:
+            raw_text = response.text
+        except Exception:
+            # If AI safety filter blocks it, .text raises an error
+            print(f"      [AI] Chunk blocked by safety filters.")
+            return []
+
+        # Fenced, truncated or otherwise broken JSON keeps its complete objects
+        items, complete = parse_items(raw_text, required=('link',))
+        with self._stats_lock:
+            self.responses += 1
+            if items is None: self.retried += 1
+            elif not complete: self.salvaged += 1
+        return items
+
+    def _throttle_spent(self, error, since):
+        """For a quota error: (True, start of the throttled stretch), with start None once THROTTLE_WAIT is spent."""
+        if not self.governor.is_throttle(error): return False, since
+        now = time.monotonic()
+        if since is None: since = now
+        if now - since > self.THROTTLE_WAIT:
+            print(f"⚠️ Gemini quota still exhausted after {self.THROTTLE_WAIT / 60:.0f} min; giving up on this prompt: {error}")
+            return True, None
+        return True, since
+
+    @staticmethod
+    def _prompt_tokens(response):
+        try: return response.usage_metadata.prompt_token_count
+        except Exception: return None
+
+    def _generate(self, prompt, config=None):
+        """Blocking request with retries. Returns parsed items, or None if every attempt failed."""
+        tokens = estimate_tokens(prompt)
+        attempt, throttled = 0, None
+        while attempt < self.RETRIES:
+            self.governor.acquire(tokens)
+            try:
+                response = self.model.generate_content(prompt, generation_config=config or self._config)
             except Exception as e:
-                # print(f"AI Error: {e}")
+                delay = self.governor.release(tokens, error=e, attempt=attempt)
+                if delay is None: return None
+                is_throttle, throttled = self._throttle_spent(e, throttled)
+                if is_throttle:
+                    # The governor's pause (applied in acquire) paces the next attempt
+                    if throttled is None: return None
+                    continue
+                attempt += 1
+                print(f"⚠️ Gemini request failed (attempt {attempt}/{self.RETRIES}): {e}")
                 time.sleep(delay)
-                delay *= 2
+                continue
+            self.governor.release(tokens, used=self._prompt_tokens(response))
+            data = self._parse_response(response)
+            if data is None:
+                attempt += 1
+                continue
+            return data
+
+        return None
+
+    def extract_resource(self, chunk, tagging_guide):
+        """Items found in the chunk, or None if the request failed (no definitive answer)."""
+        tagging_guide = self._resolve_guide(chunk, tagging_guide)
+        if self.cache:
+            cached = self.cache.get(chunk, tagging_guide)
+            if cached is not None: return cached
+
+        data = self._generate(self._build_prompt(chunk, tagging_guide))
+        if data is None: return None
+        # Only definitive answers are cached; exhausted retries are not
+        if self.cache: self.cache.put(chunk, tagging_guide, data)
+        return data
+
+    def parse_stats(self):
+        with self._stats_lock:
+            total = max(1, self.responses)
+            return (f"Gemini responses: {self.responses}, {self.salvaged} salvaged from broken JSON "
+                    f"({self.salvaged / total:.0%}), {self.retried} retried ({self.retried / total:.0%}).")
+
+    # --- MULTI-CHUNK BATCHING ---
+
+    def _build_batch_prompt(self, batch, tagging_guide):
+        sections = "\n".join(
+            f"<<<CHUNK {chunk_id}>>>\n{chunk}\n<<<END {chunk_id}>>>" for chunk_id, chunk in batch
+        )
+        return f"""
+        You are an expert data miner. Find EVERY resource/tool with a valid URL.
+        The text below is split into independent chunks, each wrapped in <<<CHUNK id>>> ... <<<END id>>>.
         
-        return []
\ No newline at end of file
+        {tagging_guide}
+
+        **INSTRUCTIONS:**
+        1. Extract: title, provider, description, link.
+        2. Categorize using the "OFFICIAL TAGGING DICTIONARY".
+        3. Add "chunk_id" to every object: the id of the chunk the resource was found in.
+        4. Output: Strictly formatted JSON LIST of objects.
+
+        **Chunks:**
+        {sections}
+        """
+
+    def extract_batch(self, batch, tagging_guide):
+        """
+        Extracts several chunks with one request.
+        batch: [(chunk_id, chunk_text), ...]. Returns {chunk_id: [items]}, with None for
+        chunks whose request failed.
+        """
+        results = {chunk_id: [] for chunk_id, _ in batch}
+        misses = []
+        for chunk_id, chunk in batch:
+            cached = self.cache.get(chunk, self._resolve_guide(chunk, tagging_guide)) if self.cache else None
+            if cached is None: misses.append((chunk_id, chunk))
+            else: results[chunk_id] = cached
+        if not misses: return results
+
+        if len(misses) == 1:
+            chunk_id, chunk = misses[0]
+            results[chunk_id] = self.extract_resource(chunk, tagging_guide)
+            return results
+
+        combined = "\n".join(chunk for _, chunk in misses)
+        sent_guide = self._resolve_guide(combined, tagging_guide)
+        data = self._generate(self._build_batch_prompt(misses, sent_guide), config=self._batch_config)
+        if data is None:
+            for chunk_id, _ in misses: results[chunk_id] = None
+            return results
+
+        texts = dict(misses)
+        unmapped = 0
+        for item in data:
+            if not isinstance(item, dict): continue
+            chunk_id = str(item.pop('chunk_id', '')).strip()
+            if chunk_id not in texts:
+                # Model dropped or mangled the id: attribute by where the link appears
+                link = str(item.get('link') or '')
+                chunk_id = next((cid for cid, text in misses if link and link in text), None)
+                if chunk_id is None:
+                    unmapped += 1
+                    continue
+            results[chunk_id].append(item)
+        if unmapped:
+            print(f"⚠️ Dropped {unmapped} batched items that could not be matched to a chunk.")
+
+        if self.cache:
+            # Cached per chunk only when that chunk's own guide is the one the model was sent
+            for chunk_id, chunk in misses:
+                if self._resolve_guide(chunk, tagging_guide) == sent_guide:
+                    self.cache.put(chunk, sent_guide, results[chunk_id])
+        return results
+
+    # --- ASYNC / CONCURRENT EXTRACTION ---
+
+    async def _extract_async(self, chunk, tagging_guide):
+        tagging_guide = self._resolve_guide(chunk, tagging_guide)
+        if self.cache:
+            cached = self.cache.get(chunk, tagging_guide)
+            if cached is not None: return cached
+
+        prompt = self._build_prompt(chunk, tagging_guide)
+        tokens = estimate_tokens(prompt)
+        attempt, throttled = 0, None
+        while attempt < self.RETRIES:
+            await self.governor.acquire_async(tokens)
+            try:
+                response = await self.model.generate_content_async(prompt, generation_config=self._config)
+            except asyncio.CancelledError as e:
+                self.governor.release(tokens, error=e)
+                raise
+            except Exception as e:
+                delay = self.governor.release(tokens, error=e, attempt=attempt)
+                if delay is None: return None
+                is_throttle, throttled = self._throttle_spent(e, throttled)
+                if is_throttle:
+                    if throttled is None: return None
+                    continue
+                attempt += 1
+                print(f"⚠️ Gemini request failed (attempt {attempt}/{self.RETRIES}): {e}")
+                # Back off without blocking the other in-flight requests
+                await asyncio.sleep(delay)
+                continue
+            self.governor.release(tokens, used=self._prompt_tokens(response))
+            data = self._parse_response(response)
+            if data is None:
+                attempt += 1
+                continue
+            if self.cache: self.cache.put(chunk, tagging_guide, data)
+            return data
+
+        return None
+
+    async def extract_many(self, chunks, tagging_guide, concurrency=4):
+        """
+        Async generator over an iterator of chunks (e.g. ContentStreamer.generator).
+        Keeps up to `concurrency` requests in flight and yields (chunk, results) in chunk order.
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+        chunks = iter(chunks)
+        window = deque()
+        done = object()
+
+        async def run(chunk):
+            async with semaphore:
+                return await self._extract_async(chunk, tagging_guide)
+
+        try:
+            while True:
+                # Read ahead only as far as needed to keep the semaphore busy
+                while len(window) < concurrency * 2:
+                    # File parsing is blocking; keep it off the event loop
+                    chunk = await asyncio.to_thread(next, chunks, done)
+                    if chunk is done: break
+                    window.append((chunk, asyncio.ensure_future(run(chunk))))
+                if not window: break
+                chunk, task = window.popleft()
+                yield chunk, await task
+        finally:
+            for _, task in window: task.cancel()
+
+    def _event_loop(self):
+        """Lazily starts the background loop shared by all worker threads."""
+        with self._loop_lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                threading.Thread(target=self._loop.run_forever, name="ai-service-loop", daemon=True).start()
+            return self._loop
+
+    def extract_stream(self, chunks, tagging_guide, concurrency=1):
+        """
+        Blocking generator of (chunk, results) for worker threads.
+        concurrency=1 keeps the classic one-request-at-a-time path.
+        """
+        if concurrency <= 1:
+            for chunk in chunks:
+                yield chunk, self.extract_resource(chunk, tagging_guide)
+            return
+
+        loop = self._event_loop()
+        agen = self.extract_many(chunks, tagging_guide, concurrency)
+        try:
+            while True:
+                try:
+                    yield asyncio.run_coroutine_threadsafe(agen.__anext__(), loop).result()
+                except StopAsyncIteration:
+                    break
+        finally:
+            # Cancels in-flight requests when the caller stops early (e.g. stop_event)
+            asyncio.run_coroutine_threadsafe(agen.aclose(), loop).result()
@@ -0,0 +1,144 @@
+import threading
+import time
+
+from app.config import AppConfig
+from app.core.resource_store import ResourceStore
+
+class BufferedWriter:
+    """
+    Group-commit writer held by a worker for a whole run. Rows are buffered and written
+    in batches (by row count or age), instead of one open/check/close per resource.
+
+    Callbacks passed to `defer` (history marks, resume checkpoints) run only after every
+    row buffered before them is durably written, so progress never gets ahead of data.
+    A batch that still fails after `max_failures` flushes (or on close) is dropped together
+    with its deferred callbacks, and handed to `on_failed` so callers can undo their claims.
+    Rows and callbacks may name their `source` (e.g. the input file): once rows of a source
+    are dropped, its later callbacks are skipped too, so the file is not recorded as done
+    and is scanned again next run.
+    """
+    FSYNC_POLICIES = ('off', 'normal', 'full')
+
+    def __init__(self, sink, batch_rows=200, flush_interval=2.0, stop_event=None, on_failed=None, max_failures=3):
+        self.sink = sink                    # callable(list_of_rows) -> None, raises on failure
+        self.batch_rows = batch_rows
+        self.flush_interval = flush_interval
+        self.stop_event = stop_event
+        self.on_failed = on_failed          # callable(list_of_rows) for rows that were dropped
+        self.max_failures = max(1, max_failures)
+        self.rows_written = 0
+        self.rows_failed = 0
+        self.flushes = 0
+        self._failures = 0                  # consecutive failed flushes of the current buffer
+
+        self._buffer = []                   # rows and ('defer', callback, source) markers, in order
+        self._sources = []                  # source of each buffered row
+        self._dropped = set()               # sources that lost rows
+        self._rows_pending = 0
+        self._oldest = 0.0
+        self._lock = threading.RLock()
+        self._wake = threading.Condition(self._lock)
+        self._closed = False
+        self._timer = threading.Thread(target=self._flush_loop, name="buffered-writer", daemon=True)
+        self._timer.start()
+
+    @classmethod
+    def from_config(cls, config, stop_event=None, on_failed=None):
+        """Writer into the ResourceStore using WRITE_BATCH_ROWS / WRITE_FLUSH_SECONDS / FSYNC_POLICY."""
+        policy = AppConfig.get_setting(config, 'FSYNC_POLICY', AppConfig.FSYNC_POLICY).lower()
+        store = ResourceStore.instance()
+        store.set_synchronous(policy if policy in cls.FSYNC_POLICIES else 'normal')
+        return cls(store.insert_many,
+                   batch_rows=max(1, AppConfig.get_setting(config, 'WRITE_BATCH_ROWS', AppConfig.WRITE_BATCH_ROWS)),
+                   flush_interval=AppConfig.get_setting(config, 'WRITE_FLUSH_SECONDS', AppConfig.WRITE_FLUSH_SECONDS),
+                   stop_event=stop_event, on_failed=on_failed)
+
+    def write(self, row, source=None):
+        with self._lock:
+            if self._closed: raise RuntimeError("BufferedWriter is closed")
+            if not self._rows_pending: self._oldest = time.monotonic()
+            self._buffer.append(row)
+            self._sources.append(source)
+            self._rows_pending += 1
+            if self._rows_pending >= self.batch_rows:
+                self._flush_locked()
+        return True
+
+    def defer(self, callback, source=None):
+        """
+        Runs callback once everything written so far is flushed (immediately if nothing is pending).
+        Never runs it if rows of `source` were dropped.
+        """
+        with self._lock:
+            if source is not None and source in self._dropped: return
+            if not self._rows_pending:
+                callback()
+            else:
+                self._buffer.append(('defer', callback, source))
+
+    def dropped(self, source):
+        """True if rows of this source could not be saved."""
+        with self._lock:
+            return source in self._dropped
+
+    def flush(self):
+        with self._lock:
+            return self._flush_locked()
+
+    def _flush_locked(self, final=False):
+        if not self._buffer: return True
+        rows = [r for r in self._buffer if not (isinstance(r, tuple) and r and r[0] == 'defer')]
+        try:
+            if rows: self.sink(rows)
+        except Exception as e:
+            self._failures += 1
+            if not final and self._failures < self.max_failures:
+                # Keep everything buffered; the next flush retries
+                print(f"❌ Buffered write failed ({len(rows)} rows kept for retry): {e}")
+                return False
+            print(f"❌ Buffered write failed {self._failures} times, {len(rows)} rows were not saved: {e}")
+            self._drop(rows)
+            return False
+        self._failures = 0
+        callbacks = [r[1] for r in self._buffer if isinstance(r, tuple) and r and r[0] == 'defer'
+                     and not (r[2] is not None and r[2] in self._dropped)]
+        self._buffer = []
+        self._sources = []
+        self._rows_pending = 0
+        self.rows_written += len(rows)
+        self.flushes += 1
+        for cb in callbacks:
+            try: cb()
+            except Exception as e: print(f"⚠️ Post-flush step failed: {e}")
+        return True
+
+    def _drop(self, rows):
+        # The deferred steps of dropped rows never run, nor do later ones of the same sources
+        sources = {s for s in self._sources if s is not None}
+        if sources: print(f"   ↪ Not marked as done, scanned again next run: {', '.join(sorted(map(str, sources)))}")
+        self._dropped.update(sources)
+        self._buffer = []
+        self._sources = []
+        self._rows_pending = 0
+        self._failures = 0
+        self.rows_failed += len(rows)
+        if self.on_failed:
+            try: self.on_failed(rows)
+            except Exception as e: print(f"⚠️ Failed-rows handler raised: {e}")
+
+    def _flush_loop(self):
+        # Time-based flush, plus the flush-on-cancel hook for stop_event
+        with self._lock:
+            while not self._closed:
+                self._wake.wait(0.25)
+                if not self._buffer: continue
+                cancelled = self.stop_event is not None and self.stop_event.is_set()
+                if cancelled or time.monotonic() - self._oldest >= self.flush_interval:
+                    self._flush_locked()
+
+    def close(self):
+        with self._lock:
+            ok = self._flush_locked(final=True)
+            self._closed = True
+            self._wake.notify_all()
+        return ok
@@ -0,0 +1,141 @@
+import itertools
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from app.config import AppConfig
+
+def estimate_tokens(text):
+    """Cheap token estimate (~4 characters per token for English prose)."""
+    return len(text) // 4 + 1
+
+
+class ChunkBatcher:
+    """
+    Packs chunks from one or many files into a single AI request, up to a token budget.
+    Each submitted chunk gets a Future that resolves to that chunk's own items, so callers
+    keep per-file dedup and history marking exactly as with one request per chunk.
+    """
+
+    def __init__(self, ai, tagging_guide, token_budget=6000, max_wait=0.5, concurrency=1):
+        self.ai = ai
+        self.tagging_guide = tagging_guide
+        self.token_budget = token_budget
+        self.max_wait = max_wait
+        self.requests = 0
+        self.chunks = 0
+
+        self._ids = itertools.count(1)
+        self._pending = []          # [(chunk_id, chunk, source, future)]
+        self._pending_tokens = 0
+        self._oldest = 0.0
+        self._lock = threading.Lock()
+        self._wake = threading.Condition(self._lock)
+        self._closed = False
+        self._pool = ThreadPoolExecutor(max_workers=max(1, concurrency), thread_name_prefix="ai-batch")
+        self._timer = threading.Thread(target=self._flush_loop, name="ai-batch-timer", daemon=True)
+        self._timer.start()
+
+    @classmethod
+    def from_config(cls, config, ai, tagging_guide):
+        """Returns a batcher when BATCH_TOKENS is set in config.ini, otherwise None."""
+        budget = AppConfig.get_setting(config, 'BATCH_TOKENS', AppConfig.BATCH_TOKENS)
+        if budget <= 0: return None
+        concurrency = max(1, AppConfig.get_setting(config, 'AI_CONCURRENCY', AppConfig.AI_CONCURRENCY))
+        print(f"ℹ️  Batching chunks up to ~{budget} tokens per request.")
+        return cls(ai, tagging_guide, token_budget=budget, concurrency=concurrency)
+
+    def submit(self, chunk, source=""):
+        """Queues a chunk; returns a Future of its item list."""
+        future = Future()
+        tokens = estimate_tokens(chunk)
+        with self._lock:
+            if self._closed: raise RuntimeError("ChunkBatcher is closed")
+            if self._pending and self._pending_tokens + tokens > self.token_budget:
+                self._dispatch_locked()
+            if not self._pending: self._oldest = time.monotonic()
+            self._pending.append((f"c{next(self._ids)}", chunk, source, future))
+            self._pending_tokens += tokens
+            if self._pending_tokens >= self.token_budget:
+                self._dispatch_locked()
+            else:
+                self._wake.notify()
+        return future
+
+    def flush(self):
+        with self._lock:
+            self._dispatch_locked()
+
+    def _dispatch_locked(self):
+        # Chunks whose file was cancelled before dispatch are dropped here
+        batch = [p for p in self._pending if p[3].set_running_or_notify_cancel()]
+        self._pending = []
+        self._pending_tokens = 0
+        if not batch: return
+        self.requests += 1
+        self.chunks += len(batch)
+        self._pool.submit(self._run, batch)
+
+    def _run(self, batch):
+        try:
+            results = self.ai.extract_batch([(cid, chunk) for cid, chunk, _, _ in batch], self.tagging_guide)
+            for cid, _, _, future in batch:
+                future.set_result(results.get(cid, []))
+        except Exception as e:
+            for _, _, _, future in batch:
+                if not future.done(): future.set_exception(e)
+
+    def _flush_loop(self):
+        # A partially filled batch never waits longer than max_wait for company
+        with self._lock:
+            while not self._closed:
+                if not self._pending:
+                    self._wake.wait()
+                    continue
+                remaining = self._oldest + self.max_wait - time.monotonic()
+                if remaining > 0:
+                    self._wake.wait(remaining)
+                    continue
+                self._dispatch_locked()
+
+    def extract_stream(self, chunks, source=""):
+        """
+        Blocking generator of (chunk, results) in chunk order for one file,
+        keeping up to one token budget of that file's chunks queued at a time.
+        """
+        window = deque()
+        window_tokens = 0
+        try:
+            for chunk in chunks:
+                tokens = estimate_tokens(chunk)
+                while window and window_tokens + tokens > self.token_budget:
+                    head, future, head_tokens = window.popleft()
+                    window_tokens -= head_tokens
+                    yield head, self._result(future)
+                window.append((chunk, self.submit(chunk, source), tokens))
+                window_tokens += tokens
+            while window:
+                head, future, _ = window.popleft()
+                yield head, self._result(future)
+        finally:
+            # Caller stopped early: drop this file's chunks that were not sent yet
+            for _, future, _ in window: future.cancel()
+
+    @staticmethod
+    def _result(future):
+        try:
+            return future.result()
+        except Exception:
+            return None
+
+    def stats(self):
+        saved = self.chunks - self.requests
+        return f"Batching: {self.chunks} chunks sent in {self.requests} requests ({saved} round trips saved)."
+
+    def close(self):
+        with self._lock:
+            self._dispatch_locked()
+            self._closed = True
+            self._wake.notify_all()
+        self._pool.shutdown(wait=True)
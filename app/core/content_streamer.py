@@ -1,29 +1,240 @@
 import os
-import PyPDF2
+import re
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 import docx
+from docx.oxml.ns import qn
+
+# PDF backends are optional; whichever are installed get registered below
+try:
+    import fitz  # PyMuPDF
+    HAS_PYMUPDF = True
+except ImportError:
+    HAS_PYMUPDF = False
+
+try:
+    import PyPDF2
+    HAS_PYPDF2 = True
+except ImportError:
+    HAS_PYPDF2 = False
+
+# URLs are never split across chunks; they end at whitespace or quoting characters
+_URL_RE = re.compile(r"(?:https?://|www\.)[^\s<>\"'()\[\]]+")
+# Approximate model tokens: words and individual punctuation marks
+_TOKEN_RE = re.compile(r"\w+|[^\w\s]")
+_SENTENCE_END_RE = re.compile(r"[.!?][\"')\]]?\s")
+# Anything that could become a resource link: explicit URLs or bare domains ("openai.com/blog")
+_LINK_CANDIDATE_RE = re.compile(
+    r"(?:https?://|www\.)\S+"
+    r"|\b[a-z0-9-]+(?:\.[a-z0-9-]+)*\.(?:com|org|net|io|ai|co|dev|app|edu|gov|me|ly|gg|so|xyz|tech|info|us|uk|de|fr)\b",
+    re.IGNORECASE)
+
+def _with_links(text, links):
+    """Appends embedded hyperlink targets that the visible text does not already show."""
+    extra = [u for u in dict.fromkeys(links) if u and u not in text]
+    if not extra: return text
+    return text + "".join(f" [link: {u}]" for u in extra)
+
+class Chunk(str):
+    """
+    A chunk of text that also carries the URLs found in it and its position in the
+    document stream (offset of this chunk and of the next one, for resuming).
+    """
+    __slots__ = ('links', 'index', 'offset', 'next_offset')
+
+    def __new__(cls, text, index=0, offset=0, next_offset=None):
+        obj = super().__new__(cls, text)
+        obj.links = list(dict.fromkeys(m.group() for m in _URL_RE.finditer(text)))
+        obj.index = index
+        obj.offset = offset
+        obj.next_offset = offset + len(text) if next_offset is None else next_offset
+        return obj
+
+class _SegmentBuffer:
+    """
+    Queue of incoming text pieces addressed by offset, so taking a chunk and dropping
+    consumed text never re-copies the whole buffer (linear in the document size).
+    """
+
+    def __init__(self):
+        self._segs = deque()
+        self._head = 0      # offset into self._segs[0]
+        self.size = 0
+
+    def append(self, text):
+        if text:
+            self._segs.append(text)
+            self.size += len(text)
+
+    def peek(self, n):
+        parts, need = [], min(n, self.size)
+        head = self._head
+        for seg in self._segs:
+            if need <= 0: break
+            piece = seg[head:head + need]
+            parts.append(piece)
+            need -= len(piece)
+            head = 0
+        return "".join(parts)
+
+    def advance(self, n):
+        n = min(n, self.size)
+        self.size -= n
+        while n > 0:
+            left = len(self._segs[0]) - self._head
+            if n < left:
+                self._head += n
+                return
+            n -= left
+            self._segs.popleft()
+            self._head = 0
+
+# --- PDF BACKENDS ---
+# Module-level so they can be pickled into the page-extraction process pool.
+
+def _pymupdf_page_count(file_path):
+    with fitz.open(file_path) as doc:
+        return doc.page_count
+
+def _pymupdf_pages(file_path, start=0, stop=None):
+    with fitz.open(file_path) as doc:
+        for i in range(start, doc.page_count if stop is None else min(stop, doc.page_count)):
+            page = doc[i]
+            links = [l.get('uri') for l in page.get_links() if l.get('uri')]
+            yield _with_links(page.get_text(), links)
+
+def _pypdf2_page_count(file_path):
+    with open(file_path, 'rb') as f:
+        return len(PyPDF2.PdfReader(f).pages)
+
+def _pypdf2_pages(file_path, start=0, stop=None):
+    with open(file_path, 'rb') as f:
+        pages = PyPDF2.PdfReader(f).pages
+        for i in range(start, len(pages) if stop is None else min(stop, len(pages))):
+            yield _with_links(pages[i].extract_text() or "", _pypdf2_link_annots(pages[i]))
+
+def _pypdf2_link_annots(page):
+    links = []
+    try:
+        for annot in page.get('/Annots') or []:
+            action = annot.get_object().get('/A') or {}
+            uri = action.get('/URI')
+            if uri: links.append(str(uri))
+    except Exception:
+        pass
+    return links
+
+def _extract_page_range(iter_pages, file_path, start, stop):
+    return list(iter_pages(file_path, start, stop))
 
 class ContentStreamer:
     """
     Handles memory-efficient streaming of text from various file formats.
     """
-    
-    @staticmethod
-    def stream_pdf(file_path):
+    # How far past the nominal size we read, so a URL at the boundary can be kept whole
+    URL_SLACK = 2048
+    # Upper bound on characters per token when sizing by tokens
+    MAX_CHARS_PER_TOKEN = 8
+    # Pages handed to one process-pool task
+    PDF_PAGES_PER_TASK = 8
+
+    # name -> {'page_count': fn(path), 'iter_pages': fn(path, start, stop)}; earlier = preferred
+    PDF_BACKENDS = {}
+    _pdf_pool = None
+    _pdf_pool_size = 0
+    _pdf_pool_lock = threading.Lock()
+
+    @classmethod
+    def register_pdf_backend(cls, name, page_count, iter_pages, preferred=False):
+        """
+        Adds a PDF text backend. iter_pages(path, start, stop) yields page texts in order and,
+        for process-pool use, both functions must be importable module-level functions.
+        """
+        entry = {'page_count': page_count, 'iter_pages': iter_pages}
+        if preferred:
+            cls.PDF_BACKENDS = {name: entry, **{k: v for k, v in cls.PDF_BACKENDS.items() if k != name}}
+        else:
+            cls.PDF_BACKENDS[name] = entry
+
+    @classmethod
+    def pdf_backend(cls, name='auto'):
+        """Returns (name, backend) for the requested backend, or the best installed one."""
+        if name and name != 'auto':
+            if name in cls.PDF_BACKENDS: return name, cls.PDF_BACKENDS[name]
+            print(f"⚠️ PDF backend '{name}' not available, using auto selection.")
+        for key, backend in cls.PDF_BACKENDS.items():
+            return key, backend
+        return None, None
+
+    @classmethod
+    def _page_pool(cls, processes):
+        with cls._pdf_pool_lock:
+            if cls._pdf_pool is None or cls._pdf_pool_size != processes:
+                if cls._pdf_pool is not None: cls._pdf_pool.shutdown(wait=False)
+                cls._pdf_pool = ProcessPoolExecutor(max_workers=processes)
+                cls._pdf_pool_size = processes
+            return cls._pdf_pool
+
+    @classmethod
+    def shutdown_pdf_pool(cls):
+        """Stops the page-extraction processes; called when a run ends (the next run starts a new pool)."""
+        with cls._pdf_pool_lock:
+            if cls._pdf_pool is not None:
+                cls._pdf_pool.shutdown(wait=True, cancel_futures=True)
+            cls._pdf_pool = None
+            cls._pdf_pool_size = 0
+
+    @classmethod
+    def stream_pdf(cls, file_path, backend='auto', processes=0):
+        """
+        Yields page texts in page order. With processes >= 1, pages are extracted in a
+        process pool a few pages per task, while still being yielded strictly in order.
+        """
+        name, impl = cls.pdf_backend(backend)
+        if impl is None:
+            print("    ❌ Error reading PDF: no PDF backend installed (PyMuPDF or PyPDF2).")
+            return
+
         try:
-            with open(file_path, 'rb') as f:
-                reader = PyPDF2.PdfReader(f)
-                for page in reader.pages:
-                    text = page.extract_text()
+            if processes < 1:
+                for text in impl['iter_pages'](file_path, 0, None):
                     if text: yield text
+                return
+
+            total = impl['page_count'](file_path)
+            step = cls.PDF_PAGES_PER_TASK
+            ranges = iter([(i, min(i + step, total)) for i in range(0, total, step)])
+            pool = cls._page_pool(processes)
+            window = deque()
+            try:
+                while True:
+                    # Keep every process busy plus one task queued each
+                    while len(window) < processes * 2:
+                        r = next(ranges, None)
+                        if r is None: break
+                        window.append(pool.submit(_extract_page_range, impl['iter_pages'], file_path, *r))
+                    if not window: break
+                    for text in window.popleft().result():
+                        if text: yield text
+            finally:
+                for fut in window: fut.cancel()
         except Exception as e:
-            print(f"    ❌ Error reading PDF: {e}")
+            print(f"    ❌ Error reading PDF ({name}): {e}")
 
     @staticmethod
     def stream_docx(file_path):
         try:
             doc = docx.Document(file_path)
+            rels = doc.part.rels
             for para in doc.paragraphs:
-                if para.text: yield para.text + "\n"
+                # Hyperlink targets live in the relationship table, not in the visible text
+                links = []
+                for h in para._p.findall(qn('w:hyperlink')):
+                    rel = rels.get(h.get(qn('r:id')))
+                    if rel is not None and rel.is_external: links.append(rel.target_ref)
+                text = _with_links(para.text, links)
+                if text: yield text + "\n"
         except Exception:
             yield ""
 
@@ -39,20 +250,144 @@ class ContentStreamer:
             yield ""
 
     @classmethod
-    def generator(cls, file_path, ext, chunk_size=4000, overlap=500):
-        buffer = ""
+    def generator(cls, file_path, ext, chunk_size=4000, overlap=500, unit='chars',
+                  pdf_backend='auto', pdf_processes=0, start_offset=0, start_index=0):
         iterator = None
         
-        if ext == '.pdf': iterator = cls.stream_pdf(file_path)
+        if ext == '.pdf': iterator = cls.stream_pdf(file_path, pdf_backend, pdf_processes)
         elif ext == '.docx': iterator = cls.stream_docx(file_path)
         elif ext == '.txt': iterator = cls.stream_txt(file_path)
         else: return
 
-        for incoming_text in iterator:
-            buffer += incoming_text
-            while len(buffer) >= chunk_size:
-                yield buffer[:chunk_size]
-                buffer = buffer[chunk_size - overlap:]
-        
-        if len(buffer) > 100:
-            yield buffer
\ No newline at end of file
+        if start_offset: iterator = cls._skip_chars(iterator, start_offset)
+        yield from cls.chunk(iterator, chunk_size, overlap, unit, start_offset, start_index)
+
+    @staticmethod
+    def _skip_chars(pieces, n):
+        """Fast-forwards a text stream by n characters (resume) without chunking it."""
+        for piece in pieces:
+            if n <= 0:
+                yield piece
+            elif len(piece) <= n:
+                n -= len(piece)
+            else:
+                yield piece[n:]
+                n = 0
+
+    @staticmethod
+    def has_link_candidate(chunk):
+        return bool(getattr(chunk, 'links', None)) or bool(_LINK_CANDIDATE_RE.search(chunk))
+
+    @classmethod
+    def only_linked(cls, chunks, stats=None):
+        """
+        Link pre-pass: drops chunks with no URL candidate before they reach the AI,
+        since the prompt only extracts resources that have a link.
+        """
+        for chunk in chunks:
+            if stats is not None: stats.add('chunks')
+            if cls.has_link_candidate(chunk):
+                yield chunk
+            elif stats is not None:
+                stats.add('skipped_no_link')
+
+    @classmethod
+    def chunk(cls, pieces, chunk_size=4000, overlap=500, unit='chars', start_offset=0, start_index=0):
+        """
+        Splits a stream of text pieces into overlapping Chunk strings.
+        Boundaries snap to a paragraph, sentence or whitespace break and never fall inside a URL.
+        unit='tokens' sizes chunk_size/overlap in approximate tokens instead of characters.
+        """
+        by_tokens = unit == 'tokens'
+        lookahead = (chunk_size * cls.MAX_CHARS_PER_TOKEN if by_tokens else chunk_size) + cls.URL_SLACK
+        buf = _SegmentBuffer()
+        offset, index = start_offset, start_index
+
+        def take(window, end):
+            nonlocal offset, index
+            step = cls._next_start(window, end, overlap, by_tokens)
+            chunk = Chunk(window[:end], index, offset, offset + step)
+            buf.advance(step)
+            offset += step
+            index += 1
+            return chunk
+
+        for incoming_text in pieces:
+            buf.append(incoming_text)
+            while buf.size >= lookahead:
+                window = buf.peek(lookahead)
+                yield take(window, cls._chunk_end(window, chunk_size, by_tokens))
+
+        # Drain what is left once the source is exhausted
+        while buf.size:
+            window = buf.peek(lookahead)
+            end = cls._chunk_end(window, chunk_size, by_tokens)
+            if end >= len(window):
+                if len(window) > 100: yield Chunk(window, index, offset)
+                break
+            yield take(window, end)
+
+    @staticmethod
+    def _size_limit(window, size, by_tokens):
+        """Character index where `size` chars (or tokens) of the window end."""
+        if not by_tokens: return min(size, len(window))
+        for i, m in enumerate(_TOKEN_RE.finditer(window)):
+            if i == size - 1: return m.end()
+        return len(window)
+
+    @classmethod
+    def _chunk_end(cls, window, chunk_size, by_tokens):
+        limit = cls._size_limit(window, chunk_size, by_tokens)
+        if limit >= len(window): return len(window)
+
+        # Prefer the latest natural break in the last quarter of the chunk
+        lo = (limit * 3) // 4
+        region = window[lo:limit]
+        end = limit
+        para = region.rfind("\n\n")
+        if para != -1:
+            end = lo + para + 2
+        else:
+            sentences = list(_SENTENCE_END_RE.finditer(region))
+            if sentences:
+                end = lo + sentences[-1].end()
+            else:
+                space = max(region.rfind("\n"), region.rfind(" "), region.rfind("\t"))
+                if space != -1: end = lo + space + 1
+
+        for m in _URL_RE.finditer(window):
+            if m.start() >= end: break
+            if m.start() < end < m.end():
+                # Cut before the URL; only a URL that starts the chunk may overrun it
+                end = m.start() if m.start() > 0 else m.end()
+                break
+        return end
+
+    @classmethod
+    def _next_start(cls, window, end, overlap, by_tokens):
+        if overlap <= 0: return end
+        if by_tokens:
+            starts = [m.start() for m in _TOKEN_RE.finditer(window, 0, end)]
+            start = starts[-overlap] if len(starts) >= overlap else 0
+        else:
+            start = max(end - overlap, 0)
+        if start > 0 and not window[start - 1].isspace():
+            # Do not begin the overlap mid-word
+            space = window.find(" ", start, end)
+            if space != -1 and space + 1 < end: start = space + 1
+            # Only one word (often a URL) in the overlap: repeat that whole word instead of none
+            else: start = window.rfind(" ", 0, start) + 1
+
+        for m in _URL_RE.finditer(window, 0, end):
+            if m.start() < start < m.end():
+                # Repeat the whole URL rather than a fragment of it
+                start = m.start()
+                break
+        return start if start > 0 else end
+
+
+# PyMuPDF is much faster than PyPDF2 on large reports, so it wins auto selection
+if HAS_PYMUPDF:
+    ContentStreamer.register_pdf_backend('pymupdf', _pymupdf_page_count, _pymupdf_pages)
+if HAS_PYPDF2:
+    ContentStreamer.register_pdf_backend('pypdf2', _pypdf2_page_count, _pypdf2_pages)
@@ -1,72 +1,115 @@
 import csv
 import os
-import shutil
+import threading
 import time
 from app.config import AppConfig
+from app.core.resource_store import ResourceStore
+from app.core.dataset_cache import DatasetCache
+from app.core.taxonomy import Taxonomy
+from app.core.exporter import ResourceExporter
 
-try:
-    import pandas as pd
-    HAS_PANDAS = True
-except ImportError:
-    HAS_PANDAS = False
+def _pandas():
+    # Imported only when the tagging reference has to be (re)compiled
+    try:
+        import pandas as pd
+        return pd
+    except ImportError:
+        return None
 
 class DataHandler:
+    # Serializes file appends when several worker threads run at once
+    _write_lock = threading.Lock()
     
-    # --- UI / GENERAL CSV METHODS ---
+    # --- UI / GENERAL DATA METHODS ---
+    # Rows live in the SQLite ResourceStore; the CSV file is an import/export format.
     @staticmethod
     def load_data():
-        if not os.path.exists(AppConfig.CSV_FILE): return []
+        """Read-only rows from the shared DatasetCache (no re-parse unless the data changed)."""
         try:
-            with open(AppConfig.CSV_FILE, 'r', encoding='utf-8') as f:
-                return list(csv.DictReader(f))
-        except: return []
+            return DatasetCache.instance().rows()
+        except Exception as e:
+            print(f"❌ Error loading data: {e}")
+            return []
 
     @staticmethod
-    def update_cell(row_idx, col_name, new_val):
-        if not os.path.exists(AppConfig.CSV_FILE): return
+    def update_cell(row_id, col_name, new_val):
+        """Edits one field of the row with this `id` UUID."""
         try:
-            rows = []
-            with open(AppConfig.CSV_FILE, 'r', encoding='utf-8') as f:
-                reader = csv.DictReader(f)
-                fieldnames = reader.fieldnames
-                rows = list(reader)
-            if 0 <= row_idx < len(rows):
-                rows[row_idx][col_name] = new_val
-                with open(AppConfig.CSV_FILE, 'w', newline='', encoding='utf-8') as f:
-                    writer = csv.DictWriter(f, fieldnames=fieldnames)
-                    writer.writeheader()
-                    writer.writerows(rows)
-        except: pass
+            return ResourceStore.instance().update(row_id, col_name, new_val)
+        except Exception as e:
+            print(f"❌ Error saving edit: {e}")
+            return False
 
     @staticmethod
-    def export_data(destination_path):
-        if not os.path.exists(AppConfig.CSV_FILE): return False
+    def export_data(destination_path, fmt=None, columns=None, categories=None, approved=None,
+                    progress=None, stop_event=None):
+        """Streams (filtered) rows to CSV/JSONL/XLSX/Parquet. Returns rows written, None if cancelled, False on error."""
         try:
-            shutil.copy(AppConfig.CSV_FILE, destination_path)
+            return ResourceExporter.export(destination_path, fmt=fmt, columns=columns, categories=categories,
+                                           approved=approved, progress=progress, stop_event=stop_event)
+        except Exception as e:
+            print(f"❌ Export failed: {e}")
+            return False
+
+    @staticmethod
+    def sync_csv():
+        """Re-exports the store to AppConfig.CSV_FILE if it changed since the last export."""
+        try:
+            store = ResourceStore.instance()
+            if store.dirty or not os.path.exists(AppConfig.CSV_FILE):
+                store.export_csv(AppConfig.CSV_FILE)
             return True
-        except: return False
+        except Exception as e:
+            print(f"⚠️ CSV sync failed: {e}")
+            return False
+
+    @staticmethod
+    def search(query, limit=None, ids=None):
+        """Ids of rows matching a Data-tab query (prefix words, #hashtags), in store order."""
+        try:
+            return ResourceStore.instance().search(query, limit=limit, ids=ids)
+        except Exception as e:
+            print(f"❌ Search failed: {e}")
+            return []
+
+    @staticmethod
+    def merge_duplicate_links(dry_run=False):
+        """Merges rows whose links are the same canonical URL. Returns (groups, removed, examples)."""
+        try:
+            return ResourceStore.instance().merge_duplicates(dry_run=dry_run)
+        except Exception as e:
+            print(f"❌ Duplicate merge failed: {e}")
+            return 0, 0, []
 
     # --- WORKER / LOGIC METHODS ---
 
+    # The three loaders share one compiled Taxonomy artifact (see app/core/taxonomy.py)
     @staticmethod
     def load_tagging_guide(csv_path):
-        return DataHandler._read_ref_file(csv_path, mode='text', verbose=True)
+        return Taxonomy.load(csv_path).guide
 
     @staticmethod
     def load_category_map(csv_path):
         """Returns { '#hashtag': {'group': '...', 'sub': '...'} }"""
-        return DataHandler._read_ref_file(csv_path, mode='dict', verbose=False)
+        return Taxonomy.load(csv_path).full_map
+
+    @staticmethod
+    def load_tag_rows(csv_path):
+        """Returns [{'tag', 'group', 'sub', 'defn', 'example'}, ...] for tag retrieval."""
+        return Taxonomy.load(csv_path).rows
 
     @staticmethod
     def _read_ref_file(csv_path, mode='text', verbose=True):
+        """Parses the reference. mode: 'text', 'dict', 'rows' or 'all' (guide, map, rows)."""
         if not os.path.exists(csv_path): 
             print(f"⚠️ Reference file not found: {csv_path}")
-            return "" if mode == 'text' else {}
+            return DataHandler._empty_ref(mode)
         
         guide_text = "--- OFFICIAL TAGGING DICTIONARY ---\n"
         full_map = {} 
+        rows = []
         
-        def process_row(tag, group, sub, defn):
+        def process_row(tag, group, sub, defn, example=""):
             tag = str(tag).strip()
             # Clean weird chars
             if not tag or tag.lower() == 'nan': return
@@ -89,13 +132,19 @@ class DataHandler:
             else:
                 full_map[tag.replace("#", "").lower()] = entry
             
+            if mode in ('rows', 'all'):
+                example = str(example).strip()
+                if example.lower() == 'nan': example = ""
+                rows.append({'tag': tag, 'group': group, 'sub': sub, 'defn': defn, 'example': example})
+
             # Text Logic
-            if mode == 'text':
+            if mode in ('text', 'all'):
                 nonlocal guide_text
                 guide_text += f"Tag: {tag}, Group: {group}, Sub: {sub}, Def: {defn}\n"
 
         # --- STRATEGY 1: PANDAS (Best for .xlsx and mixed CSVs) ---
-        if HAS_PANDAS:
+        pd = _pandas()
+        if pd is not None:
             try:
                 # 1. Try Semicolon first (Specific for your file)
                 try:
@@ -116,6 +165,7 @@ class DataHandler:
                 grp_c = next((c for c in df.columns if 'primary group' in c or 'group' in c), None)
                 sub_c = next((c for c in df.columns if 'Subcategory' in c or 'sub' in c), None)
                 def_c = next((c for c in df.columns if 'definition' in c), None)
+                ex_c = next((c for c in df.columns if 'example' in c), None)
 
                 if tag_c:
                     count = 0
@@ -124,13 +174,14 @@ class DataHandler:
                             row[tag_c], 
                             row[grp_c] if grp_c else "",
                             row[sub_c] if sub_c else "",
-                            row[def_c] if def_c else ""
+                            row[def_c] if def_c else "",
+                            row[ex_c] if ex_c else ""
                         )
                         count += 1
                     
-                    if verbose and mode=='text' and count > 0: 
+                    if verbose and mode in ('text', 'all') and count > 0: 
                         print(f"✅ Reference loaded ({count} tags).")
-                    return guide_text if mode == 'text' else full_map
+                    return DataHandler._ref_result(mode, guide_text, full_map, rows)
 
             except Exception as e:
                 print(f"⚠️ Pandas read error: {e}")
@@ -164,38 +215,51 @@ class DataHandler:
                             d = ""
                             if len(parts) > 3:
                                 d = parts[3].strip().replace('"', '')
+
+                            # Index 4: Example Use Case
+                            e = ""
+                            if len(parts) > 4:
+                                e = parts[4].strip().replace('"', '')
                                 
-                            process_row(t, g, s, d)
+                            process_row(t, g, s, d, e)
                             
-            return guide_text if mode == 'text' else full_map
+            return DataHandler._ref_result(mode, guide_text, full_map, rows)
         except:
-            return "" if mode == 'text' else {}
+            return DataHandler._empty_ref(mode)
 
     @staticmethod
-    def load_history(history_path):
-        if not os.path.exists(history_path): return set()
-        try:
-            with open(history_path, 'r', encoding='utf-8') as f:
-                return set(line.strip() for line in f if line.strip())
-        except: return set()
+    def _ref_result(mode, guide_text, full_map, rows):
+        if mode == 'all': return guide_text, full_map, rows
+        if mode == 'text': return guide_text
+        if mode == 'rows': return rows
+        return full_map
 
     @staticmethod
-    def mark_history(history_path, filename):
-        try:
-            with open(history_path, 'a', encoding='utf-8') as f:
-                f.write(f"{filename}\n")
-        except: pass
+    def _empty_ref(mode):
+        if mode == 'all': return "", {}, []
+        if mode == 'text': return ""
+        if mode == 'rows': return []
+        return {}
 
     @staticmethod
     def append_csv_safe(file_path, fieldnames, row_data):
+        # The main dataset goes to the indexed store; other paths stay plain CSV appends
+        if os.path.abspath(file_path) == os.path.abspath(AppConfig.CSV_FILE):
+            try:
+                return ResourceStore.instance().insert({k: row_data.get(k) for k in fieldnames})
+            except Exception as e:
+                print(f"❌ Store write failed: {e}")
+                return False
+
         retries = 3
         while retries > 0:
             try:
-                file_exists = os.path.exists(file_path) and os.path.getsize(file_path) > 0
-                with open(file_path, 'a', newline='', encoding='utf-8') as f:
-                    writer = csv.DictWriter(f, fieldnames=fieldnames)
-                    if not file_exists: writer.writeheader()
-                    writer.writerow(row_data)
+                with DataHandler._write_lock:
+                    file_exists = os.path.exists(file_path) and os.path.getsize(file_path) > 0
+                    with open(file_path, 'a', newline='', encoding='utf-8') as f:
+                        writer = csv.DictWriter(f, fieldnames=fieldnames)
+                        if not file_exists: writer.writeheader()
+                        writer.writerow(row_data)
                 return True
             except PermissionError:
                 time.sleep(1)
@@ -0,0 +1,120 @@
+import threading
+from app.core.resource_store import ResourceStore
+from app.core.row_table import RowTable
+
+class DatasetChange:
+    """
+    What changed: kind is 'update', 'insert' or 'reload'. before holds the old rows of updates,
+    after the rows as this change left them (later changes may already have replaced them).
+    """
+    __slots__ = ('kind', 'ids', 'before', 'after')
+
+    def __init__(self, kind, ids=(), before=None, after=None):
+        self.kind = kind
+        self.ids = list(ids)
+        self.before = before or {}
+        self.after = after or {}
+
+
+class DatasetCache:
+    """
+    Process-wide, read-only, in-memory view of the ResourceStore, held as a compact RowTable.
+    Writes made through the store patch the cache in place; writes from outside the
+    process (another connection's commits, an edited CSV) trigger a reload.
+    Subscribers get a DatasetChange with the affected row ids.
+    """
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    # Low-cardinality columns: every row shares the same few string objects
+    INTERNED = ('category', 'subcategory', 'provider', 'approved', 'level', 'votes', 'image', 'outcomes')
+
+    def __init__(self, store):
+        self.store = store
+        self._table = RowTable(store.FIELDS, self.INTERNED)
+        self._rows = []         # RowTable rows, store order
+        self._pos = {}          # id -> index in self._rows
+        self._loaded = False
+        self._version = None
+        self._subscribers = []
+        self._lock = threading.RLock()
+        store.subscribe(self._on_store_change)
+
+    @classmethod
+    def instance(cls):
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = cls(ResourceStore.instance())
+            return cls._instance
+
+    # --- SUBSCRIPTIONS ---
+
+    def subscribe(self, callback):
+        """callback(DatasetChange); may be called from worker threads."""
+        if callback not in self._subscribers: self._subscribers.append(callback)
+
+    def unsubscribe(self, callback):
+        if callback in self._subscribers: self._subscribers.remove(callback)
+
+    def _publish(self, change):
+        for cb in list(self._subscribers):
+            try: cb(change)
+            except Exception as e: print(f"⚠️ Dataset subscriber failed: {e}")
+
+    # --- READS ---
+
+    def rows(self):
+        """Read-only rows (tuple of RowTable rows). Reloads only if the data changed externally."""
+        with self._lock:
+            # In-process bookkeeping writes (edit log, meta) do not move this; only outside changes do
+            if not self._loaded or self.store.external_version() != self._version:
+                self._reload(publish=self._loaded)
+            return tuple(self._rows)
+
+    def get(self, row_id):
+        with self._lock:
+            if not self._loaded: self._reload(publish=False)
+            idx = self._pos.get(str(row_id))
+            return self._rows[idx] if idx is not None else None
+
+    def __len__(self):
+        with self._lock:
+            return len(self._rows)
+
+    def invalidate(self):
+        """Forces a full reload on the next read."""
+        with self._lock:
+            self._version = None
+
+    def _reload(self, publish=True):
+        self.store.import_if_newer()
+        rows = [self._table.from_tuple(r) for r in self.store.iter_tuples()]
+        self._rows = rows
+        self._pos = {r['id']: i for i, r in enumerate(rows)}
+        self._loaded = True
+        self._version = self.store.external_version()
+        if publish: self._publish(DatasetChange('reload'))
+
+    # --- IN-PROCESS WRITES ---
+
+    def _on_store_change(self, kind, ids):
+        with self._lock:
+            if not self._loaded: return
+            if kind == 'reload':
+                self._reload()
+                return
+            fresh = self.store.get_rows(ids)
+            before = {}
+            after = {}
+            changed = []
+            for row_id, row in fresh.items():
+                idx = self._pos.get(row_id)
+                after[row_id] = self._table.from_dict(row)
+                if idx is None:
+                    self._pos[row_id] = len(self._rows)
+                    self._rows.append(after[row_id])
+                else:
+                    before[row_id] = self._rows[idx]
+                    self._rows[idx] = after[row_id]
+                changed.append(row_id)
+        if changed: self._publish(DatasetChange(kind, changed, before, after))
@@ -0,0 +1,195 @@
+import threading
+
+from app.config import AppConfig
+from app.core.resource_store import ResourceStore
+
+class EditSync:
+    """
+    Background push of Data-tab edits to the remote table as PATCH requests keyed by `id`.
+    Only changed columns are sent. Edits are coalesced per (row, column) in the store's
+    change log, and rows sharing the same edit go out in one request. A change whose remote
+    value no longer matches the value it was edited from is reported as a conflict, not pushed;
+    each PATCH is conditional on the value it replaces, so a remote write in between is not lost.
+    A change whose requests keep failing is marked 'error' so it does not block later edits.
+    """
+    BATCH_ROWS = 200
+    MAX_FAILURES = 3
+
+    def __init__(self, client, store=None, table='requested_resources', interval=5.0, debounce=2.0):
+        self.client = client
+        self.store = store or ResourceStore.instance()
+        self.table = table
+        self.interval = interval
+        self.debounce = debounce
+        self.pushed = 0
+        self.conflicts = 0
+        self.missing = 0
+        self.errors = 0
+        self._failures = {}     # (row_id, col, edited_at) -> failed requests
+
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self.store.subscribe(self._on_store_change)
+
+    @classmethod
+    def from_config(cls, config):
+        """Returns a started sync when EDIT_SYNC is on and a database is configured, otherwise None."""
+        if not AppConfig.get_setting(config, 'EDIT_SYNC', AppConfig.EDIT_SYNC): return None
+        settings = config['SETTINGS'] if config.has_section('SETTINGS') else {}
+        if not (settings.get('SUPABASE_URL', '').strip() or settings.get('POSTGREST_URL', '').strip()): return None
+        try:
+            from app.core.supabase_sink import make_rest_client
+            sync = cls(make_rest_client(config),
+                       interval=AppConfig.get_setting(config, 'EDIT_SYNC_SECONDS', AppConfig.EDIT_SYNC_SECONDS))
+        except Exception as e:
+            print(f"⚠️ Edit sync unavailable: {e}")
+            return None
+        sync.start()
+        return sync
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="edit-sync", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=5.0):
+        """Pushes what is pending (bounded by timeout) and stops the thread."""
+        self._stop.set()
+        self._wake.set()
+        if self._thread: self._thread.join(timeout)
+
+    def _on_store_change(self, kind, ids):
+        if kind == 'update': self._wake.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.interval)
+            if self._wake.is_set() and not self._stop.is_set():
+                # Let a burst of edits settle so repeated edits of a cell go out once
+                self._wake.clear()
+                self._stop.wait(self.debounce)
+            try:
+                while self.sync_once(): pass
+            except Exception as e:
+                print(f"⚠️ Edit sync failed (will retry): {e}")
+        try: self.sync_once()
+        except Exception: pass
+
+    @staticmethod
+    def _same(remote, local):
+        """Remote JSON value vs the local text ("true" and True match, as do "3" and 3.0)."""
+        local = "" if local is None else str(local)
+        if isinstance(remote, bool):
+            return local.strip().lower() in (('true', 't', '1', 'yes') if remote else ('false', 'f', '0', 'no'))
+        if isinstance(remote, (int, float)):
+            try: return float(local) == remote
+            except ValueError: return False
+        return ("" if remote is None else str(remote)) == local
+
+    @staticmethod
+    def _filter_value(remote):
+        return ('true' if remote else 'false') if isinstance(remote, bool) else remote
+
+    def _conflict(self, row_id, col, value, base, edited_at, remote):
+        self.conflicts += 1
+        print(f"⚠️ Edit conflict on {row_id} '{col}': the database now has {remote!r}, "
+              f"local edit {value!r} was made from {base!r}. Edit the cell again to overwrite.")
+        self.store.resolve_change(row_id, col, edited_at, 'conflict', base="" if remote is None else str(remote))
+
+    def _failed(self, changes, row_ids, cols, error):
+        """Counts a failed request; changes failing MAX_FAILURES times are set aside as 'error'. True if any may retry."""
+        retry = False
+        for row_id in row_ids:
+            for col in cols:
+                key = (row_id, col, changes[row_id][col][2])
+                self._failures[key] = self._failures.get(key, 0) + 1
+                if self._failures[key] < self.MAX_FAILURES:
+                    retry = True
+                    continue
+                del self._failures[key]
+                self.errors += 1
+                print(f"❌ Edit of {row_id} '{col}' could not be synced ({error}). Edit the cell again to retry.")
+                self.store.resolve_change(row_id, col, changes[row_id][col][2], 'error')
+        return retry
+
+    def sync_once(self):
+        """Pushes one batch of pending edits. Returns the number of rows handled."""
+        changes = self.store.pending_changes(self.BATCH_ROWS)
+        if not changes: return 0
+
+        ids = list(changes)
+        cols = sorted({c for fields in changes.values() for c in fields})
+        try:
+            res = self.client.table(self.table).select(",".join(['id'] + cols)).in_('id', ids).execute()
+        except Exception as e:
+            if self._failed(changes, ids, cols, e): raise
+            return len(changes)
+        remote = {str(r['id']): r for r in (res.data or [])}
+
+        # (frozenset(col -> value), frozenset(col -> remote value it replaces)) -> [row_id]
+        groups = {}
+        for row_id, fields in changes.items():
+            current = remote.get(row_id)
+            if current is None:
+                # Row only exists locally (e.g. CSV-mode results): nothing to patch
+                for col, (_, _, edited_at) in fields.items():
+                    self.store.resolve_change(row_id, col, edited_at, 'missing')
+                self.missing += 1
+                continue
+            push, expect = {}, {}
+            for col, (value, base, edited_at) in fields.items():
+                if self._same(current.get(col), value):
+                    self.store.resolve_change(row_id, col, edited_at)
+                elif self._same(current.get(col), base):
+                    push[col] = value
+                    expect[col] = self._filter_value(current.get(col))
+                else:
+                    self._conflict(row_id, col, value, base, edited_at, current.get(col))
+            if push: groups.setdefault((frozenset(push.items()), frozenset(expect.items())), []).append(row_id)
+
+        error, retry, pushed = None, False, 0
+        for (patch, expect), row_ids in groups.items():
+            patch = dict(patch)
+            # Conditional on the values just read: a write landing in between is not overwritten
+            query = self.client.table(self.table).update(patch).in_('id', row_ids)
+            for col, value in expect:
+                query = query.is_(col, 'null') if value is None else query.eq(col, value)
+            try:
+                res = query.execute()
+            except Exception as e:
+                error = e
+                retry = self._failed(changes, row_ids, patch, e) or retry
+                continue
+            updated = {str(r['id']) for r in (res.data or [])}
+            for row_id in row_ids:
+                if row_id not in updated: continue
+                for col in patch:
+                    self.store.resolve_change(row_id, col, changes[row_id][col][2])
+            pushed += len(updated)
+            untouched = [r for r in row_ids if r not in updated]
+            if untouched: self._recheck(changes, untouched, patch)
+        self.pushed += pushed
+        if pushed:
+            print(f"☁️  Synced edits of {pushed} rows to the database.")
+        if retry: raise error
+        return len(changes)
+
+    def _recheck(self, changes, row_ids, cols):
+        """Rows a conditional PATCH skipped were changed remotely meanwhile: report them with their new values."""
+        res = self.client.table(self.table).select(",".join(['id'] + sorted(cols))).in_('id', row_ids).execute()
+        remote = {str(r['id']): r for r in (res.data or [])}
+        for row_id in row_ids:
+            current = remote.get(row_id)
+            for col in cols:
+                value, base, edited_at = changes[row_id][col]
+                if current is None:
+                    self.store.resolve_change(row_id, col, edited_at, 'missing')
+                elif self._same(current.get(col), value):
+                    self.store.resolve_change(row_id, col, edited_at)
+                else:
+                    self._conflict(row_id, col, value, base, edited_at, current.get(col))
+            if current is None: self.missing += 1
+
+    def stats(self):
+        return (f"Edit sync: {self.pushed} rows pushed, {self.conflicts} conflicts, {self.missing} rows not in the database, "
+                f"{self.errors} failed edits.")
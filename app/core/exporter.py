@@ -0,0 +1,121 @@
+import csv
+import json
+import os
+
+from app.core.resource_store import ResourceStore
+
+# Optional writers
+try:
+    import openpyxl
+    HAS_OPENPYXL = True
+except ImportError:
+    HAS_OPENPYXL = False
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+class ResourceExporter:
+    """
+    Streams the store to CSV, JSONL, XLSX or Parquet in batches, so memory stays bounded
+    whatever the dataset size. Output goes to a temp file that replaces `dest` on success.
+    """
+    FORMATS = {'csv': '.csv', 'jsonl': '.jsonl', 'xlsx': '.xlsx', 'parquet': '.parquet'}
+    XLSX_MAX_ROWS = 1048575  # Excel sheet limit, minus the header
+    BATCH = 5000
+
+    @staticmethod
+    def available_formats():
+        fmts = ['csv', 'jsonl']
+        if HAS_OPENPYXL: fmts.append('xlsx')
+        if HAS_PYARROW: fmts.append('parquet')
+        return fmts
+
+    @staticmethod
+    def format_for(path):
+        ext = os.path.splitext(path)[1].lower()
+        return next((f for f, e in ResourceExporter.FORMATS.items() if e == ext), 'csv')
+
+    @staticmethod
+    def export(dest, fmt=None, columns=None, categories=None, approved=None,
+               progress=None, stop_event=None, store=None):
+        """
+        Writes matching rows to dest and returns the number of rows written (None if cancelled).
+        progress(done, total) is called after every batch, from the calling thread.
+        """
+        store = store or ResourceStore.instance()
+        fmt = fmt or ResourceExporter.format_for(dest)
+        if fmt not in ResourceExporter.available_formats():
+            raise ValueError(f"Export format '{fmt}' needs an optional package "
+                             f"({'openpyxl' if fmt == 'xlsx' else 'pyarrow' if fmt == 'parquet' else fmt}).")
+        columns = [c for c in (columns or store.FIELDS) if c in store.FIELDS]
+        total = store.count_filtered(categories, approved)
+        batches = store.iter_batches(columns, categories, approved, ResourceExporter.BATCH)
+        tmp = dest + ".tmp"
+        writer = getattr(ResourceExporter, f"_write_{fmt}")(tmp, columns, batches)
+        done = 0
+        try:
+            for n in writer:
+                done += n
+                if progress: progress(done, total)
+                if stop_event is not None and stop_event.is_set():
+                    batches.close()
+                    raise InterruptedError
+            os.replace(tmp, dest)
+            return done
+        except InterruptedError:
+            return None
+        finally:
+            # Close the file handles before dropping a partial temp file
+            writer.close()
+            if os.path.exists(tmp): os.remove(tmp)
+
+    # Each writer is a generator yielding the number of rows written per batch
+
+    @staticmethod
+    def _write_csv(path, columns, batches):
+        with open(path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(columns)
+            for rows in batches:
+                writer.writerows(rows)
+                yield len(rows)
+
+    @staticmethod
+    def _write_jsonl(path, columns, batches):
+        with open(path, 'w', encoding='utf-8') as f:
+            for rows in batches:
+                f.writelines(json.dumps(dict(zip(columns, r)), ensure_ascii=False) + "\n" for r in rows)
+                yield len(rows)
+
+    @staticmethod
+    def _write_xlsx(path, columns, batches):
+        # write_only workbooks stream rows to disk instead of keeping cells in memory
+        wb = openpyxl.Workbook(write_only=True)
+        ws = wb.create_sheet("resources")
+        ws.append(columns)
+        written = 0
+        try:
+            for rows in batches:
+                room = ResourceExporter.XLSX_MAX_ROWS - written
+                for r in rows[:room]: ws.append(list(r))
+                written += min(len(rows), room)
+                yield min(len(rows), room)
+                if len(rows) > room:
+                    print(f"⚠️ XLSX export stopped at the Excel limit of {ResourceExporter.XLSX_MAX_ROWS} rows.")
+                    batches.close()
+                    break
+        finally:
+            wb.save(path)
+
+    @staticmethod
+    def _write_parquet(path, columns, batches):
+        schema = pa.schema([(c, pa.string()) for c in columns])
+        with pq.ParquetWriter(path, schema) as writer:
+            for rows in batches:
+                cols = list(zip(*rows))
+                writer.write_table(pa.Table.from_arrays([pa.array(c, pa.string()) for c in cols], schema=schema))
+                yield len(rows)
@@ -0,0 +1,99 @@
+import os
+import sqlite3
+import threading
+import time
+
+from app.config import AppConfig
+from app.core.hashing import file_digest
+
+class FileManifest:
+    """
+    One record per scanned file: path, size, mtime, content hash, status and resources found.
+    Unchanged files are skipped on a stat() match; a file is hashed only when its size or mtime
+    changed, and content already processed under another name or timestamp is still skipped.
+    """
+    DONE = 'done'
+    ERROR = 'error'
+
+    def __init__(self, db_path, legacy_log=None):
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS files (
+                path TEXT PRIMARY KEY,
+                size INTEGER,
+                mtime_ns INTEGER,
+                digest TEXT,
+                status TEXT,
+                resources_found INTEGER DEFAULT 0,
+                updated REAL
+            )""")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_files_digest ON files(digest)")
+        self._conn.commit()
+        if legacy_log: self._migrate_legacy(legacy_log)
+
+    @classmethod
+    def from_config(cls):
+        return cls(AppConfig.MANIFEST_FILE, AppConfig.LEGACY_HISTORY_FILE)
+
+    def _migrate_legacy(self, log_path):
+        """Imports processed_history.log (bare filenames) once, then renames it to *.migrated."""
+        if not os.path.exists(log_path): return
+        try:
+            with open(log_path, 'r', encoding='utf-8') as f:
+                names = {line.strip() for line in f if line.strip()}
+            records = []
+            for name in names:
+                path = os.path.abspath(os.path.join(AppConfig.RESOURCES_DIR, name))
+                # The old log only knew names: trust the file as it is now, hash it if it ever changes
+                try: st = os.stat(path)
+                except OSError: continue
+                records.append((path, st.st_size, st.st_mtime_ns, None, self.DONE, 0, time.time()))
+            with self._lock:
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO files (path, size, mtime_ns, digest, status, resources_found, updated) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)", records)
+                self._conn.commit()
+            os.replace(log_path, log_path + ".migrated")
+            print(f"ℹ️  Migrated {len(records)} entries from {os.path.basename(log_path)} to the file manifest.")
+        except Exception as e:
+            print(f"⚠️ History migration failed: {e}")
+
+    def check(self, file_path):
+        """
+        Returns (skip, state). state = (size, mtime_ns, digest) is passed back to mark();
+        digest is None when the file was skipped on stat alone.
+        """
+        path = os.path.abspath(file_path)
+        st = os.stat(path)
+        with self._lock:
+            rec = self._conn.execute("SELECT size, mtime_ns, digest, status FROM files WHERE path = ?",
+                                     (path,)).fetchone()
+        if rec and rec[3] == self.DONE and (rec[0], rec[1]) == (st.st_size, st.st_mtime_ns):
+            return True, (st.st_size, st.st_mtime_ns, rec[2])
+
+        digest = file_digest(path)
+        state = (st.st_size, st.st_mtime_ns, digest)
+        with self._lock:
+            same = self._conn.execute("SELECT resources_found FROM files WHERE digest = ? AND status = ? LIMIT 1",
+                                      (digest, self.DONE)).fetchone()
+        if same:
+            # Same content as a processed file (touched, copied or renamed): remember this path too
+            self.mark(path, state, self.DONE, same[0])
+            return True, state
+        return False, state
+
+    def mark(self, file_path, state, status=DONE, resources_found=0):
+        size, mtime_ns, digest = state
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO files (path, size, mtime_ns, digest, status, resources_found, updated) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (os.path.abspath(file_path), size, mtime_ns, digest, status, resources_found, time.time()))
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
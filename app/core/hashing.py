@@ -0,0 +1,11 @@
+import hashlib
+
+def file_digest(file_path, block_size=1 << 20):
+    """SHA-256 of a file's content, read in 1 MB blocks."""
+    h = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        while True:
+            block = f.read(block_size)
+            if not block: break
+            h.update(block)
+    return h.hexdigest()
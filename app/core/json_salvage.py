@@ -0,0 +1,62 @@
+import json
+import re
+
+_FENCE = re.compile(r"```(?:json)?", re.I)
+_decoder = json.JSONDecoder()
+# Opening of the item list (also inside a wrapper object such as {"resources": [...]})
+_LIST_START = re.compile(r"\[\s*\{")
+
+def parse_items(text, required=()):
+    """
+    Parses a model response into a list of objects.
+    Returns (items, complete): complete is False when the JSON as a whole was broken
+    (truncated, trailing commas, prose around it) and only the whole objects in it were kept.
+    Only items of the list are salvaged, never objects nested in them, and each must have
+    every key in `required`. items is None when nothing usable was found.
+    """
+    cleaned = _FENCE.sub("", text or "").strip()
+    if not cleaned: return [], True
+    try:
+        data = json.loads(cleaned)
+        if isinstance(data, dict): return [data], True
+        if isinstance(data, list): return data, True
+        return [], True
+    except json.JSONDecodeError:
+        pass
+    items = [obj for obj in _complete_objects(cleaned) if all(k in obj for k in required)]
+    return (items or None), False
+
+def _complete_objects(text):
+    """
+    Every complete object that is an item of the response: one directly inside the first
+    list of objects, or (with no such list) one at the top level of the text. Objects nested
+    in an item, such as a fragment of a cut-off item, are never returned on their own.
+    """
+    start = _LIST_START.search(text)
+    pos, item_depth = (start.start() + 1, 1) if start else (0, 0)
+    depth = item_depth
+    in_string = escaped = False
+    while pos < len(text):
+        char = text[pos]
+        if in_string:
+            if escaped: escaped = False
+            elif char == "\\": escaped = True
+            elif char == '"': in_string = False
+        elif char == '"':
+            in_string = True
+        elif char == "{" and depth == item_depth:
+            try:
+                obj, end = _decoder.raw_decode(text, pos)
+            except json.JSONDecodeError:
+                # Broken or cut-off item: walk through it so its inner objects are skipped
+                depth += 1
+            else:
+                if isinstance(obj, dict): yield obj
+                pos = end
+                continue
+        elif char in "{[":
+            depth += 1
+        elif char in "}]":
+            if depth == item_depth and item_depth: return    # end of the list
+            depth = max(item_depth, depth - 1)
+        pos += 1
@@ -0,0 +1,133 @@
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+from app.config import AppConfig
+
+# Query parameters that only track the visitor and never change the page. Generic names such as
+# ref, source or si are left alone: on many sites they select content (?ref=v2, ?source=...)
+TRACKING_PARAMS = {
+    'fbclid', 'gclid', 'dclid', 'gbraid', 'wbraid', 'msclkid', 'yclid', 'igshid', 'mc_cid', 'mc_eid',
+    '_hsenc', '_hsmi', 'mkt_tok',
+}
+TRACKING_PREFIXES = ('utm_', 'pk_', 'mtm_')
+# Bumped whenever canonical_url changes, so stored keys are recomputed
+LINK_KEY_VERSION = 3
+# "scheme:" at the start, but not "host:port" ("example.com:8080/docs")
+_SCHEME_RE = re.compile(r"^([a-z][a-z0-9+.-]*):(?!\d+(?:[/?#]|$))", re.I)
+
+def canonical_url(url):
+    """
+    Canonical form used for dedup: https, lower-case host without `www.` and default port,
+    no fragment, no tracking parameters, sorted query, no trailing slash.
+    Scheme-less links count as https; other schemes (mailto:, tel:, ftp://) are left unchanged.
+    """
+    url = str(url or "").strip()
+    if not url: return ""
+    scheme = _SCHEME_RE.match(url)
+    if not scheme: url = "https://" + url.lstrip("/")
+    elif scheme.group(1).lower() not in ('http', 'https'): return url
+    try:
+        parts = urlsplit(url)
+    except ValueError:
+        return url.lower()
+
+    scheme = parts.scheme.lower()
+    if scheme == 'http': scheme = 'https'
+
+    host = (parts.hostname or "").rstrip(".")
+    if host.startswith("www."): host = host[4:]
+    try: port = parts.port
+    except ValueError: port = None
+    if port and port not in (80, 443): host = f"{host}:{port}"
+
+    path = parts.path or ""
+    while path.endswith("/"): path = path[:-1]
+
+    query = [(k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+             if k.lower() not in TRACKING_PARAMS and not k.lower().startswith(TRACKING_PREFIXES)]
+    query = urlencode(sorted(query))
+
+    return urlunsplit((scheme, host, path, query, ""))
+
+def link_key(url):
+    """Short stable hash of the canonical URL ("" for an empty link)."""
+    canon = canonical_url(url)
+    if not canon: return ""
+    return hashlib.blake2b(canon.encode('utf-8'), digest_size=12).hexdigest()
+
+
+class LinkIndex:
+    """
+    Persistent set of link keys (hashes of canonical URLs) on disk.
+    Membership is an indexed lookup, so opening it costs the same however many links it holds.
+    Used for destinations the local ResourceStore does not mirror (Supabase uploads).
+    """
+
+    def __init__(self, db_path, scope='default'):
+        self.scope = scope
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS links (scope TEXT, key TEXT, PRIMARY KEY (scope, key)) WITHOUT ROWID")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS meta (scope TEXT, key TEXT, value TEXT, PRIMARY KEY (scope, key))")
+        self._conn.commit()
+        if self.get_meta('link_key_version') != str(LINK_KEY_VERSION): self._reset()
+
+    def _reset(self):
+        # Keys hashed by an older canonical_url cannot be recomputed without the links: start over
+        # (this also drops the mirror watermark, so the next sync re-reads every link)
+        with self._lock:
+            self._conn.execute("DELETE FROM links WHERE scope = ?", (self.scope,))
+            self._conn.execute("DELETE FROM meta WHERE scope = ?", (self.scope,))
+            self._conn.commit()
+        self.set_meta('link_key_version', str(LINK_KEY_VERSION))
+
+    @classmethod
+    def from_config(cls, scope):
+        try:
+            return cls(AppConfig.LINK_INDEX_FILE, scope)
+        except Exception as e:
+            print(f"⚠️ Link index unavailable: {e}")
+            return None
+
+    def __contains__(self, key):
+        with self._lock:
+            return self._conn.execute("SELECT 1 FROM links WHERE scope = ? AND key = ?",
+                                      (self.scope, key)).fetchone() is not None
+
+    def __bool__(self):
+        # An empty index is still an index (len() would make it falsy)
+        return True
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM links WHERE scope = ?", (self.scope,)).fetchone()[0]
+
+    def add(self, key):
+        self.add_many([key])
+
+    def add_many(self, keys):
+        with self._lock:
+            self._conn.executemany("INSERT OR IGNORE INTO links (scope, key) VALUES (?, ?)",
+                                   [(self.scope, k) for k in keys if k])
+            self._conn.commit()
+
+    def get_meta(self, name, default=None):
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM meta WHERE scope = ? AND key = ?", (self.scope, name)).fetchone()
+            return row[0] if row else default
+
+    def set_meta(self, name, value):
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO meta (scope, key, value) VALUES (?, ?, ?)",
+                               (self.scope, name, value))
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
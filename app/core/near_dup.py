@@ -0,0 +1,116 @@
+import hashlib
+import os
+import random
+import re
+import sqlite3
+import threading
+from array import array
+from collections import OrderedDict
+
+from app.config import AppConfig
+
+_WORD_RE = re.compile(r"\w+")
+_PRIME = (1 << 61) - 1
+
+class NearDupIndex:
+    """
+    Persistent MinHash/LSH index over processed chunks.
+    A chunk is a near-duplicate when its estimated Jaccard similarity (word 5-gram shingles)
+    to a chunk already processed from a *different* document reaches `threshold`.
+    """
+    SHINGLE = 5
+
+    def __init__(self, db_path, threshold=0.9, num_perm=64, bands=16):
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        rng = random.Random(1337)  # fixed seed: signatures must be comparable across runs
+        self._perms = [(rng.randrange(1, _PRIME), rng.randrange(0, _PRIME)) for _ in range(num_perm)]
+        self._recent = OrderedDict()    # chunk digest -> signature, between check and mark
+        self._lock = threading.Lock()
+        self._unsaved = 0
+
+        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS sigs (id INTEGER PRIMARY KEY, doc TEXT, sig BLOB)")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS bands (band INTEGER, bucket INTEGER, sig_id INTEGER)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_bands ON bands(band, bucket)")
+        self._conn.commit()
+
+    @classmethod
+    def from_config(cls, config):
+        """Returns the index when NEAR_DUP is enabled in config.ini, otherwise None."""
+        if not AppConfig.get_setting(config, 'NEAR_DUP', AppConfig.NEAR_DUP): return None
+        try:
+            threshold = AppConfig.get_setting(config, 'NEAR_DUP_THRESHOLD', AppConfig.NEAR_DUP_THRESHOLD)
+            return cls(AppConfig.NEAR_DUP_FILE, threshold=threshold)
+        except Exception as e:
+            print(f"⚠️ Near-duplicate index unavailable: {e}")
+            return None
+
+    def signature(self, text):
+        words = _WORD_RE.findall(str(text).lower())
+        n = self.SHINGLE
+        grams = {" ".join(words[i:i + n]) for i in range(max(len(words) - n + 1, 1))}
+        hashes = [int.from_bytes(hashlib.blake2b(g.encode('utf-8'), digest_size=8).digest(), 'little')
+                  for g in grams if g]
+        if not hashes: return None
+        return [min((a * h + b) % _PRIME for h in hashes) for a, b in self._perms]
+
+    def _buckets(self, sig):
+        r = self.rows
+        return [(band, hash(tuple(sig[band * r:(band + 1) * r]))) for band in range(self.bands)]
+
+    @staticmethod
+    def _digest(text):
+        return hashlib.sha1(str(text).encode('utf-8', errors='ignore')).digest()
+
+    def is_duplicate(self, chunk, doc):
+        sig = self.signature(chunk)
+        if sig is None: return False
+        with self._lock:
+            self._recent[self._digest(chunk)] = sig
+            while len(self._recent) > 4096: self._recent.popitem(last=False)
+            seen = set()
+            for band, bucket in self._buckets(sig):
+                rows = self._conn.execute(
+                    "SELECT s.id, s.doc, s.sig FROM bands b JOIN sigs s ON s.id = b.sig_id "
+                    "WHERE b.band = ? AND b.bucket = ? LIMIT 64", (band, bucket)).fetchall()
+                for sig_id, other_doc, blob in rows:
+                    if sig_id in seen or other_doc == doc: continue
+                    seen.add(sig_id)
+                    other = array('Q', blob)
+                    same = sum(1 for x, y in zip(sig, other) if x == y)
+                    if same / self.num_perm >= self.threshold: return True
+        return False
+
+    def mark_processed(self, chunk, doc):
+        """Records a chunk once the AI has handled it, so later documents can skip copies of it."""
+        with self._lock:
+            sig = self._recent.pop(self._digest(chunk), None)
+        if sig is None: sig = self.signature(chunk)
+        if sig is None: return
+        with self._lock:
+            cur = self._conn.execute("INSERT INTO sigs (doc, sig) VALUES (?, ?)", (doc, array('Q', sig).tobytes()))
+            self._conn.executemany("INSERT INTO bands (band, bucket, sig_id) VALUES (?, ?, ?)",
+                                   [(band, bucket, cur.lastrowid) for band, bucket in self._buckets(sig)])
+            self._unsaved += 1
+            if self._unsaved >= 20:
+                self._conn.commit()
+                self._unsaved = 0
+
+    def filter(self, chunks, doc, stats=None):
+        for chunk in chunks:
+            if self.is_duplicate(chunk, doc):
+                if stats is not None: stats.add('skipped_near_dup')
+                continue
+            yield chunk
+
+    def close(self):
+        with self._lock:
+            try:
+                self._conn.commit()
+                self._conn.close()
+            except Exception: pass
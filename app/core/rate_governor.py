@@ -0,0 +1,187 @@
+import asyncio
+import random
+import re
+import threading
+import time
+
+from app.config import AppConfig
+
+class RateGovernor:
+    """
+    Shared admission control for Gemini requests, used by every worker thread and the
+    async extraction loop alike.
+
+    - Token buckets for requests and prompt tokens per minute (AI_RPM / AI_TPM, 0 = no cap).
+    - AIMD concurrency: the in-flight limit grows by about one per round of successful
+      requests and halves on a 429/503, when all callers also pause for the server's
+      retry-after (or an exponential backoff when it gives none).
+    """
+    THROTTLE_CODES = (429, 503)
+    FATAL_CODES = (400, 401, 403, 404)
+    _GRPC_CODES = {'RESOURCE_EXHAUSTED': 429, 'UNAVAILABLE': 503, 'INVALID_ARGUMENT': 400,
+                   'UNAUTHENTICATED': 401, 'PERMISSION_DENIED': 403, 'NOT_FOUND': 404}
+
+    def __init__(self, rpm=0, tpm=0, max_inflight=8, base_delay=2.0, max_delay=60.0):
+        self.rpm = max(0, rpm)
+        self.tpm = max(0, tpm)
+        self.max_inflight = max(1, max_inflight)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.limit = float(self.max_inflight)
+        self.inflight = 0
+        self.requests = 0
+        self.throttled = 0
+        self.errors = 0
+        self.waited = 0.0
+
+        self._requests_left = float(self.rpm)
+        self._tokens_left = float(self.tpm)
+        self._refilled = time.monotonic()
+        self._paused_until = 0.0
+        self._streak = 0                    # consecutive throttled responses
+        self._cond = threading.Condition()
+
+    @classmethod
+    def from_config(cls, config):
+        governor = cls(rpm=AppConfig.get_setting(config, 'AI_RPM', AppConfig.AI_RPM),
+                       tpm=AppConfig.get_setting(config, 'AI_TPM', AppConfig.AI_TPM),
+                       max_inflight=AppConfig.get_setting(config, 'AI_MAX_INFLIGHT', AppConfig.AI_MAX_INFLIGHT))
+        print(f"🚦 Gemini limits: {governor.describe()}.")
+        return governor
+
+    def describe(self):
+        rpm = f"{self.rpm} requests/min" if self.rpm else "no request cap"
+        tpm = f"{self.tpm} tokens/min" if self.tpm else "no token cap"
+        return f"{rpm}, {tpm}, up to {int(self.limit)} of {self.max_inflight} requests in flight"
+
+    # --- ADMISSION ---
+
+    def _refill(self, now):
+        elapsed = now - self._refilled
+        self._refilled = now
+        if self.rpm: self._requests_left = min(self.rpm, self._requests_left + elapsed * self.rpm / 60)
+        if self.tpm: self._tokens_left = min(self.tpm, self._tokens_left + elapsed * self.tpm / 60)
+
+    def _try_acquire(self, tokens):
+        """Admits one request (returns 0) or returns how long to wait before asking again."""
+        now = time.monotonic()
+        self._refill(now)
+        if now < self._paused_until: return self._paused_until - now
+        if self.inflight >= int(self.limit): return 0.25
+        tokens = min(tokens, self.tpm) if self.tpm else 0
+        wait = 0.0
+        if self.rpm and self._requests_left < 1: wait = (1 - self._requests_left) * 60 / self.rpm
+        if self.tpm and self._tokens_left < tokens: wait = max(wait, (tokens - self._tokens_left) * 60 / self.tpm)
+        if wait > 0: return wait
+        if self.rpm: self._requests_left -= 1
+        if self.tpm: self._tokens_left -= tokens
+        self.inflight += 1
+        self.requests += 1
+        return 0
+
+    def acquire(self, tokens=0):
+        """Blocks until a request with this many prompt tokens may be sent."""
+        start = time.monotonic()
+        with self._cond:
+            while True:
+                wait = self._try_acquire(tokens)
+                if not wait: break
+                self._cond.wait(wait)
+            self.waited += time.monotonic() - start
+
+    async def acquire_async(self, tokens=0):
+        """acquire() for the event loop: sleeps instead of blocking the other requests."""
+        start = time.monotonic()
+        while True:
+            with self._cond:
+                wait = self._try_acquire(tokens)
+                if not wait:
+                    self.waited += time.monotonic() - start
+                    return
+            # Releases from other threads cannot wake a coroutine, so poll at a short interval
+            await asyncio.sleep(min(wait, 0.25))
+
+    def release(self, tokens=0, used=None, error=None, attempt=0):
+        """
+        Reports how an admitted request ended. `used` is the real prompt token count, if known.
+        Returns seconds to back off before retrying, or None if the error is not worth a retry.
+        """
+        with self._cond:
+            self.inflight -= 1
+            if self.tpm and used is not None:
+                # Settle the estimate against the real count (may briefly go into debt)
+                self._tokens_left = max(-self.tpm, self._tokens_left - (used - min(tokens, self.tpm)))
+            self._cond.notify_all()
+            if isinstance(error, asyncio.CancelledError): return None
+
+            if error is None:
+                self._streak = 0
+                before = int(self.limit)
+                self.limit = min(self.max_inflight, self.limit + 1 / self.limit)
+                if int(self.limit) > before:
+                    print(f"🚦 Gemini concurrency raised to {int(self.limit)}.")
+                return 0
+
+            code = self.status_code(error)
+            if code in self.THROTTLE_CODES:
+                self.throttled += 1
+                self._streak += 1
+                now = time.monotonic()
+                delay = self.retry_after(error)
+                if delay is None: delay = self._backoff(self._streak - 1)
+                # Requests of the same burst fail together; only the first one cuts the limit
+                if now >= self._paused_until:
+                    before = int(self.limit)
+                    self.limit = max(1.0, self.limit / 2)
+                    print(f"🚦 Gemini {code}: concurrency {before} → {int(self.limit)}, pausing {delay:.1f}s.")
+                self._paused_until = max(self._paused_until, now + delay)
+                return 0
+
+            self.errors += 1
+            if code in self.FATAL_CODES: return None
+            return self._backoff(attempt)
+
+    def _backoff(self, attempt):
+        return min(self.max_delay, self.base_delay * 2 ** attempt) * random.uniform(0.8, 1.2)
+
+    # --- ERROR CLASSIFICATION ---
+
+    @classmethod
+    def status_code(cls, error):
+        """HTTP status of a google.api_core / grpc error, or None."""
+        code = getattr(error, 'code', None)
+        if callable(code):
+            try: code = code()
+            except Exception: code = None
+        if isinstance(code, int): return code
+        name = getattr(code, 'name', None)
+        if name in cls._GRPC_CODES: return cls._GRPC_CODES[name]
+        text = str(error)
+        match = re.match(r"\s*([45]\d\d)\b", text)
+        if match: return int(match.group(1))
+        for name, status in cls._GRPC_CODES.items():
+            if name in text: return status
+        return None
+
+    @classmethod
+    def is_throttle(cls, error):
+        return cls.status_code(error) in cls.THROTTLE_CODES
+
+    @staticmethod
+    def retry_after(error):
+        """Server-suggested delay in seconds: Retry-After header, or Gemini's RetryInfo in the message."""
+        response = getattr(error, 'response', None)
+        headers = getattr(response, 'headers', None) or {}
+        try:
+            value = headers.get('retry-after') or headers.get('Retry-After')
+            if value: return float(value)
+        except (TypeError, ValueError):
+            pass
+        text = str(error)
+        match = re.search(r"retry in ([\d.]+)\s*s", text, re.I) or \
+                re.search(r"retry_delay\s*\{\s*seconds:\s*(\d+)", text)
+        return float(match.group(1)) if match else None
+
+    def stats(self):
+        return (f"Gemini: {self.requests} requests, {self.throttled} throttled (429/503), {self.errors} other errors, "
+                f"{self.waited:.0f}s spent waiting for a slot (all threads); limits now {self.describe()}.")
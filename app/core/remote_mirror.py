@@ -0,0 +1,105 @@
+import json
+from datetime import datetime, timedelta
+
+from app.config import AppConfig
+from app.core.link_index import link_key
+
+class RemoteLinkMirror:
+    """
+    Keeps a LinkIndex in step with the links of a remote PostgREST/Supabase table.
+    Use one index scope per endpoint (see rest_endpoint), so different servers never share
+    links or a watermark.
+    Rows are read with keyset pagination on (created_at, id), so no page is capped or skipped
+    however large the table is. The last (created_at, id) seen is stored as a watermark.
+    created_at is set by the clients, so a row can land below a stored watermark (clock skew,
+    uploads retried later); each sync therefore re-reads `overlap_minutes` behind it.
+    Rows without a created_at cannot be ordered by it and are re-read on every sync.
+    """
+    PAGE_SIZE = 1000
+
+    def __init__(self, client, index=None, table='requested_resources', page_size=PAGE_SIZE,
+                 overlap_minutes=AppConfig.MIRROR_OVERLAP_MINUTES):
+        self.client = client
+        self.index = index
+        self.table = table
+        self.page_size = page_size
+        self.overlap_minutes = overlap_minutes
+
+    @classmethod
+    def from_config(cls, config, client, index=None):
+        return cls(client, index, overlap_minutes=AppConfig.get_setting(
+            config, 'MIRROR_OVERLAP_MINUTES', AppConfig.MIRROR_OVERLAP_MINUTES))
+
+    def _page(self, after, since=None):
+        query = (self.client.table(self.table)
+                 .select('id,created_at,link')
+                 .not_.is_('created_at', 'null')
+                 .order('created_at').order('id')
+                 .limit(self.page_size))
+        if after:
+            created_at, row_id = after
+            # Strictly after the watermark in (created_at, id) order
+            query = query.or_(f'created_at.gt."{created_at}",and(created_at.eq."{created_at}",id.gt."{row_id}")')
+        elif since:
+            query = query.gte('created_at', since)
+        return query.execute().data or []
+
+    def _undated_page(self, after_id):
+        query = (self.client.table(self.table)
+                 .select('id,link')
+                 .is_('created_at', 'null')
+                 .order('id')
+                 .limit(self.page_size))
+        if after_id is not None: query = query.gt('id', after_id)
+        return query.execute().data or []
+
+    def pages(self, after=None, since=None):
+        """Yields (links, watermark) per page, starting strictly after `after` (or at `since`)."""
+        while True:
+            rows = self._page(after, since)
+            if not rows: return
+            after = (rows[-1]['created_at'], rows[-1]['id'])
+            # A short page does not mean the end: the server may cap rows below page_size
+            yield [r['link'].strip() for r in rows if r.get('link')], after
+
+    def undated_pages(self):
+        """Yields the links of rows with a null created_at, page by page."""
+        after_id = None
+        while True:
+            rows = self._undated_page(after_id)
+            if not rows: return
+            after_id = rows[-1]['id']
+            yield [r['link'].strip() for r in rows if r.get('link')]
+
+    def _rewind(self, created_at):
+        """The watermark's created_at moved back by the overlap, or None if it cannot be parsed."""
+        try:
+            stamp = datetime.fromisoformat(str(created_at).replace('Z', '+00:00'))
+        except ValueError:
+            return None
+        return (stamp - timedelta(minutes=self.overlap_minutes)).isoformat()
+
+    def sync(self):
+        """Fetches rows added since the stored watermark into the index. Returns the number of new links."""
+        raw = self.index.get_meta('watermark')
+        after = tuple(json.loads(raw)) if raw else None
+        since = self._rewind(after[0]) if after and self.overlap_minutes > 0 else None
+        known = len(self.index)
+        for links, mark in (self.pages(since=since) if since else self.pages(after)):
+            self.index.add_many(link_key(l) for l in links)
+            # Saved per page: an interrupted sync resumes where it stopped
+            self.index.set_meta('watermark', json.dumps(mark))
+        for links in self.undated_pages():
+            self.index.add_many(link_key(l) for l in links)
+        return len(self.index) - known
+
+    def reset(self):
+        """Forgets the watermark so the next sync re-reads the whole table."""
+        self.index.set_meta('watermark', '')
+
+    def all_links(self):
+        """Every remote link, page by page (used when no local index is available)."""
+        for links, _ in self.pages():
+            yield from links
+        for links in self.undated_pages():
+            yield from links
@@ -0,0 +1,517 @@
+import csv
+import os
+import re
+import sqlite3
+import threading
+import time
+import uuid
+
+from app.config import AppConfig
+from app.core.link_index import LINK_KEY_VERSION, link_key
+
+class ResourceStore:
+    """
+    Indexed local store (SQLite, WAL mode) for extracted resources, keyed by the `id` UUID.
+    The CSV file is only an import/export format: it is imported when it is newer than the
+    last sync and re-exported on demand. Each row also carries an internal `link_key`
+    (hash of the canonical URL) used for dedup.
+    """
+    FIELDS = ['id', 'created_at', 'title', 'provider', 'votes', 'level', 'description', 'category',
+              'outcomes', 'link', 'approved', 'image', 'tags', 'tech_tags', 'subcategory']
+
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self, db_path, csv_path=None):
+        self.db_path = db_path
+        self.csv_path = csv_path
+        self._lock = threading.RLock()
+        self._listeners = []
+
+        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        cols = ", ".join(f"{f} TEXT" for f in self.FIELDS if f != 'id')
+        self._conn.execute(f"CREATE TABLE IF NOT EXISTS resources (id TEXT PRIMARY KEY, {cols})")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_resources_link ON resources(link)")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        # Edit log for the remote delta sync: one entry per (row, column), base = value before the first unsynced edit
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS changes (
+                row_id TEXT, col TEXT, value TEXT, base TEXT, edited_at REAL, status TEXT,
+                PRIMARY KEY (row_id, col)
+            )""")
+        self._add_link_keys()
+        self._rekey_links()
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_resources_link_key ON resources(link_key)")
+        self.has_fts = self._create_search_index()
+        self._conn.commit()
+
+        if csv_path: self._import_if_newer(csv_path)
+
+    @classmethod
+    def instance(cls):
+        """Process-wide store for AppConfig.STORE_FILE (shared by UI and worker threads)."""
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = cls(AppConfig.STORE_FILE, AppConfig.CSV_FILE)
+            return cls._instance
+
+    # --- CHANGE LISTENERS ---
+
+    def subscribe(self, callback):
+        """callback(kind, ids) after each committed change: kind is 'update', 'insert' or 'reload'."""
+        self._listeners.append(callback)
+
+    def _notify(self, kind, ids=()):
+        # Called outside self._lock so listeners may read the store without lock inversion
+        for cb in list(self._listeners):
+            try: cb(kind, list(ids))
+            except Exception as e: print(f"⚠️ Store listener failed: {e}")
+
+    # --- META ---
+
+    def _get_meta(self, key, default=None):
+        row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else default
+
+    def _set_meta(self, key, value):
+        self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, str(value)))
+
+    @property
+    def dirty(self):
+        """True when the store has changes that are not yet in the CSV export."""
+        with self._lock:
+            return self._get_meta('dirty', '0') == '1'
+
+    def set_synchronous(self, mode):
+        """Durability policy for writes: 'off', 'normal' (WAL default) or 'full' (fsync every commit)."""
+        if mode not in ('off', 'normal', 'full'): return
+        with self._lock:
+            self._conn.execute(f"PRAGMA synchronous={mode.upper()}")
+
+    def _add_link_keys(self):
+        # Stores created before canonical dedup get the column once and are backfilled
+        cols = {r[1] for r in self._conn.execute("PRAGMA table_info(resources)")}
+        if 'link_key' in cols: return
+        self._conn.execute("ALTER TABLE resources ADD COLUMN link_key TEXT")
+        rows = self._conn.execute("SELECT id, link FROM resources").fetchall()
+        self._conn.executemany("UPDATE resources SET link_key = ? WHERE id = ?",
+                               [(link_key(link), row_id) for row_id, link in rows])
+
+    def _rekey_links(self):
+        """Recomputes the link keys that an older canonical_url hashed differently."""
+        version = int(self._get_meta('link_key_version', '1'))
+        if version >= LINK_KEY_VERSION: return
+        where = []
+        # v2: non-http schemes are kept as-is (mailto:a@b.com used to hash like https://b.com)
+        if version < 2: where.append("(link LIKE '%:%' AND lower(link) NOT LIKE 'http://%' "
+                                     "AND lower(link) NOT LIKE 'https://%')")
+        # v3: generic query parameters (ref, source, si, ...) are no longer stripped
+        if version < 3: where.append("link LIKE '%?%'")
+        rows = self._conn.execute(f"SELECT id, link FROM resources WHERE {' OR '.join(where)}").fetchall()
+        self._conn.executemany("UPDATE resources SET link_key = ? WHERE id = ?",
+                               [(link_key(link), row_id) for row_id, link in rows])
+        self._set_meta('link_key_version', LINK_KEY_VERSION)
+
+    # --- FULL-TEXT SEARCH ---
+
+    SEARCH_FIELDS = ['title', 'provider', 'description', 'tags', 'tech_tags']
+    TAG_FIELDS = ['tags', 'tech_tags']
+    _TERM_RE = re.compile(r"\w+")
+
+    def _create_search_index(self):
+        """FTS5 index kept in sync by triggers, so inserts, edits and deletes update it incrementally."""
+        cols = ", ".join(self.SEARCH_FIELDS)
+        new_vals = ", ".join(f"new.{f}" for f in self.SEARCH_FIELDS)
+        old_vals = ", ".join(f"old.{f}" for f in self.SEARCH_FIELDS)
+        try:
+            exists = self._conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'resources_fts'").fetchone()
+            self._conn.execute(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS resources_fts USING fts5({cols}, "
+                f"content='resources', content_rowid='rowid', prefix='2 3')")
+        except sqlite3.OperationalError as e:
+            print(f"⚠️ Full-text search unavailable ({e}); search will scan rows.")
+            return False
+        # INSERT OR REPLACE must fire the delete trigger for the replaced row
+        self._conn.execute("PRAGMA recursive_triggers=ON")
+        self._conn.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS resources_fts_ai AFTER INSERT ON resources BEGIN
+                INSERT INTO resources_fts (rowid, {cols}) VALUES (new.rowid, {new_vals});
+            END""")
+        self._conn.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS resources_fts_ad AFTER DELETE ON resources BEGIN
+                INSERT INTO resources_fts (resources_fts, rowid, {cols}) VALUES ('delete', old.rowid, {old_vals});
+            END""")
+        self._conn.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS resources_fts_au AFTER UPDATE OF {cols} ON resources BEGIN
+                INSERT INTO resources_fts (resources_fts, rowid, {cols}) VALUES ('delete', old.rowid, {old_vals});
+                INSERT INTO resources_fts (rowid, {cols}) VALUES (new.rowid, {new_vals});
+            END""")
+        if not exists:
+            self._conn.execute("INSERT INTO resources_fts (resources_fts) VALUES ('rebuild')")
+        return True
+
+    def _match_query(self, text):
+        """
+        'vector data' -> both words, each as a prefix (vector*, data*).
+        '#rag'        -> 'rag*' restricted to the tags columns.
+        """
+        terms = []
+        for word in str(text).split():
+            columns = self.TAG_FIELDS if word.startswith('#') else None
+            for term in self._TERM_RE.findall(word):
+                term = f'"{term}"*'
+                terms.append(f"{{{' '.join(columns)}}} : {term}" if columns else term)
+        return " AND ".join(terms)
+
+    def search(self, text, limit=None, ids=None):
+        """Ids of rows matching the query in store order, optionally only among `ids`."""
+        if ids is not None and len(ids) > 500:
+            # One query per 500 ids; order and limit apply to the combined matches
+            ids = list(ids)
+            found = sorted(r for i in range(0, len(ids), 500)
+                           for r in self._search(text, None, ids[i:i + 500], with_rowid=True))
+            if limit: found = found[:int(limit)]
+            return [row_id for _, row_id in found]
+        return self._search(text, limit, ids)
+
+    def _search(self, text, limit=None, ids=None, with_rowid=False):
+        select = "SELECT r.rowid, r.id" if with_rowid else "SELECT r.id"
+        where, params = [], []
+        with self._lock:
+            if self.has_fts:
+                match = self._match_query(text)
+                if not match: return []
+                if ids is None and limit:
+                    # FTS5 yields rowids in order: take the first `limit` without sorting every match
+                    sql = ("SELECT id FROM resources WHERE rowid IN (SELECT rowid FROM resources_fts "
+                           "WHERE resources_fts MATCH ? ORDER BY rowid LIMIT ?) ORDER BY rowid")
+                    try:
+                        return [r[0] for r in self._conn.execute(sql, (match, int(limit)))]
+                    except sqlite3.OperationalError as e:
+                        print(f"⚠️ Search failed: {e}")
+                        return []
+                sql = f"{select} FROM resources_fts f JOIN resources r ON r.rowid = f.rowid WHERE resources_fts MATCH ?"
+                params.append(match)
+            else:
+                sql = f"{select} FROM resources r WHERE 1"
+                for word in str(text).split():
+                    fields = self.TAG_FIELDS if word.startswith('#') else self.SEARCH_FIELDS
+                    where.append("(" + " OR ".join(f"r.{f} LIKE ?" for f in fields) + ")")
+                    params.extend([f"%{word.lstrip('#')}%"] * len(fields))
+                if not where: return []
+            if ids is not None:
+                ids = [str(i) for i in ids]
+                where.append(f"r.id IN ({', '.join('?' for _ in ids)})")
+                params.extend(ids)
+            if where: sql += " AND " + " AND ".join(where)
+            sql += " ORDER BY r.rowid"
+            if limit: sql += f" LIMIT {int(limit)}"
+            try:
+                return [tuple(r) if with_rowid else r[0] for r in self._conn.execute(sql, params)]
+            except sqlite3.OperationalError as e:
+                print(f"⚠️ Search failed: {e}")
+                return []
+
+    # --- ROW HELPERS ---
+
+    @staticmethod
+    def _cell(value):
+        # Same text form csv.DictWriter would produce
+        return "" if value is None else str(value)
+
+    def _values(self, row):
+        """FIELDS values followed by the derived link_key."""
+        vals = [self._cell(row.get(f)) for f in self.FIELDS]
+        if not vals[0]: vals[0] = str(uuid.uuid4())
+        vals.append(link_key(vals[self.FIELDS.index('link')]))
+        return vals
+
+    def _insert_sql(self, verb):
+        cols = self.FIELDS + ['link_key']
+        return f"{verb} INTO resources ({', '.join(cols)}) VALUES ({', '.join('?' for _ in cols)})"
+
+    # --- CSV IMPORT / EXPORT ---
+
+    def _csv_is_newer(self, csv_path):
+        if not csv_path or not os.path.exists(csv_path): return False
+        with self._lock:
+            synced = float(self._get_meta('csv_mtime', '0'))
+        return os.path.getmtime(csv_path) > synced
+
+    def _import_if_newer(self, csv_path):
+        if self._csv_is_newer(csv_path):
+            n = self.import_csv(csv_path)
+            print(f"ℹ️  Imported {n} rows from {os.path.basename(csv_path)} into the local store.")
+
+    def import_csv(self, csv_path, replace=True):
+        """Upserts every CSV row by id (rows without an id get a new UUID). Returns the row count."""
+        sql = self._insert_sql("INSERT OR REPLACE" if replace else "INSERT OR IGNORE")
+        count = 0
+        with open(csv_path, 'r', encoding='utf-8', newline='') as f:
+            reader = csv.DictReader(f)
+            with self._lock:
+                batch = []
+                for row in reader:
+                    batch.append(self._values(row))
+                    if len(batch) >= 5000:
+                        self._conn.executemany(sql, batch)
+                        count += len(batch)
+                        batch = []
+                if batch:
+                    self._conn.executemany(sql, batch)
+                    count += len(batch)
+                self._set_meta('csv_mtime', os.path.getmtime(csv_path))
+                self._conn.commit()
+        self._notify('reload')
+        return count
+
+    def import_if_newer(self):
+        """Re-imports the mirror CSV if it was edited outside the app since the last sync."""
+        if self.csv_path: self._import_if_newer(self.csv_path)
+
+    def external_version(self):
+        """
+        Changes only when the data changed outside this store object: another process committed
+        to the database (PRAGMA data_version) or the mirror CSV was edited since the last sync.
+        """
+        with self._lock:
+            version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+        return version, self._csv_is_newer(self.csv_path)
+
+    def export_csv(self, dest_path):
+        """Streams the whole store to a CSV file. Exporting to the mirror CSV clears the dirty flag."""
+        tmp = dest_path + ".tmp"
+        with self._lock:
+            with open(tmp, 'w', newline='', encoding='utf-8') as f:
+                writer = csv.writer(f)
+                writer.writerow(self.FIELDS)
+                cur = self._conn.execute(f"SELECT {', '.join(self.FIELDS)} FROM resources ORDER BY rowid")
+                while True:
+                    rows = cur.fetchmany(5000)
+                    if not rows: break
+                    writer.writerows(rows)
+            os.replace(tmp, dest_path)
+            if self.csv_path and os.path.abspath(dest_path) == os.path.abspath(self.csv_path):
+                self._set_meta('csv_mtime', os.path.getmtime(dest_path))
+                self._set_meta('dirty', 0)
+                self._conn.commit()
+        return True
+
+    # --- READ / WRITE ---
+
+    def all_rows(self):
+        with self._lock:
+            cur = self._conn.execute(f"SELECT {', '.join(self.FIELDS)} FROM resources ORDER BY rowid")
+            return [dict(zip(self.FIELDS, r)) for r in cur]
+
+    def iter_tuples(self, batch=5000):
+        """Rows as plain tuples in FIELDS order, fetched in batches (no per-row dicts)."""
+        with self._lock:
+            cur = self._conn.execute(f"SELECT {', '.join(self.FIELDS)} FROM resources ORDER BY rowid")
+            while True:
+                rows = cur.fetchmany(batch)
+                if not rows: break
+                yield from rows
+
+    # --- FILTERED READS (exports) ---
+
+    _APPROVED_TRUE = ('true', '1', 'yes')
+
+    def _filter_sql(self, categories=None, approved=None):
+        where, params = [], []
+        if categories:
+            where.append(f"category IN ({', '.join('?' for _ in categories)})")
+            params.extend(categories)
+        if approved is not None:
+            op = "IN" if approved else "NOT IN"
+            where.append(f"lower(coalesce(approved, '')) {op} ({', '.join('?' for _ in self._APPROVED_TRUE)})")
+            params.extend(self._APPROVED_TRUE)
+        return (" WHERE " + " AND ".join(where) if where else ""), params
+
+    def _reader(self):
+        # Own connection: a long export reads a WAL snapshot without holding up writers
+        conn = sqlite3.connect(self.db_path)
+        conn.execute("PRAGMA query_only=ON")
+        return conn
+
+    def count_filtered(self, categories=None, approved=None):
+        where, params = self._filter_sql(categories, approved)
+        conn = self._reader()
+        try: return conn.execute(f"SELECT COUNT(*) FROM resources{where}", params).fetchone()[0]
+        finally: conn.close()
+
+    def iter_batches(self, columns=None, categories=None, approved=None, batch=5000):
+        """Yields lists of row tuples (in `columns` order) matching the filters, `batch` rows at a time."""
+        columns = [c for c in (columns or self.FIELDS) if c in self.FIELDS]
+        where, params = self._filter_sql(categories, approved)
+        conn = self._reader()
+        try:
+            cur = conn.execute(f"SELECT {', '.join(columns)} FROM resources{where} ORDER BY rowid", params)
+            while True:
+                rows = cur.fetchmany(batch)
+                if not rows: break
+                yield rows
+        finally:
+            conn.close()
+
+    def distinct(self, column):
+        if column not in self.FIELDS: return []
+        with self._lock:
+            return [r[0] for r in self._conn.execute(
+                f"SELECT DISTINCT {column} FROM resources WHERE coalesce({column}, '') != '' ORDER BY {column}")]
+
+    def get_rows(self, ids):
+        """Rows for the given ids, as {id: row_dict}."""
+        ids = [str(i) for i in ids]
+        found = {}
+        with self._lock:
+            for i in range(0, len(ids), 500):
+                part = ids[i:i + 500]
+                cur = self._conn.execute(
+                    f"SELECT {', '.join(self.FIELDS)} FROM resources WHERE id IN ({', '.join('?' for _ in part)})", part)
+                for r in cur: found[r[0]] = dict(zip(self.FIELDS, r))
+        return found
+
+    def has_link_key(self, key):
+        """Indexed membership test by link_index.link_key (no rows are loaded)."""
+        if not key: return False
+        with self._lock:
+            return self._conn.execute("SELECT 1 FROM resources WHERE link_key = ? LIMIT 1", (key,)).fetchone() is not None
+
+    def count(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM resources").fetchone()[0]
+
+    def update(self, row_id, col_name, new_val, track=True):
+        """Edits one cell. With track, the edit is also logged for EditSync (see changes table)."""
+        if col_name not in self.FIELDS or col_name == 'id': return False
+        with self._lock:
+            old = self._conn.execute(f"SELECT {col_name} FROM resources WHERE id = ?", (str(row_id),)).fetchone()
+            if old is None: return False
+            if track: self._log_change(str(row_id), col_name, old[0], self._cell(new_val))
+            if col_name == 'link':
+                cur = self._conn.execute("UPDATE resources SET link = ?, link_key = ? WHERE id = ?",
+                                         (self._cell(new_val), link_key(new_val), str(row_id)))
+            else:
+                cur = self._conn.execute(f"UPDATE resources SET {col_name} = ? WHERE id = ?",
+                                         (self._cell(new_val), str(row_id)))
+            changed = cur.rowcount > 0
+            if changed: self._set_meta('dirty', 1)
+            self._conn.commit()
+        if changed: self._notify('update', [str(row_id)])
+        return changed
+
+    def insert(self, row):
+        return self.insert_many([row]) == 1
+
+    # --- EDIT LOG ---
+
+    def _log_change(self, row_id, col, old, new):
+        if old == new: return
+        prev = self._conn.execute("SELECT base FROM changes WHERE row_id = ? AND col = ?", (row_id, col)).fetchone()
+        base = prev[0] if prev else old
+        if new == base:
+            # Edited back to the synced value: nothing left to push
+            self._conn.execute("DELETE FROM changes WHERE row_id = ? AND col = ?", (row_id, col))
+            return
+        self._conn.execute(
+            "INSERT INTO changes (row_id, col, value, base, edited_at, status) VALUES (?, ?, ?, ?, ?, 'pending') "
+            "ON CONFLICT (row_id, col) DO UPDATE SET value = excluded.value, edited_at = excluded.edited_at, "
+            "status = 'pending'", (row_id, col, new, base, time.time()))
+
+    def pending_changes(self, max_rows=200):
+        """{row_id: {col: (value, base, edited_at)}} for up to max_rows edited rows, oldest first."""
+        with self._lock:
+            ids = [r[0] for r in self._conn.execute(
+                "SELECT row_id FROM changes WHERE status = 'pending' GROUP BY row_id ORDER BY MIN(edited_at) LIMIT ?",
+                (max_rows,))]
+            out = {}
+            for i in range(0, len(ids), 500):
+                part = ids[i:i + 500]
+                for row_id, col, value, base, edited_at in self._conn.execute(
+                        f"SELECT row_id, col, value, base, edited_at FROM changes WHERE status = 'pending' "
+                        f"AND row_id IN ({', '.join('?' for _ in part)})", part):
+                    out.setdefault(row_id, {})[col] = (value, base, edited_at)
+            return out
+
+    def resolve_change(self, row_id, col, edited_at, status=None, base=None):
+        """
+        Drops a synced change, or marks it 'conflict'/'missing'/'error', unless it was edited again meanwhile.
+        For a conflict, base becomes the remote value, so editing the cell again overrides it.
+        """
+        with self._lock:
+            if status:
+                self._conn.execute(
+                    "UPDATE changes SET status = ?, base = coalesce(?, base) WHERE row_id = ? AND col = ? AND edited_at = ?",
+                    (status, base, row_id, col, edited_at))
+            else:
+                self._conn.execute("DELETE FROM changes WHERE row_id = ? AND col = ? AND edited_at = ?",
+                                   (row_id, col, edited_at))
+            self._conn.commit()
+
+    def change_counts(self):
+        with self._lock:
+            return dict(self._conn.execute("SELECT status, COUNT(*) FROM changes GROUP BY status").fetchall())
+
+    def insert_many(self, rows):
+        values = [self._values(r) for r in rows]
+        if not values: return 0
+        with self._lock:
+            # rowcount, not total_changes: the search-index triggers write rows too
+            inserted = self._conn.executemany(self._insert_sql("INSERT OR IGNORE"), values).rowcount
+            self._set_meta('dirty', 1)
+            self._conn.commit()
+        if inserted: self._notify('insert', [v[0] for v in values])
+        return inserted
+
+    # --- DUPLICATE MERGE ---
+
+    @staticmethod
+    def _merge_tags(*values):
+        seen = []
+        for v in values:
+            for t in str(v or "").split(','):
+                t = t.strip()
+                if t and t not in seen: seen.append(t)
+        return ", ".join(seen)
+
+    def merge_duplicates(self, dry_run=False):
+        """
+        One-shot pass over rows whose links have the same canonical URL.
+        The oldest row of each group is kept, its empty fields are filled from the others,
+        tags are unioned and the other rows are deleted.
+        Returns (groups, rows_removed, examples) where examples lists a few (kept link, [dropped links]).
+        """
+        with self._lock:
+            dup_keys = [r[0] for r in self._conn.execute(
+                "SELECT link_key FROM resources WHERE link_key != '' GROUP BY link_key HAVING COUNT(*) > 1")]
+            removed = 0
+            examples = []
+            for key in dup_keys:
+                rows = [dict(zip(self.FIELDS, r)) for r in self._conn.execute(
+                    f"SELECT {', '.join(self.FIELDS)} FROM resources WHERE link_key = ? ORDER BY rowid", (key,))]
+                keep, drop = rows[0], rows[1:]
+                if len(examples) < 10: examples.append((keep['link'], [r['link'] for r in drop]))
+                removed += len(drop)
+                if dry_run: continue
+
+                for field in self.FIELDS:
+                    if field in ('id', 'link', 'created_at'): continue
+                    if field in ('tags', 'tech_tags'):
+                        keep[field] = self._merge_tags(keep[field], *(r[field] for r in drop))
+                    elif not keep[field]:
+                        keep[field] = next((r[field] for r in drop if r[field]), keep[field])
+                sets = [f for f in self.FIELDS if f != 'id']
+                self._conn.execute(f"UPDATE resources SET {', '.join(f + ' = ?' for f in sets)} WHERE id = ?",
+                                   [keep[f] for f in sets] + [keep['id']])
+                self._conn.executemany("DELETE FROM resources WHERE id = ?", [(r['id'],) for r in drop])
+
+            if removed and not dry_run:
+                self._set_meta('dirty', 1)
+                self._conn.commit()
+        if removed and not dry_run: self._notify('reload')
+        return len(dup_keys), removed, examples
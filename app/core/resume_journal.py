@@ -0,0 +1,81 @@
+import os
+import sqlite3
+import threading
+import time
+from functools import partial
+from app.config import AppConfig
+
+class ResumeJournal:
+    """
+    Chunk-level checkpoints keyed by file content hash, so a cancelled or crashed file
+    resumes after its last completed chunk, even if it was renamed in between.
+    """
+
+    def __init__(self, db_path):
+        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS journal (
+                digest TEXT PRIMARY KEY,
+                filename TEXT,
+                chunks_done INTEGER NOT NULL,
+                next_offset INTEGER NOT NULL,
+                updated REAL NOT NULL
+            )""")
+        self._conn.commit()
+
+    @classmethod
+    def from_config(cls, config):
+        """Returns the journal when RESUME_JOURNAL is enabled in config.ini, otherwise None."""
+        if not AppConfig.get_setting(config, 'RESUME_JOURNAL', AppConfig.RESUME_JOURNAL): return None
+        try:
+            return cls(AppConfig.RESUME_JOURNAL_FILE)
+        except Exception as e:
+            print(f"⚠️ Resume journal unavailable: {e}")
+            return None
+
+    def get(self, digest):
+        """Returns (chunks_done, next_offset) for an unfinished file, or None."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT chunks_done, next_offset FROM journal WHERE digest = ?", (digest,)).fetchone()
+        return (row[0], row[1]) if row else None
+
+    def record(self, digest, filename, chunk):
+        """Checkpoints a completed Chunk (committed immediately so a crash cannot lose it)."""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO journal (digest, filename, chunks_done, next_offset, updated) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (digest, filename, chunk.index + 1, chunk.next_offset, time.time()))
+            self._conn.commit()
+
+    def track(self, extracted, digest, filename, writer=None):
+        """
+        Wraps a (chunk, results) stream and checkpoints each chunk once the caller asks
+        for the next one, i.e. after all of its rows were handled. A caller that breaks
+        out early (cancel) never checkpoints the chunk it was working on.
+        With a BufferedWriter, the checkpoint waits until those rows are flushed.
+        Checkpoints stop at the first chunk whose request failed (results None), so the
+        next run resumes there and tries it again.
+        """
+        failed = False
+        for chunk, results in extracted:
+            yield chunk, results
+            if results is None: failed = True
+            if failed: continue
+            if writer: writer.defer(partial(self.record, digest, filename, chunk), source=filename)
+            else: self.record(digest, filename, chunk)
+
+    def clear(self, digest):
+        """Drops the checkpoint once the whole file is done."""
+        with self._lock:
+            self._conn.execute("DELETE FROM journal WHERE digest = ?", (digest,))
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            try: self._conn.close()
+            except Exception: pass
@@ -0,0 +1,65 @@
+class RowTable:
+    """
+    Compact row factory: one shared header, rows stored as tuples, and low-cardinality
+    columns (category, provider, ...) interned so equal values share one string object.
+    Rows are read-only and keep the dict-style reads the UI uses: row.get(k), row[k], k in row.
+    """
+
+    def __init__(self, fields, interned=()):
+        self.fields = tuple(fields)
+        index = {f: i for i, f in enumerate(self.fields)}
+        self._pools = [({} if f in interned else None) for f in self.fields]
+        self.Row = type('Row', (_Row,), {'__slots__': (), 'FIELDS': self.fields, '_INDEX': index})
+
+    def _encode(self, values):
+        out = []
+        for v, pool in zip(values, self._pools):
+            if v is None: v = ""
+            if pool is not None: v = pool.setdefault(v, v)
+            out.append(v)
+        return self.Row(out)
+
+    def from_tuple(self, values):
+        """Row from values already in header order (e.g. a SELECT of the same columns)."""
+        return self._encode(values)
+
+    def from_dict(self, mapping):
+        return self._encode(mapping.get(f) for f in self.fields)
+
+    def cardinality(self):
+        """{column: distinct values seen} for the interned columns."""
+        return {f: len(p) for f, p in zip(self.fields, self._pools) if p is not None}
+
+
+class _Row(tuple):
+    __slots__ = ()
+    FIELDS = ()
+    _INDEX = {}
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            try: key = self._INDEX[key]
+            except KeyError: raise KeyError(key) from None
+        return tuple.__getitem__(self, key)
+
+    def get(self, key, default=None):
+        i = self._INDEX.get(key)
+        return default if i is None else tuple.__getitem__(self, i)
+
+    def __contains__(self, key):
+        return key in self._INDEX
+
+    def keys(self):
+        return self.FIELDS
+
+    def values(self):
+        return tuple(self)
+
+    def items(self):
+        return zip(self.FIELDS, self)
+
+    def to_dict(self):
+        return dict(zip(self.FIELDS, self))
+
+    def __repr__(self):
+        return f"Row({self.to_dict()!r})"
@@ -0,0 +1,109 @@
+import threading
+
+try:
+    from postgrest.exceptions import APIError
+except ImportError:
+    class APIError(Exception):
+        pass
+
+# PostgREST: "there is no unique or exclusion constraint matching the ON CONFLICT specification"
+NO_CONFLICT_TARGET = '42P10'
+# Errors caused by the rows themselves: SQLSTATE classes 22 (data exception) and 23 (integrity
+# constraint), PostgREST's invalid-body error, and bare HTTP statuses for a rejected request
+DATA_ERROR_CLASSES = ('22', '23')
+DATA_ERROR_CODES = {'PGRST102', '400', '409', '422'}
+
+def is_data_error(error):
+    """True if the server rejected the rows' content, as opposed to auth, rate limits or outages."""
+    code = str(getattr(error, 'code', '') or '')
+    return (len(code) == 5 and code[:2] in DATA_ERROR_CLASSES) or code in DATA_ERROR_CODES
+
+def _postgrest_url(config):
+    return config['SETTINGS'].get('POSTGREST_URL', '').strip() if config.has_section('SETTINGS') else ''
+
+def rest_endpoint(config):
+    """URL of the server make_rest_client talks to (POSTGREST_URL, else SUPABASE_URL)."""
+    rest_url = _postgrest_url(config)
+    if rest_url: return rest_url.rstrip('/')
+    return config['SETTINGS'].get('SUPABASE_URL', '').strip().rstrip('/') if config.has_section('SETTINGS') else ''
+
+def make_rest_client(config):
+    """
+    Supabase client from config.ini. With POSTGREST_URL set in [SETTINGS], talks to that
+    PostgREST endpoint directly instead (e.g. a local stand-in for testing uploads).
+    """
+    rest_url = _postgrest_url(config)
+    if rest_url:
+        from postgrest import SyncPostgrestClient
+        key = config['API'].get('SUPABASE_KEY', '') if config.has_section('API') else ''
+        headers = {'apikey': key, 'Authorization': f"Bearer {key}"} if key else {}
+        return SyncPostgrestClient(rest_url, headers=headers)
+    from supabase import create_client
+    return create_client(config['SETTINGS']['SUPABASE_URL'], config['API']['SUPABASE_KEY'])
+
+
+class SupabaseUpsertSink:
+    """
+    UploadQueue sink that sends a batch of rows in one upsert with on_conflict on `link`,
+    so the server enforces dedup (existing links are ignored, not overwritten).
+
+    A batch rejected for bad data is split in halves and retried, so one bad row only costs
+    itself. Every other error (connection, auth, rate limit, 5xx) is raised to the queue,
+    which retries the batch with backoff and dead-letters it in the end.
+    """
+
+    def __init__(self, client, table='requested_resources', conflict_column='link',
+                 on_written=None, on_failed=None):
+        self.client = client
+        self.table = table
+        self.conflict_column = conflict_column
+        self.on_written = on_written        # callable(rows) for rows the server accepted
+        self.on_failed = on_failed          # callable(rows) for rows rejected on their own
+        self.inserted = 0
+        self.duplicates = 0
+        self.failed = 0
+        self.requests = 0
+        self._lock = threading.Lock()
+
+    def _send(self, rows):
+        with self._lock: self.requests += 1
+        query = self.client.table(self.table)
+        if self.conflict_column:
+            query = query.upsert(rows, on_conflict=self.conflict_column, ignore_duplicates=True)
+        else:
+            query = query.insert(rows)
+        return query.execute()
+
+    def __call__(self, rows):
+        self._write(list(rows))
+
+    def _write(self, rows):
+        try:
+            res = self._send(rows)
+        except APIError as e:
+            if getattr(e, 'code', None) == NO_CONFLICT_TARGET and self.conflict_column:
+                print(f"⚠️ No unique constraint on {self.table}.{self.conflict_column}; "
+                      f"falling back to plain inserts (add one to let the server deduplicate).")
+                self.conflict_column = None
+                return self._write(rows)
+            if not is_data_error(e): raise
+            if len(rows) == 1:
+                with self._lock: self.failed += 1
+                print(f"   ❌ DB rejected '{rows[0].get('title')}': {getattr(e, 'message', e)}")
+                if self.on_failed: self.on_failed(rows)
+                return
+            mid = len(rows) // 2
+            self._write(rows[:mid])
+            self._write(rows[mid:])
+            return
+
+        # Only newly inserted rows come back; the rest already existed on the server
+        returned = len(res.data or []) if self.conflict_column else len(rows)
+        with self._lock:
+            self.inserted += returned
+            self.duplicates += len(rows) - returned
+        if self.on_written: self.on_written(rows)
+
+    def stats(self):
+        return (f"Upload: {self.inserted} inserted, {self.duplicates} already on server, "
+                f"{self.failed} rejected, in {self.requests} requests.")
@@ -0,0 +1,88 @@
+import math
+import re
+from collections import Counter, defaultdict
+
+GUIDE_HEADER = "--- OFFICIAL TAGGING DICTIONARY ---\n"
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+_CAMEL_RE = re.compile(r"[A-Z]+(?=[A-Z][a-z])|[A-Z]?[a-z]+|[A-Z]+|\d+")
+_STOPWORDS = frozenset("""
+    a an and are as at be by for from has have in into is it its of on or that the their this to
+    using use used via vs was with your you can how what when which who will our we
+""".split())
+
+def tokenize(text):
+    return [w for w in _WORD_RE.findall(str(text).lower()) if len(w) > 1 and w not in _STOPWORDS]
+
+def tag_tokens(tag):
+    """'#AIConsulting' -> ['aiconsulting', 'ai', 'consulting']"""
+    bare = str(tag).lstrip('#')
+    parts = [p.lower() for p in _CAMEL_RE.findall(bare)]
+    return [bare.lower()] + [p for p in parts if p != bare.lower() and len(p) > 1]
+
+
+class TagSelector:
+    """
+    BM25 retrieval over the tagging reference (tag name, definition, example use case).
+    Builds a compact per-chunk guide with only the top-N relevant tags instead of
+    pasting the whole dictionary into every prompt.
+    """
+    # Tag names are short but the strongest signal; weight them above prose fields
+    TAG_WEIGHT = 3
+    K1 = 1.2
+    B = 0.75
+
+    def __init__(self, tag_rows, top_n=40):
+        self.rows = list(tag_rows)
+        self.top_n = top_n
+        self._postings = defaultdict(list)   # term -> [(doc_idx, tf), ...]
+        self._lengths = []
+
+        for idx, row in enumerate(self.rows):
+            terms = tag_tokens(row.get('tag', '')) * self.TAG_WEIGHT
+            terms += tokenize(row.get('defn', ''))
+            terms += tokenize(row.get('example', ''))
+            self._lengths.append(len(terms))
+            for term, tf in Counter(terms).items():
+                self._postings[term].append((idx, tf))
+
+        n = len(self.rows)
+        self._avg_len = (sum(self._lengths) / n) if n else 0.0
+        self._idf = {
+            term: math.log(1 + (n - len(p) + 0.5) / (len(p) + 0.5))
+            for term, p in self._postings.items()
+        }
+
+    def __len__(self):
+        return len(self.rows)
+
+    def scores(self, text):
+        """Returns {row_index: bm25_score} for rows sharing at least one term with text."""
+        result = defaultdict(float)
+        if not self.rows: return result
+        for term in set(tokenize(text)):
+            postings = self._postings.get(term)
+            if not postings: continue
+            idf = self._idf[term]
+            for idx, tf in postings:
+                norm = self.K1 * (1 - self.B + self.B * self._lengths[idx] / self._avg_len)
+                result[idx] += idf * tf * (self.K1 + 1) / (tf + norm)
+        return result
+
+    def select(self, text, top_n=None):
+        top_n = top_n or self.top_n
+        ranked = sorted(self.scores(text).items(), key=lambda kv: kv[1], reverse=True)
+        return [self.rows[idx] for idx, _ in ranked[:top_n]]
+
+    @staticmethod
+    def format_guide(rows):
+        lines = [f"Tag: {r['tag']}, Group: {r['group']}, Sub: {r['sub']}, Def: {r['defn']}\n" for r in rows]
+        return GUIDE_HEADER + "".join(lines)
+
+    def guide_for(self, text, top_n=None):
+        """Compact guide text for one chunk (same line format as DataHandler.load_tagging_guide)."""
+        rows = self.select(text, top_n)
+        if not rows:
+            # Nothing matched at all: fall back to the full dictionary rather than no guidance
+            rows = self.rows
+        return self.format_guide(rows)
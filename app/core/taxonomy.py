@@ -0,0 +1,89 @@
+import os
+import pickle
+import threading
+
+from app.config import AppConfig
+from app.core.hashing import file_digest
+
+class Taxonomy:
+    """
+    Compiled form of tagging_reference.csv: guide text, {tag: {group, sub}} map and tag rows.
+    Parsed once into a pickle artifact keyed by the CSV's size, mtime and SHA-256, so later
+    loads skip pandas entirely. The artifact is rebuilt when the CSV content changes.
+    """
+    FORMAT = 1
+
+    _memo = {}                  # abs csv path -> (stamp, Taxonomy)
+    _lock = threading.Lock()
+
+    def __init__(self, guide="", full_map=None, rows=None):
+        self.guide = guide
+        self.full_map = full_map or {}
+        self.rows = rows or []
+
+    @staticmethod
+    def _stamp(csv_path):
+        st = os.stat(csv_path)
+        return st.st_size, st.st_mtime_ns
+
+    @staticmethod
+    def artifact_path(csv_path):
+        name = os.path.splitext(os.path.basename(csv_path))[0]
+        return os.path.join(AppConfig.DATA_DIR, f"{name}.taxonomy.pkl")
+
+    @classmethod
+    def load(cls, csv_path):
+        """Taxonomy for csv_path: in-process memo, then the artifact, then a fresh compile."""
+        csv_path = os.path.abspath(csv_path)
+        if not os.path.exists(csv_path):
+            print(f"⚠️ Reference file not found: {csv_path}")
+            return cls()
+
+        with cls._lock:
+            stamp = cls._stamp(csv_path)
+            memo = cls._memo.get(csv_path)
+            if memo and memo[0] == stamp: return memo[1]
+
+            taxonomy = cls._load_artifact(csv_path, stamp)
+            if taxonomy is None: taxonomy = cls._compile(csv_path, stamp)
+            cls._memo[csv_path] = (stamp, taxonomy)
+            return taxonomy
+
+    @classmethod
+    def _load_artifact(cls, csv_path, stamp):
+        path = cls.artifact_path(csv_path)
+        try:
+            with open(path, 'rb') as f:
+                art = pickle.load(f)
+            if art.get('format') != cls.FORMAT or art.get('source') != csv_path: return None
+            if (art['size'], art['mtime_ns']) != stamp:
+                # Touched but maybe not edited: only the hash decides
+                if art['sha256'] != file_digest(csv_path): return None
+                art['size'], art['mtime_ns'] = stamp
+                cls._write_artifact(path, art)
+            return cls(art['guide'], art['map'], art['rows'])
+        except Exception:
+            return None
+
+    @classmethod
+    def _compile(cls, csv_path, stamp):
+        from app.core.data_handler import DataHandler
+        guide, full_map, rows = DataHandler._read_ref_file(csv_path, mode='all', verbose=True)
+        taxonomy = cls(guide, full_map, rows)
+        if rows:
+            cls._write_artifact(cls.artifact_path(csv_path), {
+                'format': cls.FORMAT, 'source': csv_path, 'size': stamp[0], 'mtime_ns': stamp[1],
+                'sha256': file_digest(csv_path), 'guide': guide, 'map': full_map, 'rows': rows,
+            })
+        return taxonomy
+
+    @staticmethod
+    def _write_artifact(path, art):
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp = path + ".tmp"
+            with open(tmp, 'wb') as f:
+                pickle.dump(art, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, path)
+        except Exception as e:
+            print(f"⚠️ Could not save compiled taxonomy: {e}")
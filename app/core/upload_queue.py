@@ -0,0 +1,168 @@
+import json
+import os
+import queue
+import random
+import threading
+import time
+
+from app.config import AppConfig
+
+class UploadQueue:
+    """
+    Producer/consumer link between extraction and a slow sink (Supabase).
+    Workers put rows on a bounded queue and carry on; one uploader thread drains it in
+    batches, retrying failed batches with exponential backoff. Batches that still fail
+    go to a dead-letter JSONL file, which is replayed at the start of the next run.
+
+    Like BufferedWriter, callbacks passed to `defer` run only after every row queued
+    before them has been handled (uploaded or dead-lettered).
+    """
+    _DEFER = object()
+    _STOP = object()
+
+    def __init__(self, sink, batch_rows=100, flush_interval=2.0, maxsize=1000, max_retries=5,
+                 base_delay=1.0, dead_letter_path=None, stop_event=None):
+        self.sink = sink                        # callable(list_of_rows), raises on retryable failure
+        self.batch_rows = batch_rows
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.dead_letter_path = dead_letter_path
+        self.stop_event = stop_event
+        self.sent = 0
+        self.retries = 0
+        self.dead_lettered = 0
+
+        self._queue = queue.Queue(maxsize=maxsize)
+        self._dl_lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name="upload-queue", daemon=True)
+        self._thread.start()
+
+    @classmethod
+    def from_config(cls, config, sink, stop_event=None):
+        return cls(sink,
+                   batch_rows=max(1, AppConfig.get_setting(config, 'UPLOAD_BATCH_ROWS', AppConfig.UPLOAD_BATCH_ROWS)),
+                   flush_interval=AppConfig.get_setting(config, 'UPLOAD_FLUSH_SECONDS', AppConfig.UPLOAD_FLUSH_SECONDS),
+                   maxsize=max(1, AppConfig.get_setting(config, 'UPLOAD_QUEUE_SIZE', AppConfig.UPLOAD_QUEUE_SIZE)),
+                   max_retries=AppConfig.get_setting(config, 'UPLOAD_RETRIES', AppConfig.UPLOAD_RETRIES),
+                   dead_letter_path=AppConfig.DEAD_LETTER_FILE,
+                   stop_event=stop_event)
+
+    # --- PRODUCER SIDE ---
+
+    def write(self, row, source=None):
+        """Queues a row; blocks only while the queue is full (back-pressure)."""
+        self._queue.put(row)
+        return True
+
+    def defer(self, callback, source=None):
+        # `source` as in BufferedWriter; failed rows are dead-lettered, not lost, so callbacks always run
+        self._queue.put((self._DEFER, callback))
+
+    def close(self):
+        """Drains everything still queued, then stops the uploader thread."""
+        self._queue.put(self._STOP)
+        self._thread.join()
+
+    # --- DEAD LETTERS ---
+
+    def take_dead_letters(self):
+        """
+        Rows left over from earlier runs; rows failing again are re-written as dead letters.
+        The file is kept (as .replay) until the rows are handled: queue them with write(),
+        then call replay_queued().
+        """
+        path = self.dead_letter_path
+        if not path: return []
+        replay = path + ".replay"
+        with self._dl_lock:
+            if os.path.exists(path):
+                # A .replay still here means the last run stopped before handling it: keep both
+                with open(path, 'r', encoding='utf-8') as src, open(replay, 'a', encoding='utf-8') as dst:
+                    dst.write(src.read())
+                os.remove(path)
+        if not os.path.exists(replay): return []
+        rows = []
+        with open(replay, 'r', encoding='utf-8') as f:
+            for line in f:
+                try: rows.append(json.loads(line)['row'])
+                except Exception: continue
+        return rows
+
+    def replay_queued(self):
+        """Deletes the replay file once every row queued before this call is uploaded or dead-lettered again."""
+        if not self.dead_letter_path: return
+        replay = self.dead_letter_path + ".replay"
+        self.defer(lambda: os.path.exists(replay) and os.remove(replay))
+
+    def _dead_letter(self, rows, error):
+        self.dead_lettered += len(rows)
+        if not self.dead_letter_path:
+            print(f"❌ Dropped {len(rows)} rows after {self.max_retries} retries: {error}")
+            return
+        print(f"❌ Upload failed after {self.max_retries} retries; {len(rows)} rows saved for the next run: {error}")
+        with self._dl_lock:
+            os.makedirs(os.path.dirname(self.dead_letter_path), exist_ok=True)
+            with open(self.dead_letter_path, 'a', encoding='utf-8') as f:
+                for row in rows:
+                    f.write(json.dumps({'row': row, 'error': str(error), 'at': time.time()}, default=str) + "\n")
+
+    # --- CONSUMER SIDE ---
+
+    def _stopping(self):
+        return self.stop_event is not None and self.stop_event.is_set()
+
+    def _send(self, rows):
+        delay = self.base_delay
+        for attempt in range(self.max_retries + 1):
+            try:
+                self.sink(rows)
+                self.sent += len(rows)
+                return
+            except Exception as e:
+                error = e
+            # On cancel, park the rows for the next run instead of sleeping through backoff
+            if attempt == self.max_retries or self._stopping(): break
+            self.retries += 1
+            time.sleep(delay * (1 + random.random() * 0.25))
+            delay = min(delay * 2, 60)
+        self._dead_letter(rows, error)
+
+    def _run(self):
+        pending = []        # rows and (_DEFER, cb) markers in queue order
+        rows = 0
+        oldest = 0.0
+        stop = False
+        while not stop:
+            timeout = max(0.05, self.flush_interval - (time.monotonic() - oldest)) if rows else 0.25
+            try:
+                item = self._queue.get(timeout=timeout)
+                if item is self._STOP:
+                    stop = True
+                else:
+                    if isinstance(item, tuple) and item and item[0] is self._DEFER and not rows:
+                        self._run_callback(item[1])
+                        continue
+                    if not rows: oldest = time.monotonic()
+                    pending.append(item)
+                    if not isinstance(item, tuple): rows += 1
+            except queue.Empty:
+                pass
+
+            due = rows and (rows >= self.batch_rows or stop or self._stopping()
+                            or time.monotonic() - oldest >= self.flush_interval)
+            if due or (stop and pending):
+                batch = [r for r in pending if not isinstance(r, tuple)]
+                if batch: self._send(batch)
+                for r in pending:
+                    if isinstance(r, tuple): self._run_callback(r[1])
+                pending, rows = [], 0
+
+    @staticmethod
+    def _run_callback(cb):
+        try: cb()
+        except Exception as e: print(f"⚠️ Post-upload step failed: {e}")
+
+    def stats(self):
+        return (f"Upload queue: {self.sent} rows sent, {self.retries} retries, "
+                f"{self.dead_lettered} rows dead-lettered.")
@@ -0,0 +1,96 @@
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+class SharedLinkSet:
+    """
+    Thread-safe set of already-known links, shared by every file task of a run.
+    With `key` (e.g. link_index.link_key) links are compared by that key; with `lookup`
+    the links known before the run are checked on disk instead of being loaded into memory.
+    """
+
+    def __init__(self, links=None, key=None, lookup=None):
+        self._key = key or (lambda link: link)
+        self._lookup = lookup
+        self._links = set(self._key(l) for l in (links or ()))
+        self._lock = threading.Lock()
+
+    def _known(self, k):
+        return k in self._links or bool(self._lookup and self._lookup(k))
+
+    def __contains__(self, link):
+        k = self._key(link)
+        with self._lock:
+            return self._known(k)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._links)
+
+    def claim(self, link):
+        """Atomically adds the link. Returns False if another task already owns it."""
+        k = self._key(link)
+        with self._lock:
+            if self._known(k): return False
+            self._links.add(k)
+            return True
+
+    def release(self, link):
+        """Gives a claimed link back (e.g. when the write for it failed)."""
+        k = self._key(link)
+        with self._lock:
+            self._links.discard(k)
+
+
+class RunStats:
+    """
+    Thread-safe counters shared by the file tasks of a run (chunks seen, skipped, ...).
+    """
+
+    def __init__(self):
+        self._counts = Counter()
+        self._lock = threading.Lock()
+
+    def add(self, key, n=1):
+        with self._lock:
+            self._counts[key] += n
+
+    def __getitem__(self, key):
+        with self._lock:
+            return self._counts[key]
+
+
+class FilePool:
+    """
+    Runs one task per input file, with at most `workers` files in flight.
+    """
+
+    @staticmethod
+    def run(files, task, workers=1, stop_event=None):
+        """Calls task(index, filename) for every file. Honors stop_event between files."""
+        def stopped():
+            return stop_event is not None and stop_event.is_set()
+
+        if workers <= 1:
+            for i, filename in enumerate(files):
+                if stopped(): break
+                task(i, filename)
+            return
+
+        def guarded(i, filename):
+            if stopped(): return
+            try:
+                task(i, filename)
+            except Exception as e:
+                print(f"❌ Error in {filename}: {e}")
+
+        print(f"ℹ️  Processing up to {workers} files in parallel.")
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="file-worker") as pool:
+            pending = {pool.submit(guarded, i, f) for i, f in enumerate(files)}
+            while pending:
+                done, pending = wait(pending, timeout=0.5, return_when=FIRST_COMPLETED)
+                if stopped():
+                    # Drop queued files; running ones exit at their next chunk check.
+                    for fut in pending: fut.cancel()
+                    wait(pending)
+                    break
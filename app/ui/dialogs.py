@@ -1,6 +1,11 @@
 import customtkinter as ctk
 import configparser
-from tkinter import messagebox
+import threading
+from tkinter import messagebox, filedialog
+
+from app.core.data_handler import DataHandler
+from app.core.exporter import ResourceExporter
+from app.core.resource_store import ResourceStore
 
 class Splash(ctk.CTkToplevel):
     def __init__(self, parent, version, callback):
@@ -68,10 +73,120 @@ class SettingsDialog(ctk.CTkToplevel):
         return entry
 
     def save(self):
+        # Start from the file on disk so optional tuning keys (e.g. FILE_WORKERS) survive a save
         config = configparser.ConfigParser()
-        config['API'] = {'GEMINI_API_KEY': self.e_gemini.get().strip(), 'SUPABASE_KEY': self.e_sup_key.get().strip()}
-        config['SETTINGS'] = {'SUPABASE_URL': self.e_sup_url.get().strip()}
+        config.read(self.config_path)
+        for section in ('API', 'SETTINGS'):
+            if not config.has_section(section): config.add_section(section)
+        config['API']['GEMINI_API_KEY'] = self.e_gemini.get().strip()
+        config['API']['SUPABASE_KEY'] = self.e_sup_key.get().strip()
+        config['SETTINGS']['SUPABASE_URL'] = self.e_sup_url.get().strip()
         
         with open(self.config_path, 'w') as f: config.write(f)
         messagebox.showinfo("Saved", "Configuration updated successfully.")
-        self.destroy()
\ No newline at end of file
+        self.destroy()
+
+class ExportDialog(ctk.CTkToplevel):
+    """Format, column and filter choices for a streaming export that runs in a background thread."""
+    APPROVED_CHOICES = {"All": None, "Approved": True, "Not approved": False}
+
+    def __init__(self, parent):
+        super().__init__(parent)
+        self.title("Export Data")
+        self.geometry("460x600")
+        self.grab_set()
+        self.stop_event = threading.Event()
+        self.worker = None
+        self.setup_ui()
+        self.protocol("WM_DELETE_WINDOW", self.cancel)
+
+    def setup_ui(self):
+        store = ResourceStore.instance()
+        ctk.CTkLabel(self, text="Export Data", font=("Roboto Medium", 18)).pack(pady=15)
+        form = ctk.CTkFrame(self, fg_color="transparent")
+        form.pack(padx=30, fill="both", expand=True)
+
+        ctk.CTkLabel(form, text="Format", anchor="w", text_color="#aaa").pack(fill="x")
+        self.fmt = ctk.CTkOptionMenu(form, values=ResourceExporter.available_formats())
+        self.fmt.pack(fill="x", pady=5)
+
+        ctk.CTkLabel(form, text="Category", anchor="w", text_color="#aaa").pack(fill="x", pady=(10, 0))
+        self.category = ctk.CTkOptionMenu(form, values=["All"] + store.distinct('category'))
+        self.category.pack(fill="x", pady=5)
+
+        ctk.CTkLabel(form, text="Approved", anchor="w", text_color="#aaa").pack(fill="x", pady=(10, 0))
+        self.approved = ctk.CTkSegmentedButton(form, values=list(self.APPROVED_CHOICES))
+        self.approved.set("All")
+        self.approved.pack(fill="x", pady=5)
+
+        ctk.CTkLabel(form, text="Columns", anchor="w", text_color="#aaa").pack(fill="x", pady=(10, 0))
+        cols = ctk.CTkScrollableFrame(form, height=160)
+        cols.pack(fill="both", expand=True, pady=5)
+        self.columns = {}
+        for field in store.FIELDS:
+            var = ctk.BooleanVar(value=True)
+            ctk.CTkCheckBox(cols, text=field, variable=var).pack(anchor="w", pady=2)
+            self.columns[field] = var
+
+        self.progress = ctk.CTkProgressBar(self)
+        self.progress.set(0)
+        self.progress.pack(fill="x", padx=30, pady=(10, 0))
+        self.lbl_progress = ctk.CTkLabel(self, text="", text_color="#aaa")
+        self.lbl_progress.pack()
+
+        btn_box = ctk.CTkFrame(self, fg_color="transparent")
+        btn_box.pack(pady=15)
+        self.btn_export = ctk.CTkButton(btn_box, text="Export...", command=self.start, width=120, fg_color="#2b825b")
+        self.btn_export.pack(side="left", padx=10)
+        ctk.CTkButton(btn_box, text="Cancel", command=self.cancel, width=120, fg_color="transparent", border_width=1).pack(side="left", padx=10)
+
+    def start(self):
+        fmt = self.fmt.get()
+        ext = ResourceExporter.FORMATS[fmt]
+        dest = filedialog.asksaveasfilename(parent=self, defaultextension=ext, filetypes=[(fmt.upper(), "*" + ext)])
+        if not dest: return
+        columns = [f for f, var in self.columns.items() if var.get()]
+        if not columns:
+            messagebox.showwarning("Export", "Select at least one column.", parent=self)
+            return
+        category = self.category.get()
+        opts = dict(fmt=fmt, columns=columns,
+                    categories=None if category == "All" else [category],
+                    approved=self.APPROVED_CHOICES[self.approved.get()])
+
+        self.btn_export.configure(state="disabled")
+        self.worker = threading.Thread(target=self._run, args=(dest, opts), daemon=True)
+        self.worker.start()
+
+    def _run(self, dest, opts):
+        result = DataHandler.export_data(dest, progress=self._report, stop_event=self.stop_event, **opts)
+        self._post(self._finished, dest, result)
+
+    def _report(self, done, total):
+        self._post(self._show_progress, done, total)
+
+    def _post(self, fn, *args):
+        # Called on the export thread; the dialog may already be closed
+        try: self.after(0, fn, *args)
+        except Exception: pass
+
+    def _show_progress(self, done, total):
+        self.progress.set(done / total if total else 1)
+        self.lbl_progress.configure(text=f"{done:,} / {total:,} rows")
+
+    def _finished(self, dest, result):
+        self.worker = None
+        if result is None: return
+        if result is False:
+            messagebox.showerror("Export", "Export failed. See the console for details.", parent=self)
+            self.btn_export.configure(state="normal")
+            return
+        print(f"✅ Exported {result} rows to {dest}")
+        messagebox.showinfo("Success", f"Exported {result:,} rows.", parent=self)
+        self.destroy()
+
+    def cancel(self):
+        if self.worker:
+            # The export thread stops after its current batch and removes the partial file
+            self.stop_event.set()
+        self.destroy()
@@ -9,6 +9,7 @@ from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 from matplotlib.patches import Circle # Import Circle directly
 
 from app.core.data_handler import DataHandler
+from app.core.dataset_cache import DatasetCache
 
 class AnalyticsFrame(ctk.CTkFrame):
     def __init__(self, parent):
@@ -17,6 +18,8 @@ class AnalyticsFrame(ctk.CTkFrame):
         # Grid layout for the main frame
         self.grid_columnconfigure(0, weight=1)
         self.grid_rowconfigure(1, weight=1) # Charts area expands
+        self._redraw_job = None
+        self._reset_counts()
 
         self.setup_ui()
 
@@ -47,69 +50,102 @@ class AnalyticsFrame(ctk.CTkFrame):
         self.chart_frame_3.grid(row=2, column=0, columnspan=2, sticky="nsew", padx=10, pady=10)
 
     def update_charts(self):
-        """Main method to calculate data and redraw everything."""
+        """Recounts everything from the shared dataset and redraws."""
+        self._reset_counts()
+        for row in DataHandler.load_data():
+            self._tally(row, 1)
+
+        # Afterwards only changed rows are re-tallied (see _on_data_changed)
+        DatasetCache.instance().subscribe(self._on_data_changed)
+        self._redraw()
+
+    def _reset_counts(self):
+        self.total = 0
+        self.cat_counts = Counter()
+        self.prov_counts = Counter()
+        self.tag_counts = Counter()
+        self.date_counts = Counter()
+
+    @staticmethod
+    def _bump(counter, key, sign):
+        counter[key] += sign
+        if counter[key] <= 0: del counter[key]
+
+    def _tally(self, row, sign):
+        """Adds (sign=1) or removes (sign=-1) one row's contribution to the counters."""
+        self.total += sign
+
+        # Categories
+        c = str(row.get('category', '')).strip()
+        # If category is empty, try to infer from tags
+        if not c and row.get('tech_tags'):
+            clean_t = str(row['tech_tags']).replace("['", "").replace("']", "").split(',')[0]
+            c = clean_t
+        if c: self._bump(self.cat_counts, c, sign)
+
+        # Providers
+        p = str(row.get('provider', '')).strip()
+        if p: self._bump(self.prov_counts, p, sign)
+
+        # Tags (Cleaning the messy "['tag']" format)
+        t_raw = (str(row.get('tech_tags', '')) + "," + str(row.get('tags', '')))
+        t_clean = t_raw.replace("['", "").replace("']", "").replace("'", "").replace('"', "")
+        for tag in t_clean.split(','):
+            tag = tag.strip()
+            if tag: self._bump(self.tag_counts, tag, sign)
+
+        # Dates (for timeline)
+        d_raw = str(row.get('created_at', ''))
+        if d_raw:
+            try:
+                # Parse ISO format, just keep YYYY-MM-DD
+                dt = datetime.fromisoformat(d_raw).strftime('%Y-%m-%d')
+                self._bump(self.date_counts, dt, sign)
+            except: pass
+
+    def _on_data_changed(self, change):
+        # May come from a worker thread; hop to the Tk thread
+        self.after(0, self._apply_change, change)
+
+    def _apply_change(self, change):
+        if change.kind == 'reload':
+            self.update_charts()
+            return
+        # Apply each change's own before/after pair, so quick successive edits never drift
+        for row_id in change.ids:
+            old = change.before.get(row_id)
+            if old is not None: self._tally(old, -1)
+            row = change.after.get(row_id)
+            if row is not None: self._tally(row, 1)
+        # Coalesce bursts (e.g. a worker flushing a batch) into one redraw
+        if self._redraw_job: self.after_cancel(self._redraw_job)
+        self._redraw_job = self.after(300, self._redraw)
+
+    def _redraw(self):
+        self._redraw_job = None
         # 1. Clear previous widgets
         for widget in self.kpi_container.winfo_children(): widget.destroy()
         for widget in self.chart_frame_1.winfo_children(): widget.destroy()
         for widget in self.chart_frame_2.winfo_children(): widget.destroy()
         for widget in self.chart_frame_3.winfo_children(): widget.destroy()
 
-        # 2. Load Data
-        data = DataHandler.load_data()
-        
-        if not data:
+        if not self.total:
             ctk.CTkLabel(self.kpi_container, text="No Data Available. Import resources to see analytics.", font=("Roboto", 14)).pack(pady=20)
             return
 
-        # 3. Process Data
-        cats, provs, all_tags, dates = [], [], [], []
-        
-        for row in data:
-            # Categories
-            c = str(row.get('category', '')).strip()
-            # If category is empty, try to infer from tags
-            if not c and row.get('tech_tags'):
-                clean_t = str(row['tech_tags']).replace("['", "").replace("']", "").split(',')[0]
-                c = clean_t
-            if c: cats.append(c)
-
-            # Providers
-            p = str(row.get('provider', '')).strip()
-            if p: provs.append(p)
-
-            # Tags (Cleaning the messy "['tag']" format)
-            t_raw = (str(row.get('tech_tags', '')) + "," + str(row.get('tags', '')))
-            t_clean = t_raw.replace("['", "").replace("']", "").replace("'", "").replace('"', "")
-            for tag in t_clean.split(','):
-                tag = tag.strip()
-                if tag: all_tags.append(tag)
-
-            # Dates (for timeline)
-            d_raw = str(row.get('created_at', ''))
-            if d_raw:
-                try:
-                    # Parse ISO format, just keep YYYY-MM-DD
-                    dt = datetime.fromisoformat(d_raw).strftime('%Y-%m-%d')
-                    dates.append(dt)
-                except: pass
-
-        # 4. Generate KPIs
-        cat_counts = Counter(cats)
-        prov_counts = Counter(provs)
-        tag_counts = Counter(all_tags)
-        
-        top_cat = cat_counts.most_common(1)[0][0] if cats else "N/A"
-        top_prov = prov_counts.most_common(1)[0][0] if provs else "N/A"
+        # 2. Generate KPIs
+        top_cat = self.cat_counts.most_common(1)[0][0] if self.cat_counts else "N/A"
+        top_prov = self.prov_counts.most_common(1)[0][0] if self.prov_counts else "N/A"
 
-        self._create_kpi_card(self.kpi_container, "Total Resources", str(len(data)), "#3B8ED0", 0)
+        self._create_kpi_card(self.kpi_container, "Total Resources", str(self.total), "#3B8ED0", 0)
         self._create_kpi_card(self.kpi_container, "Top Category", top_cat, "#2CC985", 1)
         self._create_kpi_card(self.kpi_container, "Top Provider", top_prov, "#E09F3E", 2)
-        self._create_kpi_card(self.kpi_container, "Unique Tags", str(len(tag_counts)), "#9B59B6", 3)
+        self._create_kpi_card(self.kpi_container, "Unique Tags", str(len(self.tag_counts)), "#9B59B6", 3)
 
-        # 5. Draw Charts
-        self._draw_donut_chart(cat_counts, self.chart_frame_1, "Category Distribution")
-        self._draw_bar_chart(prov_counts, self.chart_frame_2, "Top 5 Providers")
-        self._draw_timeline_chart(dates, self.chart_frame_3, "Resources Added Over Time")
+        # 3. Draw Charts
+        self._draw_donut_chart(self.cat_counts, self.chart_frame_1, "Category Distribution")
+        self._draw_bar_chart(self.prov_counts, self.chart_frame_2, "Top 5 Providers")
+        self._draw_timeline_chart(self.date_counts, self.chart_frame_3, "Resources Added Over Time")
 
     def _create_kpi_card(self, parent, title, value, color, col_idx):
         card = ctk.CTkFrame(parent, fg_color="#212121", border_width=2, border_color="#333", corner_radius=10)
@@ -224,7 +260,7 @@ class AnalyticsFrame(ctk.CTkFrame):
     def _draw_timeline_chart(self, dates, frame, title):
         if not dates: return
 
-        # Count per date
+        # Count per date (accepts a list of dates or a ready Counter)
         date_counts = Counter(dates)
         sorted_dates = sorted(date_counts.keys())
         counts = [date_counts[d] for d in sorted_dates]
@@ -1,12 +1,19 @@
 import customtkinter as ctk
 import tkinter as tk
-from tkinter import ttk, filedialog, messagebox
+from tkinter import ttk, messagebox
 from app.core.data_handler import DataHandler
+from app.core.dataset_cache import DatasetCache
+from app.ui.dialogs import ExportDialog
 
 class DataFrame(ctk.CTkFrame):
+    # Rows shown for a search; narrower queries are faster than scrolling past this
+    SEARCH_LIMIT = 2000
+
     def __init__(self, parent, main_controller):
         super().__init__(parent, fg_color="transparent")
         self.controller = main_controller
+        self._query = ""
+        self._search_job = None
         self.setup_ui()
 
     def setup_ui(self):
@@ -14,8 +21,16 @@ class DataFrame(ctk.CTkFrame):
         tool_dat = ctk.CTkFrame(self, fg_color="transparent")
         tool_dat.pack(fill="x", pady=5)
         ctk.CTkLabel(tool_dat, text="Double-click cells to edit", text_color="gray").pack(side="left")
-        ctk.CTkButton(tool_dat, text="Save/Export CSV", command=self.export_csv, fg_color="#2b825b", width=120).pack(side="right", padx=5)
-        ctk.CTkButton(tool_dat, text="Refresh", command=self.refresh_data, width=80, fg_color="#333").pack(side="right")
+        self.search_var = tk.StringVar()
+        search = ctk.CTkEntry(tool_dat, textvariable=self.search_var, width=260,
+                              placeholder_text="Search title, provider, description, #tag...")
+        search.pack(side="left", padx=(15, 5))
+        search.bind("<KeyRelease>", self._schedule_search)
+        self.lbl_matches = ctk.CTkLabel(tool_dat, text="", text_color="gray")
+        self.lbl_matches.pack(side="left")
+        ctk.CTkButton(tool_dat, text="Export...", command=self.export_csv, fg_color="#2b825b", width=120).pack(side="right", padx=5)
+        ctk.CTkButton(tool_dat, text="Refresh", command=self.force_refresh, width=80, fg_color="#333").pack(side="right")
+        ctk.CTkButton(tool_dat, text="Merge Duplicates", command=self.merge_duplicates, width=120, fg_color="#333").pack(side="right", padx=5)
 
         # Treeview
         tree_frame = ctk.CTkFrame(self, fg_color="transparent")
@@ -47,44 +62,116 @@ class DataFrame(ctk.CTkFrame):
 
     def refresh_data(self):
         # Clear existing
-        for i in self.tree.get_children(): 
-            self.tree.delete(i)
+        self.tree.delete(*self.tree.get_children())
         
         data = DataHandler.load_data()
         
-        for row in data:
-            # Helper to find keys case-insensitively
-            def get_val(keys):
-                for k in keys:
-                    if k in row and row[k]:
-                        return str(row[k]) # Ensure string
-                return ""
-
-            title = get_val(['title', 'Title'])
-            provider = get_val(['provider', 'Provider'])
-            category = get_val(['category', 'Category', 'primary group', 'Group'])
-            
-            # --- NEW: SUBCATEGORY ---
-            subcategory = get_val(['subcategory', 'Subcategory', 'sub'])
-
-            # Tags: Combine tech_tags + tags, clean list characters
-            raw_t1 = get_val(['tech_tags', 'Tech_Tags'])
-            raw_t2 = get_val(['tags', 'Tags'])
-            combined = (raw_t1 + "," + raw_t2).replace("['", "").replace("']", "").replace('"', "").replace("'", "")
-            
-            # Clean split
-            clean_tags_list = [t.strip() for t in combined.split(',') if t.strip()]
-            display_tags = ", ".join(clean_tags_list)
-
-            # Fallback Logic: If Category is empty, try to fill from tags?
-            # (Optional: Removed here to respect the strict logic from worker script)
+        if self._query:
+            self._show_matches()
+        else:
+            for row in data:
+                self._insert_row(row)
+
+        # Later edits and worker inserts arrive as row-level change notifications
+        DatasetCache.instance().subscribe(self._on_data_changed)
+        return len(data)
 
-            link = get_val(['link', 'Link', 'url', 'URL'])
+    def force_refresh(self):
+        """Refresh button: re-read the store even if nothing looks changed."""
+        DatasetCache.instance().invalidate()
+        count = self.refresh_data()
+        self.controller.lbl_count.configure(text=f"Records: {count}")
+
+    @staticmethod
+    def _row_values(row):
+        # Helper to find keys case-insensitively
+        def get_val(keys):
+            for k in keys:
+                if k in row and row[k]:
+                    return str(row[k]) # Ensure string
+            return ""
+
+        title = get_val(['title', 'Title'])
+        provider = get_val(['provider', 'Provider'])
+        category = get_val(['category', 'Category', 'primary group', 'Group'])
+        
+        # --- NEW: SUBCATEGORY ---
+        subcategory = get_val(['subcategory', 'Subcategory', 'sub'])
 
-            vals = [title, provider, category, subcategory, display_tags, link]
-            self.tree.insert("", "end", values=vals)
-            
-        return len(data)
+        # Tags: Combine tech_tags + tags, clean list characters
+        raw_t1 = get_val(['tech_tags', 'Tech_Tags'])
+        raw_t2 = get_val(['tags', 'Tags'])
+        combined = (raw_t1 + "," + raw_t2).replace("['", "").replace("']", "").replace('"', "").replace("'", "")
+        
+        # Clean split
+        clean_tags_list = [t.strip() for t in combined.split(',') if t.strip()]
+        display_tags = ", ".join(clean_tags_list)
+
+        # Fallback Logic: If Category is empty, try to fill from tags?
+        # (Optional: Removed here to respect the strict logic from worker script)
+
+        link = get_val(['link', 'Link', 'url', 'URL'])
+
+        return [title, provider, category, subcategory, display_tags, link]
+
+    def _insert_row(self, row):
+        # Tree item id = row UUID, so edits stay correct however rows are ordered
+        self.tree.insert("", "end", iid=row.get('id') or None, values=self._row_values(row))
+
+    # --- SEARCH ---
+
+    def _schedule_search(self, event=None):
+        # Debounce typing: search once the user pauses
+        if self._search_job: self.after_cancel(self._search_job)
+        self._search_job = self.after(200, self.apply_search)
+
+    def apply_search(self):
+        self._search_job = None
+        query = self.search_var.get().strip()
+        if query == self._query: return
+        self._query = query
+        self.tree.delete(*self.tree.get_children())
+        if query:
+            self._show_matches()
+        else:
+            self.lbl_matches.configure(text="")
+            for row in DataHandler.load_data():
+                self._insert_row(row)
+
+    def _show_matches(self):
+        ids = DataHandler.search(self._query, limit=self.SEARCH_LIMIT + 1)
+        cache = DatasetCache.instance()
+        for row_id in ids[:self.SEARCH_LIMIT]:
+            row = cache.get(row_id)
+            if row is not None: self._insert_row(row)
+        if len(ids) > self.SEARCH_LIMIT:
+            self.lbl_matches.configure(text=f"first {self.SEARCH_LIMIT} matches")
+        else:
+            self.lbl_matches.configure(text=f"{len(ids)} matches")
+
+    def _on_data_changed(self, change):
+        # May come from a worker thread; touch the tree on the Tk thread only
+        self.after(0, self._apply_change, change)
+
+    def _apply_change(self, change):
+        if change.kind == 'reload':
+            count = self.refresh_data()
+        else:
+            cache = DatasetCache.instance()
+            # While filtered, only rows that still match the query are shown
+            matched = set(DataHandler.search(self._query, ids=change.ids)) if self._query else None
+            for row_id in change.ids:
+                row = cache.get(row_id)
+                if row is None: continue
+                if matched is not None and row_id not in matched:
+                    if self.tree.exists(row_id): self.tree.delete(row_id)
+                    continue
+                if self.tree.exists(row_id):
+                    self.tree.item(row_id, values=self._row_values(row))
+                else:
+                    self._insert_row(row)
+            count = len(cache)
+        self.controller.lbl_count.configure(text=f"Records: {count}")
 
     def on_double_click(self, event):
         region = self.tree.identify("region", event.x, event.y)
@@ -122,18 +209,28 @@ class DataFrame(ctk.CTkFrame):
             
             if 0 <= col_idx < len(csv_map):
                 col_name = csv_map[col_idx]
-                row_idx = self.tree.index(item_id)
                 
                 # If editing tags here, we save to 'tags' column 
                 # (tech_tags is treated as merged/read-only or hidden backend field)
-                DataHandler.update_cell(row_idx, col_name, new_val)
-                self.controller.update_analytics_if_needed()
+                # The store notifies the cache, which patches this row and the charts
+                DataHandler.update_cell(item_id, col_name, new_val)
 
         entry.bind("<Return>", save)
         entry.bind("<FocusOut>", lambda e: entry.destroy())
 
     def export_csv(self):
-        dest = filedialog.asksaveasfilename(defaultextension=".csv", filetypes=[("CSV","*.csv")])
-        if dest:
-            if DataHandler.export_data(dest):
-                messagebox.showinfo("Success", "Export successful.")
\ No newline at end of file
+        ExportDialog(self)
+
+    def merge_duplicates(self):
+        groups, removed, examples = DataHandler.merge_duplicate_links(dry_run=True)
+        if not removed:
+            messagebox.showinfo("Duplicates", "No duplicate links found.")
+            return
+        print(f"ℹ️  {removed} duplicate rows in {groups} groups (same canonical URL):")
+        for kept, dropped in examples:
+            print(f"   {kept}  <=  {', '.join(dropped)}")
+        if not messagebox.askyesno("Duplicates", f"Merge {removed} duplicate rows into {groups} resources?\n"
+                                                 "Empty fields and tags are carried over to the kept row."):
+            return
+        groups, removed, _ = DataHandler.merge_duplicate_links()
+        print(f"✅ Merged {removed} duplicate rows.")
@@ -6,6 +6,8 @@ import psutil
 
 from app.config import AppConfig
 from app.core.logger import ConsoleLogger
+from app.core.data_handler import DataHandler
+from app.core.edit_sync import EditSync
 from app.ui.sidebar import Sidebar
 from app.ui.dialogs import Splash, SettingsDialog
 from app.ui.frames.console_frame import ConsoleFrame
@@ -23,6 +25,9 @@ except Exception as e:
     SCRIPTS_AVAILABLE = False
 
 class MainApp(ctk.CTk):
+    # How long closing the window waits for a cancelled run to flush or dead-letter its rows
+    CLOSE_WAIT_SECONDS = 60
+
     def __init__(self):
         super().__init__()
         
@@ -41,6 +46,9 @@ class MainApp(ctk.CTk):
         self.logger = ConsoleLogger()
         self.logger.start_redirect()
         self.stop_event = threading.Event()
+        self.edit_sync = None
+        self.worker_thread = None
+        self._close_deadline = None
 
         # UI Construction
         self.grid_columnconfigure(1, weight=1)
@@ -51,6 +59,7 @@ class MainApp(ctk.CTk):
         
         # Splash
         self.splash = Splash(self, AppConfig.VERSION, self.finish_init)
+        self.protocol("WM_DELETE_WINDOW", self.on_close)
 
     def finish_init(self):
         self.deiconify()
@@ -61,6 +70,11 @@ class MainApp(ctk.CTk):
         count = self.frame_data.refresh_data()
         self.lbl_count.configure(text=f"Records: {count}")
         self.frame_analytics.update_charts()
+        # Data-tab edits are pushed to the database in the background (client setup can be slow)
+        threading.Thread(target=self._start_edit_sync, daemon=True).start()
+
+    def _start_edit_sync(self):
+        self.edit_sync = EditSync.from_config(AppConfig.load_settings())
 
     def write(self, text):
         """Thread-safe write helper used by background threads.
@@ -143,8 +157,25 @@ class MainApp(ctk.CTk):
         if not os.path.exists(AppConfig.RESOURCES_DIR): os.makedirs(AppConfig.RESOURCES_DIR)
         os.startfile(AppConfig.RESOURCES_DIR)
 
-    def update_analytics_if_needed(self):
-        self.frame_analytics.update_charts()
+    def on_close(self):
+        self.stop_event.set()
+        if self._close_deadline is not None: return
+        self._close_deadline = time.monotonic() + self.CLOSE_WAIT_SECONDS
+        if self.worker_thread and self.worker_thread.is_alive():
+            print("⏳ Saving queued rows before closing...")
+        self._finish_close()
+
+    def _finish_close(self):
+        # Writer and upload threads are daemons: let the cancelled run flush or dead-letter
+        # its queued rows first (polling keeps the Tk loop free for the worker's UI calls)
+        if self.worker_thread and self.worker_thread.is_alive() and time.monotonic() < self._close_deadline:
+            self.after(200, self._finish_close)
+            return
+        # Keep the CSV export in step with edits made in the Data tab
+        DataHandler.sync_csv()
+        if self.edit_sync: self.edit_sync.stop()
+        self.logger.stop_redirect()
+        self.destroy()
 
     # --- Background Loops ---
     def check_log_queue(self):
@@ -202,6 +233,7 @@ class MainApp(ctk.CTk):
         t = threading.Thread(target=self.run_process, args=(mode,))
         t.daemon = True
         t.start()
+        self.worker_thread = t
 
     def cancel_worker(self):
         self.stop_event.set()
@@ -218,10 +250,7 @@ class MainApp(ctk.CTk):
             else:
                 try: script_csv.main(self.stop_event)
                 except TypeError: script_csv.main()
-                
-                if not self.stop_event.is_set():
-                    # Refresh data on CSV completion
-                    self.after(500, lambda: [self.frame_data.refresh_data(), self.frame_analytics.update_charts()])
+                # New rows already reached the Data/Analytics tabs via DatasetCache notifications
             
             if self.stop_event.is_set():
                 self.write("\n🛑 STOPPED BY USER.")
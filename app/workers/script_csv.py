@@ -2,13 +2,25 @@ import os
 import uuid
 import gc
 import re
+import threading
 import traceback
 from datetime import datetime
 
 from app.config import AppConfig
 from app.core.content_streamer import ContentStreamer
 from app.core.ai_service import AIService
+from app.core.ai_cache import AICache
+from app.core.rate_governor import RateGovernor
 from app.core.data_handler import DataHandler
+from app.core.worker_pool import FilePool, SharedLinkSet, RunStats
+from app.core.tag_selector import TagSelector
+from app.core.chunk_batcher import ChunkBatcher
+from app.core.near_dup import NearDupIndex
+from app.core.resume_journal import ResumeJournal
+from app.core.file_manifest import FileManifest
+from app.core.buffered_writer import BufferedWriter
+from app.core.resource_store import ResourceStore
+from app.core.link_index import link_key
 
 def main(stop_event=None):
     print("--- AI Resource Tagger (CSV Mode - Active) ---")
@@ -20,20 +32,43 @@ def main(stop_event=None):
             print("❌ Error: Missing Gemini API Key.")
             return
 
-        ai = AIService(api_key)
+        ai_cache = AICache.from_config(config, AIService.MODEL_NAME)
+        ai = AIService(api_key, cache=ai_cache, governor=RateGovernor.from_config(config),
+                       structured=AppConfig.get_setting(config, 'AI_JSON_SCHEMA', AppConfig.AI_JSON_SCHEMA))
+        workers = max(1, AppConfig.get_setting(config, 'FILE_WORKERS', AppConfig.FILE_WORKERS))
+        ai_concurrency = max(1, AppConfig.get_setting(config, 'AI_CONCURRENCY', AppConfig.AI_CONCURRENCY))
+        stream_opts = AppConfig.stream_settings(config)
+        link_prepass = AppConfig.get_setting(config, 'LINK_PREPASS', AppConfig.LINK_PREPASS)
+        stats = RunStats()
+        near_dup = NearDupIndex.from_config(config)
+        journal = ResumeJournal.from_config(config)
         
-        hist_file = os.path.join(AppConfig.BASE_DIR, "processed_history.log")
         tag_file = os.path.join(AppConfig.BASE_DIR, "tagging_reference.csv")
         
         guide = DataHandler.load_tagging_guide(tag_file)
         full_map = DataHandler.load_category_map(tag_file)
+        guide_top_n = AppConfig.get_setting(config, 'GUIDE_TOP_N', AppConfig.GUIDE_TOP_N)
+        if guide_top_n > 0:
+            # Per-chunk compact guide; full_map still resolves any tag the model returns
+            selector = TagSelector(DataHandler.load_tag_rows(tag_file), top_n=guide_top_n)
+            if len(selector):
+                guide = selector.guide_for
+                print(f"ℹ️  Using top-{guide_top_n} tag preselection per chunk.")
         
-        history = DataHandler.load_history(hist_file)
-        existing_data = DataHandler.load_data() 
-        processed_links = {row.get('link', '').strip() for row in existing_data if row.get('link')}
+        batcher = ChunkBatcher.from_config(config, ai, guide)
+        manifest = FileManifest.from_config()
+        # Links are compared by canonical URL; stored ones are looked up in the store's index
+        processed_links = SharedLinkSet(key=link_key, lookup=ResourceStore.instance().has_link_key)
+
+        def rejected(rows):
+            # Rows that could not be saved give up their claims, so a later file or run can add them
+            for r in rows: processed_links.release(r['link'])
+
+        writer = BufferedWriter.from_config(config, stop_event, on_failed=rejected)
         
         if not os.path.exists(AppConfig.RESOURCES_DIR):
-            print(f"❌ Resources folder missing.")
+            print("❌ Resources folder missing.")
+            writer.close()
             return
 
         files = [f for f in os.listdir(AppConfig.RESOURCES_DIR) 
@@ -41,26 +76,48 @@ def main(stop_event=None):
         
         count = 0
         skipped_history = 0
+        count_lock = threading.Lock()
 
-        for i, filename in enumerate(files):
-            if stop_event and stop_event.is_set(): break
-            
-            if filename in history: 
-                skipped_history += 1
-                continue 
+        def process_file(i, filename):
+            nonlocal count, skipped_history
+            file_path = os.path.join(AppConfig.RESOURCES_DIR, filename)
+            try:
+                # Cheap stat() check first; the file is hashed only if it changed
+                skip, state = manifest.check(file_path)
+            except OSError as e:
+                print(f"❌ Error in {filename}: {e}")
+                return
+            if skip: 
+                with count_lock: skipped_history += 1
+                return
 
             print(f"[{i+1}/{len(files)}] Scanning: {filename}...")
-            file_path = os.path.join(AppConfig.RESOURCES_DIR, filename)
             file_links = set()
+            found = 0
+            failed = 0
 
             try:
-                stream = ContentStreamer.generator(file_path, os.path.splitext(filename)[1].lower())
+                digest, resume_at = state[2], {}
+                if journal:
+                    checkpoint = journal.get(digest)
+                    if checkpoint:
+                        resume_at = {'start_index': checkpoint[0], 'start_offset': checkpoint[1]}
+                        print(f"   ↪ Resuming {filename} after chunk {checkpoint[0]}.")
+
+                stream = ContentStreamer.generator(file_path, os.path.splitext(filename)[1].lower(), **stream_opts, **resume_at)
                 
                 if stream:
-                    for chunk in stream:
+                    if link_prepass: stream = ContentStreamer.only_linked(stream, stats)
+                    if near_dup: stream = near_dup.filter(stream, filename, stats)
+                    if batcher: extracted = batcher.extract_stream(stream, source=filename)
+                    else: extracted = ai.extract_stream(stream, guide, concurrency=ai_concurrency)
+                    if journal: extracted = journal.track(extracted, digest, filename, writer)
+
+                    for chunk, results in extracted:
                         if stop_event and stop_event.is_set(): break
-                        
-                        results = ai.extract_resource(chunk, guide)
+                        # Only a definitive answer marks the chunk; a failed request leaves its near-copies to be tried
+                        if near_dup and results is not None: near_dup.mark_processed(chunk, filename)
+                        if results is None: failed += 1
                         if not results: continue
 
                         for item in results:
@@ -71,7 +128,7 @@ def main(stop_event=None):
                                 return str(val).strip()
 
                             link = safe_str(item.get('link'))
-                            if not link or link in processed_links or link in file_links: continue
+                            if not link or link_key(link) in file_links or link in processed_links: continue
 
                             # --- TAG MERGING & MAPPING ---
                             raw_tags = item.get('tags')
@@ -129,20 +186,57 @@ def main(stop_event=None):
                                 'subcategory': forced_sub
                             }
 
-                            if DataHandler.append_csv_safe(AppConfig.CSV_FILE, fieldnames=['id', 'created_at', 'title', 'provider', 'votes', 'level', 'description', 'category', 'outcomes', 'link', 'approved', 'image', 'tags', 'tech_tags', 'subcategory'], row_data=row):
-                                processed_links.add(link)
-                                file_links.add(link)
-                                count += 1
-                                print(f"   + Added: {row['title']} (Sub: {forced_sub})")
-
-                if not (stop_event and stop_event.is_set()):
-                    DataHandler.mark_history(hist_file, filename)
+                            # Claim the link first so a parallel file task cannot add it too
+                            if not processed_links.claim(link): continue
+                            writer.write(row, source=filename)
+                            file_links.add(link_key(link))
+                            found += 1
+                            with count_lock: count += 1
+                            print(f"   + Added: {row['title']} (Sub: {forced_sub})")
+
+                if failed:
+                    # Chunks without an answer are not lost: the file stays unfinished and resumes at the first of them
+                    print(f"   ⚠️ {failed} chunks of {filename} failed; it will be scanned again next run.")
+                    writer.defer(lambda: manifest.mark(file_path, state, FileManifest.ERROR, found), source=filename)
+                elif not (stop_event and stop_event.is_set()):
+                    # Only recorded as done once this file's rows are flushed
+                    writer.defer(lambda: manifest.mark(file_path, state, FileManifest.DONE, found), source=filename)
+                    if journal: writer.defer(lambda: journal.clear(digest), source=filename)
             
             except Exception as e:
                 print(f"❌ Error in {filename}: {e}")
+                manifest.mark(file_path, state, FileManifest.ERROR, found)
             
             gc.collect()
 
+        FilePool.run(files, process_file, workers=workers, stop_event=stop_event)
+        ContentStreamer.shutdown_pdf_pool()
+        writer.close()
+        count -= writer.rows_failed
+        if link_prepass and stats['chunks']:
+            print(f"ℹ️  Link pre-pass: skipped {stats['skipped_no_link']} of {stats['chunks']} chunks with no URL "
+                  f"({stats['skipped_no_link']} API calls saved).")
+        if near_dup:
+            print(f"ℹ️  Near-duplicate filter: skipped {stats['skipped_near_dup']} chunks seen in other documents "
+                  f"({stats['skipped_near_dup']} API calls saved).")
+            near_dup.close()
+        if journal: journal.close()
+        manifest.close()
+        if skipped_history > 0:
+            print(f"ℹ️  Skipped {skipped_history} unchanged files.")
+        if batcher:
+            batcher.close()
+            print(f"ℹ️  {batcher.stats()}")
+
+        print(f"ℹ️  {ai.governor.stats()}")
+        print(f"ℹ️  {ai.parse_stats()}")
+        if ai_cache:
+            print(f"ℹ️  {ai_cache.stats()}")
+            ai_cache.close()
+
+        if count > 0:
+            DataHandler.sync_csv()
+
         if count == 0:
             print("\n✅ Scan Complete. No new resources.")
         else:
@@ -150,4 +244,4 @@ def main(stop_event=None):
 
     except Exception as e:
         print(f"❌ SCRIPT ERROR: {e}")
-        traceback.print_exc()
\ No newline at end of file
+        traceback.print_exc()
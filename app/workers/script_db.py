@@ -2,14 +2,26 @@ import os
 import uuid
 import gc
 import re
+import threading
 import traceback
 from datetime import datetime
-from supabase import create_client
 
 from app.config import AppConfig
 from app.core.content_streamer import ContentStreamer
 from app.core.ai_service import AIService
+from app.core.ai_cache import AICache
+from app.core.rate_governor import RateGovernor
 from app.core.data_handler import DataHandler
+from app.core.worker_pool import FilePool, SharedLinkSet, RunStats
+from app.core.tag_selector import TagSelector
+from app.core.chunk_batcher import ChunkBatcher
+from app.core.near_dup import NearDupIndex
+from app.core.resume_journal import ResumeJournal
+from app.core.file_manifest import FileManifest
+from app.core.link_index import LinkIndex, link_key
+from app.core.supabase_sink import SupabaseUpsertSink, make_rest_client, rest_endpoint
+from app.core.remote_mirror import RemoteLinkMirror
+from app.core.upload_queue import UploadQueue
 
 def main(stop_event=None):
     print("--- AI Resource Uploader (Database Mode - Active) ---")
@@ -17,37 +29,85 @@ def main(stop_event=None):
     config = AppConfig.load_settings()
     try:
         api_key = config['API']['GEMINI_API_KEY']
-        sup_url = config['SETTINGS']['SUPABASE_URL']
-        sup_key = config['API']['SUPABASE_KEY']
+        if not config['SETTINGS'].get('POSTGREST_URL', '').strip():
+            config['SETTINGS']['SUPABASE_URL']
+            config['API']['SUPABASE_KEY']
     except KeyError:
         print("❌ Error: Missing API Keys.")
         return
 
-    ai = AIService(api_key)
+    ai_cache = AICache.from_config(config, AIService.MODEL_NAME)
+    ai = AIService(api_key, cache=ai_cache, governor=RateGovernor.from_config(config),
+                   structured=AppConfig.get_setting(config, 'AI_JSON_SCHEMA', AppConfig.AI_JSON_SCHEMA))
+    workers = max(1, AppConfig.get_setting(config, 'FILE_WORKERS', AppConfig.FILE_WORKERS))
+    ai_concurrency = max(1, AppConfig.get_setting(config, 'AI_CONCURRENCY', AppConfig.AI_CONCURRENCY))
+    stream_opts = AppConfig.stream_settings(config)
+    link_prepass = AppConfig.get_setting(config, 'LINK_PREPASS', AppConfig.LINK_PREPASS)
+    stats = RunStats()
+    near_dup = NearDupIndex.from_config(config)
+    journal = ResumeJournal.from_config(config)
     
     try:
-        supabase = create_client(sup_url, sup_key)
+        supabase = make_rest_client(config)
         print("✅ Connected to Supabase.")
     except Exception as e:
         print(f"❌ Supabase Connection Failed: {e}")
         return
 
-    hist_file = os.path.join(AppConfig.BASE_DIR, "processed_history.log")
     tag_file = os.path.join(AppConfig.BASE_DIR, "tagging_reference.csv")
     
     guide = DataHandler.load_tagging_guide(tag_file)
     full_map = DataHandler.load_category_map(tag_file)
-    history = DataHandler.load_history(hist_file)
+    guide_top_n = AppConfig.get_setting(config, 'GUIDE_TOP_N', AppConfig.GUIDE_TOP_N)
+    if guide_top_n > 0:
+        # Per-chunk compact guide; full_map still resolves any tag the model returns
+        selector = TagSelector(DataHandler.load_tag_rows(tag_file), top_n=guide_top_n)
+        if len(selector):
+            guide = selector.guide_for
+            print(f"ℹ️  Using top-{guide_top_n} tag preselection per chunk.")
+    batcher = ChunkBatcher.from_config(config, ai, guide)
+    manifest = FileManifest.from_config()
     
+    # Remote links are mirrored as canonical-URL hashes on disk; each run fetches only the delta.
+    # One mirror per server, so a local stand-in never mixes links or watermark with production
+    link_index = LinkIndex.from_config(f"supabase:{rest_endpoint(config)}")
+    mirror = RemoteLinkMirror.from_config(config, supabase, link_index)
     try:
-        res = supabase.table('requested_resources').select('link').execute()
-        db_links = {row['link'].strip() for row in res.data if row.get('link')}
-        print(f"ℹ️  {len(db_links)} links in DB.")
-    except:
-        db_links = set()
+        if link_index is not None:
+            fetched = mirror.sync()
+            db_links = SharedLinkSet(key=link_key, lookup=link_index.__contains__)
+            print(f"ℹ️  {fetched} new links from DB, {len(link_index)} in the local mirror.")
+        else:
+            db_links = SharedLinkSet(mirror.all_links(), key=link_key)
+            print(f"ℹ️  {len(db_links)} links in DB.")
+    except Exception as e:
+        # The upsert's on_conflict=link still deduplicates on the server; the mirror only saves requests
+        print(f"⚠️ Link sync failed: {e}")
+        db_links = SharedLinkSet(key=link_key, lookup=link_index.__contains__ if link_index is not None else None)
+
+    # Extraction only queues rows; an uploader thread upserts them in batches,
+    # and the server ignores links it already has
+    def uploaded(rows):
+        if link_index is not None: link_index.add_many(link_key(r['link']) for r in rows)
+
+    def rejected(rows):
+        for r in rows: db_links.release(r['link'])
+
+    sink = SupabaseUpsertSink(supabase, on_written=uploaded, on_failed=rejected)
+    uploader = UploadQueue.from_config(config, sink, stop_event)
+
+    replay = uploader.take_dead_letters()
+    if replay:
+        print(f"ℹ️  Retrying {len(replay)} rows left over from the last run.")
+        for row in replay:
+            # Stamped again: an old created_at would land below the mirrors' watermarks
+            row['created_at'] = datetime.utcnow().isoformat()
+            if row.get('link') and db_links.claim(row['link']): uploader.write(row)
+    uploader.replay_queued()
 
     if not os.path.exists(AppConfig.RESOURCES_DIR):
-        print(f"❌ Resources folder not found.")
+        print("❌ Resources folder not found.")
+        uploader.close()
         return
 
     files = [f for f in os.listdir(AppConfig.RESOURCES_DIR) 
@@ -55,24 +115,47 @@ def main(stop_event=None):
     
     count = 0
     skipped_history = 0
+    count_lock = threading.Lock()
 
-    for i, filename in enumerate(files):
-        if stop_event and stop_event.is_set(): break
-        if filename in history: 
-            skipped_history += 1
-            continue
+    def process_file(i, filename):
+        nonlocal count, skipped_history
+        file_path = os.path.join(AppConfig.RESOURCES_DIR, filename)
+        try:
+            # Cheap stat() check first; the file is hashed only if it changed
+            skip, state = manifest.check(file_path)
+        except OSError as e:
+            print(f"❌ Error in {filename}: {e}")
+            return
+        if skip: 
+            with count_lock: skipped_history += 1
+            return
 
         print(f"[{i+1}/{len(files)}] Scanning: {filename}...")
-        file_path = os.path.join(AppConfig.RESOURCES_DIR, filename)
         file_links = set()
+        found = 0
+        failed = 0
 
         try:
-            stream = ContentStreamer.generator(file_path, os.path.splitext(filename)[1].lower())
+            digest, resume_at = state[2], {}
+            if journal:
+                checkpoint = journal.get(digest)
+                if checkpoint:
+                    resume_at = {'start_index': checkpoint[0], 'start_offset': checkpoint[1]}
+                    print(f"   ↪ Resuming {filename} after chunk {checkpoint[0]}.")
+
+            stream = ContentStreamer.generator(file_path, os.path.splitext(filename)[1].lower(), **stream_opts, **resume_at)
             if stream:
-                for chunk in stream:
+                if link_prepass: stream = ContentStreamer.only_linked(stream, stats)
+                if near_dup: stream = near_dup.filter(stream, filename, stats)
+                if batcher: extracted = batcher.extract_stream(stream, source=filename)
+                else: extracted = ai.extract_stream(stream, guide, concurrency=ai_concurrency)
+                if journal: extracted = journal.track(extracted, digest, filename, uploader)
+
+                for chunk, results in extracted:
                     if stop_event and stop_event.is_set(): break
-                    
-                    results = ai.extract_resource(chunk, guide)
+                    # Only a definitive answer marks the chunk; a failed request leaves its near-copies to be tried
+                    if near_dup and results is not None: near_dup.mark_processed(chunk, filename)
+                    if results is None: failed += 1
                     if not results: continue
 
                     for item in results:
@@ -83,7 +166,7 @@ def main(stop_event=None):
                             return str(val).strip()
 
                         link = safe_str(item.get('link'))
-                        if not link or link in db_links or link in file_links: continue
+                        if not link or link_key(link) in file_links or link in db_links: continue
 
                         # --- TAG MERGING ---
                         all_found = []
@@ -138,24 +221,54 @@ def main(stop_event=None):
                             'subcategory': forced_sub
                         }
 
-                        try:
-                            res = supabase.table('requested_resources').insert(row).execute()
-                            if res.data:
-                                db_links.add(link)
-                                file_links.add(link)
-                                count += 1
-                                print(f"   ☁️  Uploaded: {row['title']} (Sub: {forced_sub})")
-                        except Exception as e:
-                            print(f"   ❌ DB Insert Error: {e}")
-
-            if not (stop_event and stop_event.is_set()):
-                DataHandler.mark_history(hist_file, filename)
+                        # Claim the link first so a parallel file task cannot upload it too
+                        if not db_links.claim(link): continue
+                        uploader.write(row)
+                        file_links.add(link_key(link))
+                        found += 1
+                        with count_lock: count += 1
+                        print(f"   ☁️  Queued: {row['title']} (Sub: {forced_sub})")
+
+            if failed:
+                # Chunks without an answer are not lost: the file stays unfinished and resumes at the first of them
+                print(f"   ⚠️ {failed} chunks of {filename} failed; it will be scanned again next run.")
+                uploader.defer(lambda: manifest.mark(file_path, state, FileManifest.ERROR, found))
+            elif not (stop_event and stop_event.is_set()):
+                # Only recorded as done once this file's rows are uploaded
+                uploader.defer(lambda: manifest.mark(file_path, state, FileManifest.DONE, found))
+                if journal: uploader.defer(lambda: journal.clear(digest))
         
         except Exception as e:
             print(f"❌ Error in {filename}: {e}")
+            manifest.mark(file_path, state, FileManifest.ERROR, found)
         
         gc.collect()
 
+    FilePool.run(files, process_file, workers=workers, stop_event=stop_event)
+    ContentStreamer.shutdown_pdf_pool()
+    uploader.close()
+    print(f"ℹ️  {sink.stats()}")
+    print(f"ℹ️  {uploader.stats()}")
+    if link_prepass and stats['chunks']:
+        print(f"ℹ️  Link pre-pass: skipped {stats['skipped_no_link']} of {stats['chunks']} chunks with no URL "
+              f"({stats['skipped_no_link']} API calls saved).")
+    if near_dup:
+        print(f"ℹ️  Near-duplicate filter: skipped {stats['skipped_near_dup']} chunks seen in other documents "
+              f"({stats['skipped_near_dup']} API calls saved).")
+        near_dup.close()
+    if journal: journal.close()
+    manifest.close()
+    if link_index is not None: link_index.close()
+    if batcher:
+        batcher.close()
+        print(f"ℹ️  {batcher.stats()}")
+
+    print(f"ℹ️  {ai.governor.stats()}")
+    print(f"ℹ️  {ai.parse_stats()}")
+    if ai_cache:
+        print(f"ℹ️  {ai_cache.stats()}")
+        ai_cache.close()
+
     if skipped_history > 0:
-        print(f"ℹ️  Skipped {skipped_history} files.")
-    print(f"\n✅ Job Complete. Uploaded {count} new resources.")
\ No newline at end of file
+        print(f"ℹ️  Skipped {skipped_history} unchanged files.")
+    print(f"\n✅ Job Complete. Uploaded {sink.inserted} new resources ({count} queued).")
\ No newline at end of file
@@ -0,0 +1,123 @@
+import os
+import traceback
+
+from app.config import AppConfig
+from app.core.content_streamer import ContentStreamer
+from app.core.ai_service import AIService
+from app.core.ai_cache import AICache
+from app.core.rate_governor import RateGovernor
+from app.core.data_handler import DataHandler
+from app.core.tag_selector import TagSelector
+
+def _norm_tags(item):
+    found = set()
+    for key in ('tags', 'tech_tags'):
+        val = item.get(key)
+        if isinstance(val, str): val = val.split(',')
+        if not isinstance(val, list): continue
+        for v in val:
+            if isinstance(v, dict): v = v.get('tag') or v.get('hashtag') or ""
+            v = str(v).strip().strip("'\"[]").lstrip('#').lower()
+            if v: found.add(v)
+    return found
+
+def _category(item, tags, full_map):
+    for t in sorted(tags):
+        match = full_map.get(t) or full_map.get("#" + t)
+        if match: return match['group']
+    return str(item.get('category') or "").strip()
+
+def _by_link(results):
+    return {str(i.get('link') or "").strip(): i for i in results if isinstance(i, dict) and i.get('link')}
+
+def _evaluate(ai, chunks, full_guide, selector, full_map, stop_event=None):
+    """Extracts every chunk with both guides and tallies the agreement. Failed samples are only counted."""
+    r = dict(compared=0, failed=0, compact_chars=0, full_links=0, shared_links=0, jaccard_sum=0.0, same_category=0)
+    for i, chunk in enumerate(chunks):
+        if stop_event and stop_event.is_set(): break
+        compact_guide = selector.guide_for(chunk)
+        print(f"[{i+1}/{len(chunks)}] Comparing chunk ({len(full_guide)} vs {len(compact_guide)} guide chars)...")
+
+        full_items = ai.extract_resource(chunk, full_guide)
+        compact_items = ai.extract_resource(chunk, compact_guide) if full_items is not None else None
+        if full_items is None or compact_items is None:
+            # No answer is not the same as "found nothing": keep it out of recall and agreement
+            print("   ⚠️ Request failed; sample skipped.")
+            r['failed'] += 1
+            continue
+        full, compact = _by_link(full_items), _by_link(compact_items)
+        r['compared'] += 1
+        r['compact_chars'] += len(compact_guide)
+        r['full_links'] += len(full)
+
+        for link, item in full.items():
+            other = compact.get(link)
+            if other is None: continue
+            r['shared_links'] += 1
+            a, b = _norm_tags(item), _norm_tags(other)
+            r['jaccard_sum'] += (len(a & b) / len(a | b)) if (a or b) else 1.0
+            if _category(item, a, full_map) == _category(other, b, full_map): r['same_category'] += 1
+    return r
+
+def main(stop_event=None):
+    """
+    Measurement mode for tag preselection: sends the same sample chunks with the full
+    guide and with the compact top-N guide, then reports prompt size and tag agreement.
+    """
+    print("--- Tagging Guide Evaluation (Full vs Preselected) ---")
+
+    try:
+        config = AppConfig.load_settings()
+        api_key = config['API'].get('GEMINI_API_KEY')
+        if not api_key:
+            print("❌ Error: Missing Gemini API Key.")
+            return
+
+        ai = AIService(api_key, cache=AICache.from_config(config, AIService.MODEL_NAME),
+                       governor=RateGovernor.from_config(config),
+                       structured=AppConfig.get_setting(config, 'AI_JSON_SCHEMA', AppConfig.AI_JSON_SCHEMA))
+        tag_file = os.path.join(AppConfig.BASE_DIR, "tagging_reference.csv")
+        full_guide = DataHandler.load_tagging_guide(tag_file)
+        full_map = DataHandler.load_category_map(tag_file)
+        top_n = AppConfig.get_setting(config, 'GUIDE_TOP_N', AppConfig.GUIDE_TOP_N) or 40
+        selector = TagSelector(DataHandler.load_tag_rows(tag_file), top_n=top_n)
+        sample_size = AppConfig.get_setting(config, 'GUIDE_EVAL_CHUNKS', AppConfig.GUIDE_EVAL_CHUNKS)
+
+        if not os.path.exists(AppConfig.RESOURCES_DIR):
+            print("❌ Resources folder missing.")
+            return
+
+        chunks = []
+        for filename in sorted(os.listdir(AppConfig.RESOURCES_DIR)):
+            ext = os.path.splitext(filename)[1].lower()
+            if ext not in ('.pdf', '.docx', '.txt'): continue
+            for chunk in ContentStreamer.generator(os.path.join(AppConfig.RESOURCES_DIR, filename), ext) or []:
+                chunks.append(chunk)
+                if len(chunks) >= sample_size: break
+            if len(chunks) >= sample_size: break
+
+        if not chunks:
+            print("⚠️ No chunks to evaluate.")
+            return
+
+        r = _evaluate(ai, chunks, full_guide, selector, full_map, stop_event)
+        compared, full_links, shared_links = r['compared'], r['full_links'], r['shared_links']
+
+        n = max(compared, 1)
+        avg_compact = r['compact_chars'] / n
+        print("\n--- GUIDE EVALUATION REPORT ---")
+        print(f"Chunks compared:        {compared}")
+        if r['failed']:
+            print(f"Failed samples:         {r['failed']} (request failed; left out of the figures below)")
+        print(f"Guide size (chars):     full {len(full_guide)}, compact avg {avg_compact:.0f} "
+              f"({len(full_guide) / max(avg_compact, 1):.1f}x smaller, top-{top_n})")
+        if full_links:
+            print(f"Link recall:            {100.0 * shared_links / full_links:.1f}% ({shared_links}/{full_links})")
+        if shared_links:
+            print(f"Tag agreement (Jaccard): {100.0 * r['jaccard_sum'] / shared_links:.1f}%")
+            print(f"Category agreement:     {100.0 * r['same_category'] / shared_links:.1f}%")
+        print("\n✅ Evaluation Complete.")
+
+    except Exception as e:
+        print(f"❌ SCRIPT ERROR: {e}")
+        traceback.print_exc()
@@ -0,0 +1,28 @@
+import os
+import sys
+
+import pytest
+
+# Tests import the app package from the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.config import AppConfig
+
+
+@pytest.fixture
+def data_dir(tmp_path, monkeypatch):
+    """Points every AppConfig data path at a temporary directory."""
+    for name in ('DATA_DIR', 'CSV_FILE', 'STORE_FILE', 'AI_CACHE_FILE', 'NEAR_DUP_FILE',
+                 'RESUME_JOURNAL_FILE', 'LINK_INDEX_FILE', 'MANIFEST_FILE', 'DEAD_LETTER_FILE'):
+        value = getattr(AppConfig, name)
+        monkeypatch.setattr(AppConfig, name, str(tmp_path / os.path.basename(value)) if name != 'DATA_DIR'
+                            else str(tmp_path))
+    monkeypatch.setattr(AppConfig, 'LEGACY_HISTORY_FILE', str(tmp_path / "processed_history.log"))
+    return tmp_path
+
+
+@pytest.fixture
+def store(data_dir):
+    """A fresh ResourceStore in the temporary data directory."""
+    from app.core.resource_store import ResourceStore
+    return ResourceStore(AppConfig.STORE_FILE, AppConfig.CSV_FILE)
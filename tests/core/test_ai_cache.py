@@ -0,0 +1,46 @@
+from app.core.ai_cache import AICache
+
+
+def _cache(tmp_path, max_bytes=10_000):
+    return AICache(str(tmp_path / "ai_cache.db"), "model", max_bytes=max_bytes)
+
+
+def test_key_depends_on_model_guide_and_chunk(tmp_path):
+    cache = _cache(tmp_path)
+    cache.put("chunk", "guide", [{'link': 'https://a.com'}])
+    assert cache.get("chunk", "guide") == [{'link': 'https://a.com'}]
+    assert cache.get("chunk", "other guide") is None
+    assert AICache(str(tmp_path / "other.db"), "other model").make_key("chunk", "guide") != cache.make_key("chunk", "guide")
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_hits_do_not_write(tmp_path):
+    cache = _cache(tmp_path)
+    cache.put("chunk", "guide", [])
+    before = cache._conn.total_changes
+    for _ in range(20): cache.get("chunk", "guide")
+    assert cache._conn.total_changes == before
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    payload = [{'description': 'x' * 900}]
+    cache = _cache(tmp_path, max_bytes=3000)
+    for name in ('a', 'b', 'c'): cache.put(name, "guide", payload)
+    # 'a' is the oldest put but was just used, so 'b' goes first
+    assert cache.get('a', "guide") == payload
+    cache.put('d', "guide", payload)
+    assert cache.get('b', "guide") is None
+    assert cache.get('a', "guide") == payload and cache.get('d', "guide") == payload
+    assert cache._total <= 3000
+
+
+def test_recent_use_survives_a_restart(tmp_path):
+    payload = [{'description': 'x' * 900}]
+    cache = _cache(tmp_path, max_bytes=3000)
+    for name in ('a', 'b', 'c'): cache.put(name, "guide", payload)
+    cache.get('a', "guide")
+    cache.close()
+
+    cache = _cache(tmp_path, max_bytes=3000)
+    cache.put('d', "guide", payload)
+    assert cache.get('a', "guide") == payload and cache.get('b', "guide") is None
@@ -0,0 +1,158 @@
+import asyncio
+import time
+
+import pytest
+
+import app.core.ai_service as ai_service
+from app.core.ai_service import AIService
+from app.core.rate_governor import RateGovernor
+
+
+class FakeError(Exception):
+    def __init__(self, code, message=""):
+        super().__init__(f"{code} {message}")
+        self.code = code
+
+
+class FakeResponse:
+    def __init__(self, text):
+        self.text = text
+
+
+class FakeModel:
+    """Replays scripted responses: strings are returned as text, exceptions are raised."""
+    script = []
+
+    def __init__(self, name):
+        self.calls = 0
+
+    def generate_content(self, prompt, generation_config=None):
+        self.calls += 1
+        step = FakeModel.script.pop(0)
+        if isinstance(step, Exception): raise step
+        return FakeResponse(step)
+
+    async def generate_content_async(self, prompt, generation_config=None):
+        return self.generate_content(prompt, generation_config)
+
+
+@pytest.fixture
+def service(monkeypatch):
+    monkeypatch.setattr(ai_service.genai, 'GenerativeModel', FakeModel)
+    monkeypatch.setattr(ai_service.genai, 'configure', lambda **kwargs: None)
+    return AIService("key", governor=RateGovernor(base_delay=0.001, max_delay=0.01))
+
+
+def test_failed_request_returns_none(service):
+    FakeModel.script = [FakeError(400, "Bad request")]
+    assert service.extract_resource("chunk", "guide") is None
+
+
+def test_answer_without_items_is_an_empty_list(service):
+    FakeModel.script = ['[]']
+    assert service.extract_resource("chunk", "guide") == []
+
+
+def test_failed_batch_marks_every_chunk_failed(service):
+    FakeModel.script = [FakeError(403, "Forbidden")]
+    assert service.extract_batch([("a", "text a"), ("b", "text b")], "guide") == {"a": None, "b": None}
+
+
+def test_quota_errors_do_not_use_up_retries(service):
+    FakeModel.script = [FakeError(429, "Resource exhausted, retry in 0.001s")] * (AIService.RETRIES + 3) + ['[{"link": "https://a.com"}]']
+    assert service.extract_resource("chunk", "guide") == [{"link": "https://a.com"}]
+    assert service.governor.throttled == AIService.RETRIES + 3
+
+
+def test_other_errors_use_up_retries(service):
+    FakeModel.script = [FakeError(500, "Internal")] * AIService.RETRIES + ['[]']
+    assert service.extract_resource("chunk", "guide") is None
+    assert FakeModel.script == ['[]']
+
+
+def test_quota_wait_is_bounded(service, monkeypatch):
+    monkeypatch.setattr(service, 'THROTTLE_WAIT', 0.01)
+    FakeModel.script = [FakeError(429, "retry in 0.02s")] * 3 + ['[]']
+    assert service.extract_resource("chunk", "guide") is None
+
+
+def test_async_quota_errors_do_not_use_up_retries(service):
+    FakeModel.script = [FakeError(503, "Unavailable, retry in 0.001s")] * (AIService.RETRIES + 1) + ['[]']
+    assert asyncio.run(service._extract_async("chunk", "guide")) == []
+
+
+class EchoModel:
+    """Answers with one item per chunk; later chunks answer faster, so completion order is reversed."""
+
+    def __init__(self):
+        self.inflight = 0
+        self.peak = 0
+        self.calls = 0
+
+    async def generate_content_async(self, prompt, generation_config=None):
+        n = int(prompt.split("chunk-")[1].split()[0])
+        self.calls += 1
+        self.inflight += 1
+        self.peak = max(self.peak, self.inflight)
+        await asyncio.sleep(0.05 / (n + 1))
+        self.inflight -= 1
+        return FakeResponse(f'[{{"link": "https://x{n}.com"}}]')
+
+
+def test_extract_stream_keeps_chunk_order_with_bounded_window(service):
+    service.model = EchoModel()
+    read = []
+
+    def chunks():
+        for i in range(10):
+            read.append(i)
+            yield f"chunk-{i} text"
+
+    out = []
+    for chunk, results in service.extract_stream(chunks(), "guide", concurrency=3):
+        # Read-ahead never runs further than twice the concurrency past what was consumed
+        assert len(read) <= len(out) + 1 + 3 * 2
+        out.append((chunk, results))
+    assert [c for c, _ in out] == [f"chunk-{i} text" for i in range(10)]
+    assert [r[0]['link'] for _, r in out] == [f"https://x{i}.com" for i in range(10)]
+    assert 1 < service.model.peak <= 3
+
+
+def test_extract_stream_stopped_early_sends_no_more_requests(service):
+    service.model = EchoModel()
+    stream = service.extract_stream((f"chunk-{i} text" for i in range(100)), "guide", concurrency=3)
+    assert next(stream)[0] == "chunk-0 text"
+    stream.close()
+    calls = service.model.calls
+    time.sleep(0.1)
+    assert calls == service.model.calls < 100
+
+
+def test_batched_items_are_mapped_by_id_then_link(service):
+    FakeModel.script = ['[{"chunk_id": "b", "link": "https://b.com"}, {"chunk_id": "?", "link": "https://a.com"},'
+                        ' {"chunk_id": "?", "link": "https://nowhere.com"}]']
+    results = service.extract_batch([("a", "see https://a.com"), ("b", "see https://b.com")], "guide")
+    assert results == {"a": [{"link": "https://a.com"}], "b": [{"link": "https://b.com"}]}
+
+
+class DictCache:
+    def __init__(self):
+        self.entries = {}
+
+    def get(self, chunk, guide):
+        return self.entries.get((chunk, guide))
+
+    def put(self, chunk, guide, items):
+        self.entries[(chunk, guide)] = items
+
+
+def test_batched_results_are_cached_only_under_the_guide_sent(service):
+    service.cache = DictCache()
+    FakeModel.script = ['[{"chunk_id": "a", "link": "https://a.com"}]'] * 2
+    service.extract_batch([("a", "text a"), ("b", "text b")], "guide")
+    assert set(service.cache.entries) == {("text a", "guide"), ("text b", "guide")}
+
+    # Per-chunk guides: the model saw the combined guide, so nothing is cached per chunk
+    service.cache = DictCache()
+    service.extract_batch([("a", "text a"), ("b", "text b")], lambda text: f"guide for {text}")
+    assert service.cache.entries == {}
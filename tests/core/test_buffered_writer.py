@@ -0,0 +1,83 @@
+from app.core.buffered_writer import BufferedWriter
+
+
+class FlakySink:
+    def __init__(self, failures=0):
+        self.failures = failures
+        self.batches = []
+
+    def __call__(self, rows):
+        if self.failures:
+            self.failures -= 1
+            raise OSError("disk full")
+        self.batches.append(list(rows))
+
+
+def test_rows_are_written_in_batches_and_defer_runs_after_them():
+    sink = FlakySink()
+    writer = BufferedWriter(sink, batch_rows=2, flush_interval=60)
+    events = []
+    writer.write({'link': 'a'})
+    writer.defer(lambda: events.append(len(sink.batches)))
+    assert events == []
+    writer.write({'link': 'b'})
+    assert events == [1]
+    writer.write({'link': 'c'})
+    assert writer.close()
+    assert sink.batches == [[{'link': 'a'}, {'link': 'b'}], [{'link': 'c'}]]
+
+
+def test_failed_flush_keeps_rows_for_retry():
+    sink = FlakySink(failures=1)
+    writer = BufferedWriter(sink, batch_rows=10, flush_interval=60)
+    writer.write({'link': 'a'})
+    assert not writer.flush()
+    assert writer.flush()
+    assert sink.batches == [[{'link': 'a'}]]
+    writer.close()
+
+
+def test_rows_that_keep_failing_are_dropped_and_reported():
+    sink = FlakySink(failures=99)
+    dropped, marks = [], []
+    writer = BufferedWriter(sink, batch_rows=10, flush_interval=60, on_failed=dropped.extend, max_failures=2)
+    writer.write({'link': 'a'})
+    writer.defer(lambda: marks.append('done'))
+    writer.flush()
+    assert dropped == []
+    writer.flush()
+    assert dropped == [{'link': 'a'}]
+    assert marks == []
+    assert writer.rows_failed == 1
+    writer.close()
+
+
+def test_close_drops_unwritable_rows_instead_of_losing_them_silently():
+    dropped = []
+    writer = BufferedWriter(FlakySink(failures=99), batch_rows=10, flush_interval=60, on_failed=dropped.extend)
+    writer.write({'link': 'a'})
+    assert not writer.close()
+    assert dropped == [{'link': 'a'}]
+
+
+def test_later_steps_of_a_file_with_dropped_rows_are_skipped():
+    sink = FlakySink(failures=2)
+    writer = BufferedWriter(sink, batch_rows=100, flush_interval=60, max_failures=2)
+    events = []
+    writer.write({'link': 'a'}, source='a.pdf')
+    writer.write({'link': 'b'}, source='b.pdf')
+    writer.defer(lambda: events.append('a checkpoint 1'), source='a.pdf')
+    assert not writer.flush()
+    assert not writer.flush()
+    assert writer.dropped('a.pdf') and writer.dropped('b.pdf') and writer.rows_failed == 2
+
+    # The file kept streaming: its later checkpoint and its DONE mark must not run
+    writer.write({'link': 'a2'}, source='a.pdf')
+    writer.defer(lambda: events.append('a checkpoint 2'), source='a.pdf')
+    writer.write({'link': 'c'}, source='c.pdf')
+    writer.defer(lambda: events.append('c done'), source='c.pdf')
+    writer.defer(lambda: events.append('a done'), source='a.pdf')
+    assert writer.close()
+    writer.defer(lambda: events.append('a done late'), source='a.pdf')
+    assert events == ['c done']
+    assert sink.batches == [[{'link': 'a2'}, {'link': 'c'}]]
@@ -0,0 +1,54 @@
+import threading
+
+from app.core.chunk_batcher import ChunkBatcher, estimate_tokens
+
+
+class FakeAI:
+    """extract_batch that echoes each chunk back as one item, recording the batches sent."""
+
+    def __init__(self, fail=False):
+        self.batches = []
+        self.fail = fail
+        self._lock = threading.Lock()
+
+    def extract_batch(self, batch, tagging_guide):
+        with self._lock: self.batches.append([cid for cid, _ in batch])
+        if self.fail: return {cid: None for cid, _ in batch}
+        return {cid: [{'text': chunk}] for cid, chunk in batch}
+
+
+def test_results_map_back_to_their_chunks_across_files():
+    ai = FakeAI()
+    batcher = ChunkBatcher(ai, "guide", token_budget=estimate_tokens("x" * 40) * 3, max_wait=60)
+    futures = [batcher.submit("x" * 39 + str(i), source=f"file{i % 2}") for i in range(6)]
+    batcher.close()
+    assert [f.result() for f in futures] == [[{'text': "x" * 39 + str(i)}] for i in range(6)]
+    assert [len(b) for b in ai.batches] == [3, 3]
+    assert batcher.requests == 2 and batcher.chunks == 6
+
+
+def test_partial_batch_is_sent_after_max_wait():
+    ai = FakeAI()
+    batcher = ChunkBatcher(ai, "guide", token_budget=10_000, max_wait=0.05)
+    future = batcher.submit("small chunk")
+    assert future.result(timeout=2) == [{'text': "small chunk"}]
+    batcher.close()
+
+
+def test_stream_keeps_order_and_reports_failures_as_none():
+    batcher = ChunkBatcher(FakeAI(fail=True), "guide", token_budget=50, max_wait=0.01)
+    out = list(batcher.extract_stream([f"chunk {i}" for i in range(5)]))
+    batcher.close()
+    assert [c for c, _ in out] == [f"chunk {i}" for i in range(5)]
+    assert all(r is None for _, r in out)
+
+
+def test_cancelled_chunks_are_not_sent():
+    ai = FakeAI()
+    batcher = ChunkBatcher(ai, "guide", token_budget=10_000, max_wait=60)
+    kept, dropped = batcher.submit("kept"), batcher.submit("dropped")
+    dropped.cancel()
+    batcher.flush()
+    assert kept.result(timeout=2) == [{'text': "kept"}]
+    batcher.close()
+    assert ai.batches == [['c1']]
@@ -0,0 +1,107 @@
+import random
+
+from app.core.content_streamer import ContentStreamer, _URL_RE
+
+
+def _document(n_paragraphs=60, seed=7):
+    rnd = random.Random(seed)
+    words = "model agent vector retrieval prompt eval dataset notebook tutorial course".split()
+    paragraphs, urls = [], []
+    for i in range(n_paragraphs):
+        url = f"https://example{i}.com/docs/{'x' * rnd.randint(5, 60)}?ref={i}"
+        urls.append(url)
+        text = " ".join(rnd.choice(words) for _ in range(rnd.randint(10, 60)))
+        paragraphs.append(f"{text} see {url} for details. {text}.")
+    return "\n\n".join(paragraphs), urls
+
+
+def _pieces(text, size=97):
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+def test_urls_are_never_split():
+    text, urls = _document()
+    chunks = list(ContentStreamer.chunk(_pieces(text), chunk_size=300, overlap=50))
+    found = set()
+    for chunk in chunks:
+        assert set(chunk.links) <= set(urls), "chunk contains a URL fragment"
+        found.update(chunk.links)
+    assert found == set(urls)
+
+
+def test_chunks_overlap_and_always_progress():
+    text, _ = _document()
+    chunks = list(ContentStreamer.chunk(_pieces(text), chunk_size=300, overlap=50))
+    assert len(chunks) > 10
+    for prev, chunk in zip(chunks, chunks[1:]):
+        assert chunk == text[chunk.offset:chunk.offset + len(chunk)]
+        assert chunk.index == prev.index + 1
+        assert chunk.offset == prev.next_offset
+        assert prev.offset < chunk.offset < prev.offset + len(prev)
+    assert chunks[-1].offset + len(chunks[-1]) >= len(text) - 100
+
+
+def test_oversized_url_is_kept_whole():
+    url = "https://example.com/" + "a" * 900
+    text = "intro words " * 30 + url + " trailing words " * 40
+    chunks = list(ContentStreamer.chunk(_pieces(text), chunk_size=300, overlap=50))
+    assert any(url in chunk.links for chunk in chunks)
+    for chunk in chunks:
+        for m in _URL_RE.finditer(chunk):
+            assert m.group() == url or not m.group().startswith("https://example.com/")
+
+
+def test_resume_from_start_offset_matches_full_run(tmp_path):
+    text, _ = _document()
+    path = tmp_path / "doc.txt"
+    path.write_text(text, encoding="utf-8")
+    full = list(ContentStreamer.generator(str(path), '.txt', chunk_size=300, overlap=50))
+    k = len(full) // 2
+    resumed = list(ContentStreamer.generator(str(path), '.txt', chunk_size=300, overlap=50,
+                                             start_offset=full[k].next_offset, start_index=full[k].index + 1))
+    assert [(c.index, c.offset, str(c)) for c in resumed] == [(c.index, c.offset, str(c)) for c in full[k + 1:]]
+
+
+# Module-level so the process pool can pickle them
+def _fake_page_count(file_path):
+    return 21
+
+
+def _fake_pages(file_path, start=0, stop=None):
+    for i in range(start, 21 if stop is None else min(stop, 21)):
+        yield f"page {i} of {file_path}"
+
+
+def test_pdf_backend_registry(monkeypatch):
+    monkeypatch.setattr(ContentStreamer, 'PDF_BACKENDS', {})
+    assert ContentStreamer.pdf_backend() == (None, None)
+    ContentStreamer.register_pdf_backend('slow', _fake_page_count, _fake_pages)
+    ContentStreamer.register_pdf_backend('fast', _fake_page_count, _fake_pages, preferred=True)
+    assert ContentStreamer.pdf_backend()[0] == 'fast'
+    assert ContentStreamer.pdf_backend('slow')[0] == 'slow'
+    assert ContentStreamer.pdf_backend('missing')[0] == 'fast'
+
+
+def test_page_pool_yields_pages_in_order(monkeypatch):
+    monkeypatch.setattr(ContentStreamer, 'PDF_BACKENDS', {})
+    monkeypatch.setattr(ContentStreamer, 'PDF_PAGES_PER_TASK', 4)
+    ContentStreamer.register_pdf_backend('fake', _fake_page_count, _fake_pages)
+    expected = [f"page {i} of doc.pdf" for i in range(21)]
+    assert list(ContentStreamer.stream_pdf("doc.pdf", processes=0)) == expected
+    try:
+        assert list(ContentStreamer.stream_pdf("doc.pdf", processes=2)) == expected
+        assert ContentStreamer._pdf_pool is not None
+    finally:
+        ContentStreamer.shutdown_pdf_pool()
+    assert ContentStreamer._pdf_pool is None
+
+
+def test_only_linked_drops_chunks_without_a_url_candidate():
+    from app.core.content_streamer import Chunk
+    from app.core.worker_pool import RunStats
+    linked = Chunk("plain text")
+    linked.links = ["https://hidden.com"]
+    chunks = ["see https://a.com", "nothing here", "docs at example.org/x", linked, "no link either"]
+    stats = RunStats()
+    assert list(ContentStreamer.only_linked(chunks, stats)) == ["see https://a.com", "docs at example.org/x", linked]
+    assert (stats['chunks'], stats['skipped_no_link']) == (5, 2)
@@ -0,0 +1,63 @@
+from collections import Counter
+
+from app.core.dataset_cache import DatasetCache
+
+
+def test_each_change_carries_its_own_after_row(store):
+    store.insert_many([{'id': 'r1', 'title': 'a', 'link': 'https://a.com', 'category': 'Tools'}])
+    cache = DatasetCache(store)
+    assert len(cache.rows()) == 1
+    changes = []
+    cache.subscribe(changes.append)
+
+    # Two edits land before any subscriber has handled the first notification
+    store.update('r1', 'category', 'Courses')
+    store.update('r1', 'category', 'Papers')
+
+    counts = Counter(['Tools'])
+    for change in changes:
+        for row_id in change.ids:
+            counts[change.before[row_id]['category']] -= 1
+            counts[change.after[row_id]['category']] += 1
+    assert +counts == Counter(['Papers'])
+    assert [c.after['r1']['category'] for c in changes] == ['Courses', 'Papers']
+
+
+def test_insert_has_no_before_row(store):
+    cache = DatasetCache(store)
+    cache.rows()
+    changes = []
+    cache.subscribe(changes.append)
+    store.insert({'id': 'r2', 'title': 'b', 'link': 'https://b.com'})
+    assert changes[0].kind == 'insert'
+    assert changes[0].before == {}
+    assert changes[0].after['r2']['title'] == 'b'
+
+
+def test_in_process_bookkeeping_does_not_reload(store):
+    store.insert_many([{'id': 'r1', 'title': 'a', 'link': 'https://a.com'}])
+    cache = DatasetCache(store)
+    cache.rows()
+    changes = []
+    cache.subscribe(changes.append)
+    store.update('r1', 'title', 'edited')
+    _, _, edited_at = store.pending_changes()['r1']['title']
+    store.resolve_change('r1', 'title', edited_at)
+    store.set_synchronous('full')
+    cache.rows()
+    assert [c.kind for c in changes] == ['update']
+
+
+def test_write_from_another_connection_reloads(store):
+    import sqlite3
+    store.insert_many([{'id': 'r1', 'title': 'a', 'link': 'https://a.com'}])
+    cache = DatasetCache(store)
+    cache.rows()
+    changes = []
+    cache.subscribe(changes.append)
+    other = sqlite3.connect(store.db_path)
+    other.execute("UPDATE resources SET title = 'outside' WHERE id = 'r1'")
+    other.commit()
+    other.close()
+    assert cache.rows()[0]['title'] == 'outside'
+    assert [c.kind for c in changes] == ['reload']
@@ -0,0 +1,151 @@
+import pytest
+
+from app.core.edit_sync import EditSync
+
+
+class FakeResult:
+    def __init__(self, data):
+        self.data = data
+
+
+class FakeQuery:
+    def __init__(self, server, cols=None, patch=None):
+        self.server, self.cols, self.patch = server, cols, patch
+        self.filters = []
+
+    def in_(self, col, values):
+        self.filters.append(lambda r: str(r[col]) in values)
+        return self
+
+    def eq(self, col, value):
+        self.filters.append(lambda r: str(r.get(col)).lower() == str(value).lower() if isinstance(r.get(col), bool)
+                            else str(r.get(col)) == str(value))
+        return self
+
+    def is_(self, col, value):
+        assert value == 'null'
+        self.filters.append(lambda r: r.get(col) is None)
+        return self
+
+    def execute(self):
+        server = self.server
+        if self.patch is not None:
+            server.patches.append((self.patch, self))
+            if server.fail_updates: raise ConnectionError("gateway timeout")
+            if server.before_update: server.before_update(server)
+        rows = [r for r in server.rows.values() if all(f(r) for f in self.filters)]
+        if self.patch is not None:
+            for r in rows: r.update(self.patch)
+            return FakeResult([dict(r) for r in rows])
+        return FakeResult([{c: r.get(c) for c in self.cols} for r in rows])
+
+
+class FakeTable:
+    def __init__(self, server):
+        self.server = server
+
+    def select(self, columns):
+        return FakeQuery(self.server, cols=columns.split(','))
+
+    def update(self, patch):
+        return FakeQuery(self.server, patch=patch)
+
+
+class FakeServer:
+    """Stand-in for the PostgREST table API used by EditSync."""
+
+    def __init__(self, rows):
+        self.rows = {r['id']: dict(r) for r in rows}
+        self.patches = []
+        self.fail_updates = False
+        self.before_update = None
+
+    def table(self, name):
+        return FakeTable(self)
+
+
+ROWS = [{'id': f'r{i}', 'title': f'title {i}', 'category': 'AI', 'approved': True, 'link': f'https://x{i}.com'}
+        for i in range(4)]
+
+
+@pytest.fixture
+def synced(store):
+    store.insert_many([{**r, 'approved': 'true'} for r in ROWS])
+    server = FakeServer(ROWS)
+    return store, server, EditSync(server, store=store)
+
+
+def test_repeated_edits_of_a_cell_are_coalesced(synced):
+    store, server, sync = synced
+    store.update('r0', 'title', 'first')
+    store.update('r0', 'title', 'second')
+    value, base, _ = store.pending_changes()['r0']['title']
+    assert (value, base) == ('second', 'title 0')
+    store.update('r0', 'title', 'title 0')
+    assert store.pending_changes() == {}
+
+
+def test_rows_with_the_same_edit_share_one_patch(synced):
+    store, server, sync = synced
+    for row_id in ('r0', 'r1', 'r2'): store.update(row_id, 'category', 'ML')
+    store.update('r3', 'category', 'Data')
+    assert sync.sync_once() == 4
+    assert sorted(p['category'] for p, _ in server.patches) == ['Data', 'ML']
+    assert [r['category'] for r in server.rows.values()] == ['ML', 'ML', 'ML', 'Data']
+    assert sync.pushed == 4 and store.pending_changes() == {}
+
+
+def test_remote_change_is_a_conflict_and_not_overwritten(synced):
+    store, server, sync = synced
+    server.rows['r0']['title'] = 'changed remotely'
+    store.update('r0', 'title', 'local')
+    sync.sync_once()
+    assert server.patches == [] and server.rows['r0']['title'] == 'changed remotely'
+    assert sync.conflicts == 1 and store.change_counts() == {'conflict': 1}
+
+
+def test_write_between_read_and_patch_is_not_overwritten(synced):
+    store, server, sync = synced
+    store.update('r0', 'title', 'local')
+    server.before_update = lambda s: s.rows['r0'].update(title='changed remotely')
+    sync.sync_once()
+    assert server.rows['r0']['title'] == 'changed remotely'
+    assert sync.pushed == 0 and sync.conflicts == 1
+
+    # Editing the cell again overrides the remote value it was shown
+    server.before_update = None
+    store.update('r0', 'title', 'local again')
+    sync.sync_once()
+    assert server.rows['r0']['title'] == 'local again'
+
+
+def test_row_missing_remotely(synced):
+    store, server, sync = synced
+    del server.rows['r1']
+    store.update('r1', 'title', 'local')
+    assert sync.sync_once() == 1
+    assert sync.missing == 1 and store.change_counts() == {'missing': 1}
+
+
+def test_boolean_column_is_not_a_false_conflict(synced):
+    store, server, sync = synced
+    store.update('r2', 'approved', 'false')
+    sync.sync_once()
+    assert sync.conflicts == 0
+    assert server.rows['r2']['approved'] == 'false' and store.pending_changes() == {}
+
+
+def test_failing_patch_is_set_aside_after_retries(synced):
+    store, server, sync = synced
+    store.update('r0', 'title', 'local')
+    server.fail_updates = True
+    for _ in range(EditSync.MAX_FAILURES - 1):
+        with pytest.raises(ConnectionError): sync.sync_once()
+    assert sync.sync_once() == 1
+    assert store.change_counts() == {'error': 1} and sync.errors == 1
+
+    # Later edits are no longer stuck behind it
+    server.fail_updates = False
+    store.update('r1', 'title', 'next')
+    sync.sync_once()
+    assert server.rows['r1']['title'] == 'next'
@@ -0,0 +1,75 @@
+import csv
+import json
+import os
+import threading
+
+import pytest
+
+from app.core.exporter import ResourceExporter
+
+
+@pytest.fixture
+def filled(store, monkeypatch):
+    monkeypatch.setattr(ResourceExporter, 'BATCH', 2)
+    store.insert_many([{'id': f'r{i}', 'title': f'title {i}', 'link': f'https://x{i}.com',
+                        'category': 'Tools' if i % 2 else 'Courses', 'approved': 'yes' if i < 2 else ''}
+                       for i in range(5)])
+    return store
+
+
+def test_csv_export_writes_selected_columns(filled, tmp_path):
+    dest = str(tmp_path / 'out.csv')
+    progress = []
+    written = ResourceExporter.export(dest, columns=['id', 'title', 'bogus'], store=filled,
+                                      progress=lambda done, total: progress.append((done, total)))
+    assert written == 5
+    assert progress == [(2, 5), (4, 5), (5, 5)]
+    with open(dest, newline='', encoding='utf-8') as f:
+        rows = list(csv.reader(f))
+    assert rows[0] == ['id', 'title']
+    assert rows[1:] == [[f'r{i}', f'title {i}'] for i in range(5)]
+    assert not os.path.exists(dest + ".tmp")
+
+
+def test_jsonl_export_applies_filters(filled, tmp_path):
+    dest = str(tmp_path / 'out.jsonl')
+    written = ResourceExporter.export(dest, columns=['id', 'category'], categories=['Tools'],
+                                      approved=True, store=filled)
+    assert written == 1
+    with open(dest, encoding='utf-8') as f:
+        assert [json.loads(line) for line in f] == [{'id': 'r1', 'category': 'Tools'}]
+
+
+def test_cancel_keeps_the_previous_file(filled, tmp_path):
+    dest = str(tmp_path / 'out.csv')
+    with open(dest, 'w', encoding='utf-8') as f:
+        f.write("previous export\n")
+    stop = threading.Event()
+
+    def cancel_after_first_batch(done, total):
+        stop.set()
+    written = ResourceExporter.export(dest, store=filled, stop_event=stop, progress=cancel_after_first_batch)
+
+    assert written is None
+    assert not os.path.exists(dest + ".tmp")
+    with open(dest, encoding='utf-8') as f:
+        assert f.read() == "previous export\n"
+
+
+def test_failed_export_leaves_no_partial_file(filled, tmp_path):
+    dest = str(tmp_path / 'out.csv')
+
+    def broken(done, total):
+        raise OSError("disk full")
+    with pytest.raises(OSError):
+        ResourceExporter.export(dest, store=filled, progress=broken)
+    assert not os.path.exists(dest)
+    assert not os.path.exists(dest + ".tmp")
+
+
+def test_missing_optional_writer_is_reported(filled, tmp_path, monkeypatch):
+    monkeypatch.setattr('app.core.exporter.HAS_PYARROW', False)
+    assert ResourceExporter.format_for('out.parquet') == 'parquet'
+    assert ResourceExporter.format_for('out.txt') == 'csv'
+    with pytest.raises(ValueError, match='pyarrow'):
+        ResourceExporter.export(str(tmp_path / 'out.parquet'), store=filled)
@@ -0,0 +1,111 @@
+import os
+
+import pytest
+
+from app.config import AppConfig
+from app.core import file_manifest as manifest_module
+from app.core.file_manifest import FileManifest
+
+
+@pytest.fixture
+def resources(data_dir, monkeypatch):
+    path = os.path.join(str(data_dir), 'resources')
+    os.makedirs(path)
+    monkeypatch.setattr(AppConfig, 'RESOURCES_DIR', path)
+    return path
+
+
+@pytest.fixture
+def manifest(data_dir):
+    m = FileManifest(AppConfig.MANIFEST_FILE)
+    yield m
+    m.close()
+
+
+@pytest.fixture
+def hashed(monkeypatch):
+    calls = []
+    digest = manifest_module.file_digest
+
+    def counting(path):
+        calls.append(path)
+        return digest(path)
+    monkeypatch.setattr(manifest_module, 'file_digest', counting)
+    return calls
+
+
+def _write(folder, name, text):
+    path = os.path.join(folder, name)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(text)
+    return path
+
+
+def _touch(path):
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 5_000_000_000))
+
+
+def test_unchanged_file_is_skipped_on_stat_alone(resources, manifest, hashed):
+    path = _write(resources, 'a.txt', 'alpha')
+    skip, state = manifest.check(path)
+    assert not skip
+    manifest.mark(path, state, FileManifest.DONE, 4)
+
+    hashed.clear()
+    skip, state = manifest.check(path)
+    assert skip
+    assert hashed == []
+
+
+def test_touched_file_with_same_content_is_skipped_after_hashing(resources, manifest, hashed):
+    path = _write(resources, 'a.txt', 'alpha')
+    manifest.mark(path, manifest.check(path)[1], FileManifest.DONE, 4)
+    _touch(path)
+
+    hashed.clear()
+    skip, state = manifest.check(path)
+    assert skip
+    assert len(hashed) == 1
+    # The new stamp is remembered, so the next check is stat-only again
+    hashed.clear()
+    assert manifest.check(path)[0]
+    assert hashed == []
+
+
+def test_copied_or_renamed_content_is_skipped(resources, manifest):
+    path = _write(resources, 'a.txt', 'alpha')
+    manifest.mark(path, manifest.check(path)[1], FileManifest.DONE, 4)
+    copy = _write(resources, 'b.txt', 'alpha')
+    assert manifest.check(copy)[0]
+
+    edited = _write(resources, 'c.txt', 'alpha, edited')
+    assert not manifest.check(edited)[0]
+
+
+def test_error_files_are_scanned_again(resources, manifest):
+    path = _write(resources, 'a.txt', 'alpha')
+    manifest.mark(path, manifest.check(path)[1], FileManifest.ERROR)
+    assert not manifest.check(path)[0]
+    copy = _write(resources, 'b.txt', 'alpha')
+    assert not manifest.check(copy)[0]
+
+
+def test_legacy_history_is_migrated_once(resources, data_dir):
+    done = _write(resources, 'old.txt', 'legacy')
+    _write(resources, 'new.txt', 'fresh')
+    with open(AppConfig.LEGACY_HISTORY_FILE, 'w', encoding='utf-8') as f:
+        f.write("old.txt\nmissing.txt\n")
+
+    m = FileManifest(AppConfig.MANIFEST_FILE, AppConfig.LEGACY_HISTORY_FILE)
+    try:
+        assert not os.path.exists(AppConfig.LEGACY_HISTORY_FILE)
+        assert os.path.exists(AppConfig.LEGACY_HISTORY_FILE + ".migrated")
+        assert m.check(done)[0]
+        assert not m.check(os.path.join(resources, 'new.txt'))[0]
+        # Legacy entries carry no digest: an edit is noticed as usual
+        _write(resources, 'old.txt', 'legacy, edited')
+        _touch(done)
+        assert not m.check(done)[0]
+    finally:
+        m.close()
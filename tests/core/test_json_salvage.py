@@ -0,0 +1,47 @@
+from app.core.json_salvage import parse_items
+
+
+def test_fenced_json_parses_whole():
+    items, complete = parse_items('```json\n[{"title": "a", "link": "x"}]\n```')
+    assert items == [{'title': 'a', 'link': 'x'}] and complete
+
+
+def test_truncated_list_keeps_complete_items():
+    text = '[{"title": "a", "link": "x"}, {"title": "b", "link": "y"}, {"title": "c", "li'
+    items, complete = parse_items(text, required=('link',))
+    assert [i['title'] for i in items] == ['a', 'b'] and not complete
+
+
+def test_trailing_commas():
+    text = '[{"title": "a", "link": "x"}, {"title": "b", "link": "y",}, {"title": "c", "link": "z"},]'
+    items, _ = parse_items(text, required=('link',))
+    assert [i['title'] for i in items] == ['a', 'c']
+
+
+def test_prose_around_the_list():
+    text = 'Here are the resources:\n[{"title": "a", "link": "x"}]\nLet me know if you need "more".'
+    items, complete = parse_items(text, required=('link',))
+    assert items == [{'title': 'a', 'link': 'x'}] and not complete
+
+
+def test_nested_object_of_a_cut_off_item_is_not_an_item():
+    text = '[{"title":"a","link":"x"}, {"title":"cut","meta":{"link":"z"}, "link":"htt'
+    items, _ = parse_items(text, required=('link',))
+    assert items == [{'title': 'a', 'link': 'x'}]
+
+
+def test_nested_object_of_a_broken_item_is_skipped_and_later_items_kept():
+    text = '[{"title":"bad","meta":{"link":"z"},}, {"title":"b","link":"y", "tags": ["#rag"]}'
+    items, _ = parse_items(text, required=('link',))
+    assert items == [{'title': 'b', 'link': 'y', 'tags': ['#rag']}]
+
+
+def test_wrapper_object_around_a_cut_off_list():
+    text = '{"resources": [{"title": "a", "link": "x"}, {"title": "b", "li'
+    items, _ = parse_items(text, required=('link',))
+    assert items == [{'title': 'a', 'link': 'x'}]
+
+
+def test_nothing_usable_is_none():
+    assert parse_items('[{"title": "cut', required=('link',)) == (None, False)
+    assert parse_items('') == ([], True)
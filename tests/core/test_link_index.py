@@ -0,0 +1,68 @@
+import pytest
+
+from app.core.link_index import LINK_KEY_VERSION, LinkIndex, canonical_url, link_key
+
+
+@pytest.mark.parametrize("a, b", [
+    ("https://example.com/page?utm_source=x&utm_medium=y", "https://example.com/page"),
+    ("https://example.com/page?fbclid=abc&id=3", "https://example.com/page?id=3"),
+    ("https://example.com/p?b=2&a=1", "https://example.com/p?a=1&b=2"),
+    ("http://www.Example.com/docs", "https://example.com/docs"),
+    ("https://example.com/docs/", "https://example.com/docs"),
+    ("https://example.com:443/docs", "https://example.com/docs"),
+    ("example.com/docs", "https://example.com/docs"),
+    ("https://example.com/docs#intro", "https://example.com/docs"),
+])
+def test_equivalent_links_share_a_canonical_form(a, b):
+    assert canonical_url(a) == canonical_url(b)
+    assert link_key(a) == link_key(b)
+
+
+@pytest.mark.parametrize("a, b", [
+    ("https://example.com:8080/docs", "https://example.com/docs"),
+    ("example.com:8080/docs", "https://example.com/docs"),
+    ("https://example.com/docs?id=1", "https://example.com/docs?id=2"),
+    ("https://blog.example.com", "https://example.com"),
+    ("https://docs.example.com/api?ref=v2", "https://docs.example.com/api"),
+    ("https://data.example.com/set?source=census", "https://data.example.com/set"),
+    ("https://open.example.com/track/1?si=abc", "https://open.example.com/track/1"),
+])
+def test_different_links_stay_different(a, b):
+    assert canonical_url(a) != canonical_url(b)
+
+
+def test_non_default_port_is_kept():
+    assert canonical_url("example.com:8080/docs/") == "https://example.com:8080/docs"
+
+
+@pytest.mark.parametrize("url", ["mailto:a@b.com", "tel:+15551234", "ftp://files.example.com/pub/", "ftp:example"])
+def test_non_http_schemes_are_left_unchanged(url):
+    assert canonical_url(url) == url
+    assert link_key(url) != link_key("https://b.com")
+
+
+def test_mailto_is_not_deduplicated_against_the_site():
+    assert link_key("mailto:a@b.com") != link_key("https://b.com")
+
+
+def test_index_membership_uses_canonical_keys(tmp_path):
+    index = LinkIndex(str(tmp_path / "links.db"), scope="test")
+    index.add_many([link_key("https://example.com/a/?utm_source=x")])
+    assert link_key("http://www.example.com/a") in index
+    assert link_key("https://example.com/b") not in index
+    index.close()
+
+
+def test_index_from_an_older_canonical_form_starts_over(tmp_path):
+    path = str(tmp_path / "links.db")
+    index = LinkIndex(path, scope="test")
+    index.add_many([link_key("https://a.com")])
+    index.set_meta('watermark', '["2026-01-01", 5]')
+    index.set_meta('link_key_version', str(LINK_KEY_VERSION - 1))
+    index.close()
+
+    index = LinkIndex(path, scope="test")
+    assert len(index) == 0 and index.get_meta('watermark') is None
+    index.add_many([link_key("https://a.com")])
+    index.close()
+    assert len(LinkIndex(path, scope="test")) == 1
@@ -0,0 +1,132 @@
+import re
+
+from app.core.link_index import LinkIndex, link_key
+from app.core.remote_mirror import RemoteLinkMirror
+from app.core.supabase_sink import rest_endpoint
+
+
+class FakeResult:
+    def __init__(self, data):
+        self.data = data
+
+
+class FakeQuery:
+    def __init__(self, server):
+        self.server = server
+        self.negate = False
+        self.undated = False
+        self.after = None
+        self.since = None
+        self.after_id = None
+        self.count = None
+
+    @property
+    def not_(self):
+        self.negate = True
+        return self
+
+    def select(self, columns): return self
+    def order(self, column): return self
+
+    def is_(self, column, value):
+        self.undated = not self.negate
+        self.negate = False
+        return self
+
+    def limit(self, count):
+        self.count = count
+        return self
+
+    def or_(self, filters):
+        created_at, row_id = re.match(r'created_at\.gt\."([^"]+)".*id\.gt\."([^"]+)"', filters).groups()
+        self.after = (created_at, int(row_id))
+        return self
+
+    def gte(self, column, value):
+        self.since = value
+        return self
+
+    def gt(self, column, value):
+        self.after_id = value
+        return self
+
+    def execute(self):
+        if self.undated:
+            rows = sorted((r for r in self.server.rows if r['created_at'] is None), key=lambda r: r['id'])
+            rows = [r for r in rows if self.after_id is None or r['id'] > self.after_id]
+        else:
+            rows = sorted((r for r in self.server.rows if r['created_at'] is not None),
+                          key=lambda r: (r['created_at'], r['id']))
+            rows = [r for r in rows if (not self.after or (r['created_at'], r['id']) > self.after)
+                    and (not self.since or r['created_at'] >= self.since)]
+        # Like PostgREST's max-rows: never more than the server cap, whatever the limit asks for
+        return FakeResult(rows[:min(self.count, self.server.max_rows)])
+
+
+class FakeServer:
+    """Stand-in for the PostgREST table API read by the mirror."""
+
+    def __init__(self, n, max_rows):
+        self.rows = [{'id': i, 'created_at': f'2026-01-01T00:{i // 60:02d}:{i % 60:02d}', 'link': f'https://x{i}.com'}
+                     for i in range(n)]
+        self.max_rows = max_rows
+
+    def table(self, name):
+        return FakeQuery(self)
+
+
+def test_sync_pages_past_a_server_row_cap(tmp_path):
+    server = FakeServer(2500, max_rows=500)
+    index = LinkIndex(str(tmp_path / "links.db"), 'test')
+    mirror = RemoteLinkMirror(server, index, page_size=1000)
+    assert mirror.sync() == 2500
+    assert len(index) == 2500
+
+    server.rows.append({'id': 2500, 'created_at': '2026-01-01T01:00:00', 'link': 'https://new.com'})
+    assert mirror.sync() == 1
+    assert link_key('https://new.com') in index
+
+
+def test_rows_stamped_behind_the_watermark_are_fetched(tmp_path):
+    server = FakeServer(100, max_rows=30)
+    index = LinkIndex(str(tmp_path / "links.db"), 'test')
+    mirror = RemoteLinkMirror(server, index, overlap_minutes=60)
+    mirror.sync()
+
+    # Another client's clock is 10 minutes behind; its row arrives after the watermark moved on
+    server.rows.append({'id': 100, 'created_at': '2026-01-01T00:00:30', 'link': 'https://late.com'})
+    assert mirror.sync() == 1
+    assert link_key('https://late.com') in index
+    # The re-read window only adds what is new
+    assert mirror.sync() == 0
+
+
+def test_rows_without_created_at_are_fetched(tmp_path):
+    server = FakeServer(10, max_rows=5)
+    server.rows += [{'id': 100 + i, 'created_at': None, 'link': f'https://undated{i}.com'} for i in range(7)]
+    index = LinkIndex(str(tmp_path / "links.db"), 'test')
+    mirror = RemoteLinkMirror(server, index)
+    assert mirror.sync() == 17
+    assert link_key('https://undated6.com') in index
+    assert len(list(RemoteLinkMirror(server).all_links())) == 17
+
+
+def test_empty_index_is_truthy(tmp_path):
+    index = LinkIndex(str(tmp_path / "links.db"), 'test')
+    assert len(index) == 0 and index
+
+
+def test_scopes_keep_links_and_watermarks_apart(tmp_path):
+    path = str(tmp_path / "links.db")
+    local, prod = LinkIndex(path, 'supabase:http://localhost:3000'), LinkIndex(path, 'supabase:https://p.supabase.co')
+    RemoteLinkMirror(FakeServer(10, max_rows=5), local).sync()
+    assert len(prod) == 0 and not prod.get_meta('watermark')
+
+
+def test_rest_endpoint_prefers_postgrest_url():
+    import configparser
+    config = configparser.ConfigParser()
+    config['SETTINGS'] = {'SUPABASE_URL': 'https://p.supabase.co/'}
+    assert rest_endpoint(config) == 'https://p.supabase.co'
+    config['SETTINGS']['POSTGREST_URL'] = 'http://localhost:3000'
+    assert rest_endpoint(config) == 'http://localhost:3000'
@@ -0,0 +1,101 @@
+from app.config import AppConfig
+from app.core.link_index import link_key
+from app.core.resource_store import ResourceStore
+
+
+def test_keys_with_generic_query_parameters_are_recomputed(store):
+    store.insert_many([{'id': 'v2', 'title': 'v2 docs', 'link': 'https://docs.example.com/api?ref=v2'},
+                       {'id': 'v1', 'title': 'docs', 'link': 'https://docs.example.com/api'}])
+    # As written when ref was stripped as a tracking parameter
+    store._conn.execute("UPDATE resources SET link_key = ? WHERE id = 'v2'", (link_key('https://docs.example.com/api'),))
+    store._conn.execute("UPDATE meta SET value = '2' WHERE key = 'link_key_version'")
+    store._conn.commit()
+    store._conn.close()
+
+    reopened = ResourceStore(AppConfig.STORE_FILE, AppConfig.CSV_FILE)
+    assert reopened.merge_duplicates(dry_run=True)[:2] == (0, 0)
+
+
+def test_old_keys_of_non_http_links_are_recomputed(store):
+    store.insert_many([{'id': 'm', 'title': 'mail', 'link': 'mailto:a@b.com'},
+                       {'id': 'w', 'title': 'web', 'link': 'https://b.com'}])
+    # As written before non-http schemes were kept unchanged
+    store._conn.execute("UPDATE resources SET link_key = ? WHERE id = 'm'", (link_key('https://b.com'),))
+    store._conn.execute("DELETE FROM meta WHERE key = 'link_key_version'")
+    store._conn.commit()
+    store._conn.close()
+
+    reopened = ResourceStore(AppConfig.STORE_FILE, AppConfig.CSV_FILE)
+    assert reopened.has_link_key(link_key('mailto:a@b.com'))
+    keys = dict(reopened._conn.execute("SELECT id, link_key FROM resources"))
+    assert keys['m'] != keys['w']
+
+
+def _rows(n):
+    return [{'id': f'r{i:04d}', 'title': f'vector db {i}' if i % 2 else f'course {i}', 'link': f'https://x{i}.com'}
+            for i in range(n)]
+
+
+def test_search_prefix_and_hashtag(store):
+    store.insert_many([{'id': 'a', 'title': 'Vector databases', 'tags': '#RAG', 'link': 'https://a.com'},
+                       {'id': 'b', 'title': 'RAG course', 'tags': '#LLM', 'link': 'https://b.com'}])
+    assert store.search('vect') == ['a']
+    assert store.search('#rag') == ['a']
+    assert store.search('rag') == ['a', 'b']
+
+
+def test_search_among_many_ids_applies_limit_once(store):
+    store.insert_many(_rows(1300))
+    ids = [f'r{i:04d}' for i in range(1300)]
+    # Shuffled input; results must still come back in store order
+    found = store.search('vector', limit=10, ids=list(reversed(ids)))
+    assert found == [f'r{i:04d}' for i in range(1, 20, 2)]
+    assert len(store.search('vector', ids=ids)) == 650
+
+
+def test_csv_round_trip_and_import_when_newer(store, tmp_path):
+    store.insert_many(_rows(3))
+    assert store.dirty
+    store.export_csv(AppConfig.CSV_FILE)
+    assert not store.dirty
+
+    reopened = ResourceStore(str(tmp_path / "other.db"), AppConfig.CSV_FILE)
+    assert [r['id'] for r in reopened.all_rows()] == ['r0000', 'r0001', 'r0002']
+    assert reopened.get_rows(['r0001'])['r0001']['link'] == 'https://x1.com'
+
+
+def test_insert_ignores_known_ids_and_notifies(store):
+    events = []
+    store.subscribe(lambda kind, ids: events.append((kind, ids)))
+    assert store.insert_many(_rows(2)) == 2
+    assert store.insert_many(_rows(3)) == 1
+    assert store.count() == 3
+    assert [kind for kind, _ in events] == ['insert', 'insert']
+    assert store.has_link_key(link_key('http://www.x2.com/')) and not store.has_link_key(link_key('https://y.com'))
+
+
+def test_update_and_filtered_reads(store):
+    store.insert_many([{'id': 'a', 'title': 'A', 'category': 'AI', 'approved': 'true', 'link': 'https://a.com'},
+                       {'id': 'b', 'title': 'B', 'category': 'Data', 'approved': 'false', 'link': 'https://b.com'}])
+    assert store.update('b', 'category', 'AI')
+    assert not store.update('b', 'no_such_column', 'x') and not store.update('missing', 'title', 'x')
+    assert store.count_filtered(categories=['AI']) == 2
+    assert store.count_filtered(approved=True) == 1
+    assert [r for batch in store.iter_batches(['id'], approved=False) for r in batch] == [('b',)]
+    assert store.distinct('category') == ['AI']
+
+
+def test_merge_duplicates_keeps_the_oldest_row(store):
+    store.insert_many([{'id': 'a', 'title': 'A', 'tags': '#rag', 'link': 'https://a.com/docs'},
+                       {'id': 'b', 'title': 'B', 'tags': '#llm', 'description': 'text', 'link': 'http://www.a.com/docs/'}])
+    assert store.merge_duplicates(dry_run=True)[:2] == (1, 1) and store.count() == 2
+    groups, removed, _ = store.merge_duplicates()
+    assert (groups, removed) == (1, 1)
+    row = store.get_rows(['a'])['a']
+    assert (row['tags'], row['description']) == ('#rag, #llm', 'text')
+
+
+def test_insert_counts_rows_not_search_index_writes(store):
+    assert store.insert({'id': 'a', 'title': 'A', 'link': 'https://a.com'})
+    assert not store.insert({'id': 'a', 'title': 'A', 'link': 'https://a.com'})
+    assert store.insert_many(_rows(4)) == 4
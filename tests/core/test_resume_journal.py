@@ -0,0 +1,55 @@
+from app.config import AppConfig
+from app.core.buffered_writer import BufferedWriter
+from app.core.content_streamer import ContentStreamer
+from app.core.resume_journal import ResumeJournal
+
+TEXT = " ".join(f"word{i}" for i in range(3000))
+
+
+def _chunks(**resume_at):
+    pieces = iter([TEXT])
+    if resume_at: pieces = ContentStreamer._skip_chars(pieces, resume_at['start_offset'])
+    return list(ContentStreamer.chunk(pieces, chunk_size=1000, overlap=100, **resume_at))
+
+
+def test_checkpoint_is_taken_when_the_next_chunk_is_asked_for(data_dir):
+    journal = ResumeJournal(AppConfig.RESUME_JOURNAL_FILE)
+    chunks = _chunks()
+    stream = journal.track(((c, []) for c in chunks), "digest", "doc.txt")
+    next(stream)
+    assert journal.get("digest") is None
+    next(stream)
+    assert journal.get("digest") == (1, chunks[0].next_offset)
+    stream.close()
+    # The chunk being worked on at cancel time is not checkpointed
+    assert journal.get("digest") == (1, chunks[0].next_offset)
+
+
+def test_resume_offsets_continue_the_same_chunks(data_dir):
+    journal = ResumeJournal(AppConfig.RESUME_JOURNAL_FILE)
+    chunks = _chunks()
+    for _ in journal.track(((c, []) for c in chunks[:3]), "digest", "doc.txt"): pass
+    done, offset = journal.get("digest")
+    resumed = _chunks(start_index=done, start_offset=offset)
+    assert [(c.index, str(c)) for c in resumed] == [(c.index, str(c)) for c in chunks[3:]]
+    journal.clear("digest")
+    assert journal.get("digest") is None
+
+
+def test_checkpoints_stop_at_the_first_failed_chunk(data_dir):
+    journal = ResumeJournal(AppConfig.RESUME_JOURNAL_FILE)
+    chunks = _chunks()
+    results = [[], None, [], []]
+    for _ in journal.track(zip(chunks, results), "digest", "doc.txt"): pass
+    assert journal.get("digest") == (1, chunks[0].next_offset)
+
+
+def test_checkpoint_waits_for_the_writer(data_dir):
+    journal = ResumeJournal(AppConfig.RESUME_JOURNAL_FILE)
+    written = []
+    writer = BufferedWriter(written.extend, batch_rows=100, flush_interval=60)
+    chunk = _chunks()[0]
+    for _ in journal.track([(chunk, [])], "digest", "doc.txt", writer): writer.write({'link': 'a'})
+    assert journal.get("digest") is None
+    writer.close()
+    assert written and journal.get("digest") == (1, chunk.next_offset)
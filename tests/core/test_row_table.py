@@ -0,0 +1,48 @@
+import pytest
+
+from app.core.row_table import RowTable
+
+
+@pytest.fixture
+def table():
+    return RowTable(('id', 'title', 'category'), interned=('category',))
+
+
+def test_rows_read_like_dicts(table):
+    row = table.from_dict({'id': 'r1', 'title': 'Intro', 'category': 'Tools', 'extra': 'ignored'})
+    assert row['title'] == 'Intro'
+    assert row[0] == 'r1'
+    assert row.get('category') == 'Tools'
+    assert row.get('extra', 'n/a') == 'n/a'
+    assert 'title' in row and 'extra' not in row
+    assert list(row.keys()) == ['id', 'title', 'category']
+    assert dict(row.items()) == row.to_dict() == {'id': 'r1', 'title': 'Intro', 'category': 'Tools'}
+    with pytest.raises(KeyError):
+        row['extra']
+
+
+def test_missing_and_null_values_become_empty_strings(table):
+    assert table.from_dict({'id': 'r1'}).to_dict() == {'id': 'r1', 'title': '', 'category': ''}
+    assert table.from_tuple(('r2', None, 'Tools'))['title'] == ''
+
+
+def test_from_tuple_matches_from_dict(table):
+    assert table.from_tuple(('r1', 'Intro', 'Tools')) == table.from_dict(
+        {'id': 'r1', 'title': 'Intro', 'category': 'Tools'})
+
+
+def test_interned_columns_share_one_string(table):
+    # Build equal strings that are distinct objects, as rows fetched from SQLite would be
+    a = table.from_tuple(('r1', ''.join(['In', 'tro']), ''.join(['To', 'ols'])))
+    b = table.from_tuple(('r2', ''.join(['In', 'tro']), ''.join(['To', 'ols'])))
+    assert a['category'] is b['category']
+    assert a['title'] is not b['title']
+    table.from_tuple(('r3', 'x', 'Courses'))
+    assert table.cardinality() == {'category': 2}
+
+
+def test_rows_of_different_tables_keep_their_own_header():
+    one = RowTable(('id', 'title')).from_tuple(('r1', 'a'))
+    two = RowTable(('id', 'link')).from_tuple(('r1', 'b'))
+    assert 'title' in one and 'title' not in two
+    assert two['link'] == 'b'
@@ -0,0 +1,104 @@
+import pytest
+
+from app.core.supabase_sink import APIError, SupabaseUpsertSink
+
+
+class FakeResult:
+    def __init__(self, data):
+        self.data = data
+
+
+class FakeQuery:
+    def __init__(self, server, rows, upsert):
+        self.server, self.rows, self.upsert = server, rows, upsert
+
+    def execute(self):
+        server = self.server
+        server.requests.append((self.upsert, [r['link'] for r in self.rows]))
+        if server.outage: raise APIError(server.outage)
+        if self.upsert and not server.has_constraint:
+            raise APIError({'code': '42P10', 'message': 'no unique or exclusion constraint'})
+        if any(r.get('bad') for r in self.rows):
+            raise APIError({'code': '23502', 'message': 'null value in column "title"'})
+        new = [r for r in self.rows if not (self.upsert and r['link'] in server.links)]
+        server.links.update(r['link'] for r in new)
+        # ignore_duplicates: only inserted rows are returned
+        return FakeResult(new if self.upsert else [])
+
+
+class FakeTable:
+    def __init__(self, server):
+        self.server = server
+
+    def upsert(self, rows, on_conflict=None, ignore_duplicates=False):
+        assert on_conflict == 'link' and ignore_duplicates
+        return FakeQuery(self.server, rows, upsert=True)
+
+    def insert(self, rows):
+        return FakeQuery(self.server, rows, upsert=False)
+
+
+class FakeServer:
+    """Stand-in for the PostgREST table API used by the sink."""
+
+    def __init__(self, has_constraint=True, links=(), outage=None):
+        self.has_constraint = has_constraint
+        self.links = set(links)
+        self.outage = outage
+        self.requests = []
+
+    def table(self, name):
+        return FakeTable(self)
+
+
+def _rows(n, bad=()):
+    return [{'link': f'https://x{i}.com', 'title': f't{i}', 'bad': i in bad} for i in range(n)]
+
+
+def test_split_and_retry_isolates_one_bad_row():
+    server = FakeServer()
+    written, failed = [], []
+    sink = SupabaseUpsertSink(server, on_written=written.extend, on_failed=failed.extend)
+    sink(_rows(16, bad={5}))
+    assert [r['link'] for r in failed] == ['https://x5.com']
+    assert len(written) == 15
+    assert sink.inserted == 15 and sink.failed == 1
+    # 1 full batch + 2 halves + 2 quarters + 2 eighths + 2 single rows
+    assert len(server.requests) == 9
+
+
+def test_missing_unique_constraint_falls_back_to_plain_inserts():
+    server = FakeServer(has_constraint=False)
+    sink = SupabaseUpsertSink(server)
+    sink(_rows(4))
+    assert [upsert for upsert, _ in server.requests] == [True, False]
+    assert sink.conflict_column is None
+    assert sink.inserted == 4
+    sink(_rows(2))
+    assert server.requests[-1][0] is False
+
+
+def test_links_already_on_the_server_count_as_duplicates():
+    server = FakeServer(links={'https://x0.com', 'https://x2.com'})
+    written = []
+    sink = SupabaseUpsertSink(server, on_written=written.extend)
+    sink(_rows(5))
+    assert sink.inserted == 3 and sink.duplicates == 2
+    assert len(written) == 5
+    assert len(server.requests) == 1
+
+
+@pytest.mark.parametrize("error", [
+    {'code': 'PGRST301', 'message': 'JWT expired'},
+    {'code': '42501', 'message': 'permission denied for table requested_resources'},
+    {'code': 502, 'message': 'JSON could not be generated'},
+    {'code': '429', 'message': 'Too Many Requests'},
+])
+def test_outages_and_auth_errors_are_raised_not_split(error):
+    server = FakeServer(outage=error)
+    failed = []
+    sink = SupabaseUpsertSink(server, on_failed=failed.extend)
+    with pytest.raises(APIError):
+        sink(_rows(8))
+    assert failed == []
+    assert len(server.requests) == 1
@@ -0,0 +1,35 @@
+from app.core.tag_selector import GUIDE_HEADER, TagSelector, tag_tokens, tokenize
+
+ROWS = [
+    {'tag': '#VectorDatabase', 'group': 'Data', 'sub': 'Storage', 'defn': 'Stores embeddings for similarity search',
+     'example': 'Pinecone index'},
+    {'tag': '#PromptEngineering', 'group': 'LLM', 'sub': 'Prompting', 'defn': 'Designing prompts for language models',
+     'example': 'few-shot prompt templates'},
+    {'tag': '#AIConsulting', 'group': 'Business', 'sub': 'Services', 'defn': 'Advisory services for companies',
+     'example': 'strategy workshop'},
+]
+
+
+def test_tokens_split_camel_case_tags_and_drop_stopwords():
+    assert tag_tokens('#AIConsulting') == ['aiconsulting', 'ai', 'consulting']
+    assert tokenize("The use of a Vector DB") == ['vector', 'db']
+
+
+def test_select_ranks_the_relevant_tag_first():
+    selector = TagSelector(ROWS, top_n=2)
+    assert selector.select("A guide to vector database embeddings")[0]['tag'] == '#VectorDatabase'
+    assert selector.select("few-shot prompt templates for language models")[0]['tag'] == '#PromptEngineering'
+    assert len(selector.select("vector prompt consulting")) == 2
+
+
+def test_guide_falls_back_to_the_full_dictionary():
+    selector = TagSelector(ROWS)
+    guide = selector.guide_for("nothing in common here")
+    assert guide.startswith(GUIDE_HEADER)
+    assert all(r['tag'] in guide for r in ROWS)
+    assert selector.guide_for("vector embeddings").count("Tag: ") == 1
+
+
+def test_empty_reference():
+    selector = TagSelector([])
+    assert len(selector) == 0 and selector.select("anything") == []
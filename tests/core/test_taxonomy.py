@@ -0,0 +1,82 @@
+import os
+import pickle
+
+import pytest
+
+from app.core.data_handler import DataHandler
+from app.core.taxonomy import Taxonomy
+
+HEADER = "Hashtag;Primary Group;Subcategory;Definition / Purpose;Example Use Case\n"
+
+
+@pytest.fixture
+def ref_csv(data_dir, monkeypatch):
+    monkeypatch.setattr(Taxonomy, '_memo', {})
+    path = os.path.join(str(data_dir), 'tagging_reference.csv')
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(HEADER + "#Python;Programming;Languages;General purpose language.;Scripts\n")
+    return path
+
+
+@pytest.fixture
+def compiles(monkeypatch):
+    calls = []
+    read = DataHandler._read_ref_file
+
+    def counting(csv_path, mode='text', verbose=True):
+        calls.append(csv_path)
+        return read(csv_path, mode=mode, verbose=verbose)
+    monkeypatch.setattr(DataHandler, '_read_ref_file', staticmethod(counting))
+    return calls
+
+
+def _fresh_process(monkeypatch):
+    monkeypatch.setattr(Taxonomy, '_memo', {})
+
+
+def test_compile_writes_artifact_and_later_loads_skip_parsing(ref_csv, compiles, monkeypatch):
+    taxonomy = Taxonomy.load(ref_csv)
+    assert taxonomy.full_map['#python'] == {'group': 'Programming', 'sub': 'Languages'}
+    assert os.path.exists(Taxonomy.artifact_path(ref_csv))
+    assert len(compiles) == 1
+
+    assert Taxonomy.load(ref_csv) is taxonomy   # memo
+    _fresh_process(monkeypatch)
+    again = Taxonomy.load(ref_csv)              # artifact
+    assert again.rows == taxonomy.rows
+    assert len(compiles) == 1
+
+
+def test_touched_but_unchanged_csv_keeps_artifact(ref_csv, compiles, monkeypatch):
+    Taxonomy.load(ref_csv)
+    st = os.stat(ref_csv)
+    os.utime(ref_csv, ns=(st.st_atime_ns, st.st_mtime_ns + 5_000_000_000))
+    _fresh_process(monkeypatch)
+
+    Taxonomy.load(ref_csv)
+    assert len(compiles) == 1
+    with open(Taxonomy.artifact_path(ref_csv), 'rb') as f:
+        assert pickle.load(f)['mtime_ns'] == os.stat(ref_csv).st_mtime_ns
+
+
+def test_edited_csv_is_recompiled(ref_csv, compiles):
+    Taxonomy.load(ref_csv)
+    with open(ref_csv, 'a', encoding='utf-8') as f:
+        f.write("#Rust;Programming;Languages;Systems language.;Tools\n")
+    st = os.stat(ref_csv)
+    os.utime(ref_csv, ns=(st.st_atime_ns, st.st_mtime_ns + 5_000_000_000))
+
+    taxonomy = Taxonomy.load(ref_csv)
+    assert '#rust' in taxonomy.full_map
+    assert len(compiles) == 2
+
+
+def test_artifact_from_another_format_is_ignored(ref_csv, compiles, monkeypatch):
+    Taxonomy.load(ref_csv)
+    _fresh_process(monkeypatch)
+    monkeypatch.setattr(Taxonomy, 'FORMAT', Taxonomy.FORMAT + 1)
+
+    Taxonomy.load(ref_csv)
+    assert len(compiles) == 2
+    with open(Taxonomy.artifact_path(ref_csv), 'rb') as f:
+        assert pickle.load(f)['format'] == Taxonomy.FORMAT
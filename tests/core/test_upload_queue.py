@@ -0,0 +1,92 @@
+import json
+import os
+import threading
+
+from app.core.upload_queue import UploadQueue
+
+
+class FlakySink:
+    """Sink that fails its first `failures` calls."""
+
+    def __init__(self, failures=0):
+        self.failures = failures
+        self.calls = 0
+        self.batches = []
+
+    def __call__(self, rows):
+        self.calls += 1
+        if self.calls <= self.failures: raise ConnectionError("gateway timeout")
+        self.batches.append(list(rows))
+
+
+def _queue(sink, tmp_path, **kwargs):
+    kwargs.setdefault('base_delay', 0.001)
+    return UploadQueue(sink, flush_interval=0.05, dead_letter_path=str(tmp_path / "dead.jsonl"), **kwargs)
+
+
+def test_failed_batch_is_retried_with_backoff(tmp_path):
+    sink = FlakySink(failures=2)
+    uploader = _queue(sink, tmp_path, max_retries=3)
+    uploader.write({'link': 'a'})
+    uploader.close()
+    assert sink.batches == [[{'link': 'a'}]]
+    assert (uploader.sent, uploader.retries, uploader.dead_lettered) == (1, 2, 0)
+
+
+def test_rows_failing_every_retry_are_dead_lettered_and_replayed(tmp_path):
+    uploader = _queue(FlakySink(failures=99), tmp_path, max_retries=1)
+    uploader.write({'link': 'a'})
+    uploader.write({'link': 'b'})
+    uploader.close()
+    assert uploader.dead_lettered == 2
+    with open(tmp_path / "dead.jsonl", encoding='utf-8') as f:
+        assert [json.loads(line)['row']['link'] for line in f] == ['a', 'b']
+
+    sink = FlakySink()
+    uploader = _queue(sink, tmp_path)
+    rows = uploader.take_dead_letters()
+    assert [r['link'] for r in rows] == ['a', 'b']
+    assert not os.path.exists(tmp_path / "dead.jsonl")
+    # Kept until the replayed rows are handled, so a crash here loses nothing
+    assert os.path.exists(tmp_path / "dead.jsonl.replay")
+    for row in rows: uploader.write(row)
+    uploader.replay_queued()
+    uploader.close()
+    assert sink.batches == [rows]
+    assert not os.path.exists(tmp_path / "dead.jsonl.replay")
+
+
+def test_interrupted_replay_is_taken_again(tmp_path):
+    uploader = _queue(FlakySink(failures=99), tmp_path, max_retries=0)
+    uploader.write({'link': 'a'})
+    uploader.close()
+    assert [r['link'] for r in uploader.take_dead_letters()] == ['a']
+
+    # The run stopped before the replay was handled, and left a new dead letter behind
+    uploader = _queue(FlakySink(failures=99), tmp_path, max_retries=0)
+    uploader.write({'link': 'b'})
+    uploader.close()
+    assert sorted(r['link'] for r in uploader.take_dead_letters()) == ['a', 'b']
+
+
+def test_defer_runs_after_earlier_rows_are_handled(tmp_path):
+    events = []
+    uploader = _queue(lambda rows: events.extend(r['link'] for r in rows), tmp_path, batch_rows=100)
+    uploader.defer(lambda: events.append('start'))
+    uploader.write({'link': 'a'})
+    uploader.write({'link': 'b'})
+    uploader.defer(lambda: events.append('done'))
+    uploader.write({'link': 'c'})
+    uploader.close()
+    assert events.index('start') == 0
+    assert events.index('done') > events.index('b')
+    assert events.count('c') == 1
+
+
+def test_cancel_dead_letters_instead_of_backing_off(tmp_path):
+    stop_event = threading.Event()
+    stop_event.set()
+    uploader = _queue(FlakySink(failures=99), tmp_path, max_retries=5, base_delay=60, stop_event=stop_event)
+    uploader.write({'link': 'a'})
+    uploader.close()
+    assert (uploader.retries, uploader.dead_lettered) == (0, 1)
@@ -0,0 +1,61 @@
+import threading
+import time
+
+from app.core.link_index import link_key
+from app.core.worker_pool import FilePool, RunStats, SharedLinkSet
+
+
+def test_only_one_task_claims_a_link():
+    links = SharedLinkSet(key=link_key)
+    wins = []
+    start = threading.Barrier(8)
+
+    def claim():
+        start.wait()
+        wins.append(links.claim("https://www.example.com/page?utm_source=x"))
+
+    threads = [threading.Thread(target=claim) for _ in range(8)]
+    for t in threads: t.start()
+    for t in threads: t.join()
+    assert wins.count(True) == 1
+    assert "https://example.com/page" in links
+
+
+def test_lookup_and_release():
+    links = SharedLinkSet(key=link_key, lookup={link_key("https://old.com")}.__contains__)
+    assert "https://old.com" in links and not links.claim("https://old.com")
+    assert links.claim("https://new.com")
+    links.release("https://new.com")
+    assert links.claim("https://new.com")
+    assert len(links) == 1
+
+
+def test_pool_runs_every_file_with_bounded_concurrency():
+    stats = RunStats()
+    running, peak = [0], [0]
+    lock = threading.Lock()
+
+    def task(i, filename):
+        with lock:
+            running[0] += 1
+            peak[0] = max(peak[0], running[0])
+        time.sleep(0.02)
+        with lock: running[0] -= 1
+        if filename == 'bad': raise ValueError("broken file")
+        stats.add('done')
+
+    FilePool.run([f'f{i}' for i in range(7)] + ['bad'], task, workers=3)
+    assert stats['done'] == 7
+    assert 1 < peak[0] <= 3
+
+
+def test_pool_stops_between_files():
+    stop_event = threading.Event()
+    seen = []
+
+    def task(i, filename):
+        seen.append(filename)
+        stop_event.set()
+
+    FilePool.run(['a', 'b', 'c'], task, workers=1, stop_event=stop_event)
+    assert seen == ['a']
@@ -0,0 +1,26 @@
+from app.core.tag_selector import TagSelector
+from app.workers.script_guide_eval import _evaluate
+
+ROWS = [{'tag': '#RAG', 'group': 'LLM', 'sub': 'Retrieval', 'defn': 'retrieval augmented generation', 'example': ''}]
+
+
+class FakeAI:
+    """extract_resource scripted per chunk: None stands for a failed request."""
+
+    def __init__(self, answers):
+        self.answers = answers
+
+    def extract_resource(self, chunk, guide):
+        return self.answers[chunk]
+
+
+def test_failed_samples_are_counted_apart():
+    ai = FakeAI({
+        "ok": [{'link': 'https://a.com', 'tags': ['#RAG']}, {'link': 'https://b.com', 'tags': []}],
+        "failed": None,
+        "empty": [],
+    })
+    r = _evaluate(ai, ["ok", "failed", "empty"], "full guide", TagSelector(ROWS), {})
+    assert (r['compared'], r['failed']) == (2, 1)
+    assert (r['full_links'], r['shared_links']) == (2, 2)
+    assert r['jaccard_sum'] == 2.0 and r['same_category'] == 2